@@ -0,0 +1,332 @@
+"""
+Export analitik kolumnar (incremental) untuk riwayat transaksi.
+
+Menulis snapshot `Transaksi`, `TransaksiItem`, dan `Produk` ke file yang
+dipartisi per bulan (gaya Hive, langsung bisa dibaca pandas / DuckDB /
+pyarrow.dataset) supaya analisis berat dijalankan di luar mesin kasir:
+
+    data/analytics/
+        transaksi/bulan=2026-01/part-0000000000.parquet
+        transaksi_item/bulan=2026-01/part-0000000000.parquet
+        produk/produk.parquet          (snapshot terbaru, ditimpa tiap run)
+        _watermark.json                ({"transaksi_id": 1234, "format": ...})
+
+Setiap run hanya menulis transaksi dengan id > watermark (sampai id terbesar
+saat run dimulai) sebagai file part baru bernama `part-<watermark lama>`,
+lalu watermark disimpan paling akhir. Jika run terputus, run berikutnya
+mulai dari watermark yang sama dan menimpa part yang sama (tanpa duplikat).
+
+Format: Parquet jika `pyarrow` terpasang (opsional), selain itu CSV gzip
+(`.csv.gz`, stdlib). Diatur lewat ANALYTICS_EXPORT_FORMAT (auto/parquet/csv);
+folder lewat ANALYTICS_EXPORT_DIR.
+
+Dipanggil dari scheduler (ANALYTICS_EXPORT_INTERVAL_MINUTES) dan CLI
+`tools/export_analytics.py`.
+"""
+
+import csv
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Iterable
+
+from sqlalchemy import func, select
+
+try:
+    from app.models import get_local_now, Kategori, Produk, Transaksi, TransaksiItem
+    from app.leader import file_lock
+except Exception:
+    from models import get_local_now, Kategori, Produk, Transaksi, TransaksiItem
+    from leader import file_lock
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, 'data', 'analytics')
+DEFAULT_CHUNK_SIZE = 5000
+WATERMARK_FILE = '_watermark.json'
+
+EXTENSIONS = {'parquet': '.parquet', 'csv': '.csv.gz'}
+
+# (kolom, tipe) per tabel; tipe: int, float, str, datetime
+TRANSAKSI_COLUMNS = [
+    ('id', 'int'), ('kode_transaksi', 'str'), ('tanggal', 'datetime'),
+    ('subtotal', 'float'), ('discount_percent', 'float'), ('discount_amount', 'float'),
+    ('total', 'float'), ('bayar', 'float'), ('kembalian', 'float'),
+    ('payment_method', 'str'), ('user_id', 'int'), ('member_id', 'int'), ('points_earned', 'int'),
+]
+ITEM_COLUMNS = [
+    ('id', 'int'), ('transaksi_id', 'int'), ('tanggal', 'datetime'), ('produk_id', 'int'),
+    ('jumlah', 'int'), ('harga', 'float'), ('subtotal', 'float'), ('harga_beli', 'float'),
+    ('varian_barcode', 'str'), ('varian_nama', 'str'),
+]
+PRODUK_COLUMNS = [
+    ('id', 'int'), ('kode', 'str'), ('nama', 'str'), ('kategori_id', 'int'), ('kategori', 'str'),
+    ('harga_beli', 'float'), ('harga_jual', 'float'), ('stok', 'int'), ('satuan', 'str'),
+]
+
+
+def get_export_dir() -> str:
+    return os.environ.get('ANALYTICS_EXPORT_DIR') or DEFAULT_EXPORT_DIR
+
+
+def get_export_interval_minutes() -> int:
+    """Interval export terjadwal (menit); 0 = nonaktif."""
+    try:
+        return max(0, int(os.environ.get('ANALYTICS_EXPORT_INTERVAL_MINUTES', 60)))
+    except (TypeError, ValueError):
+        return 60
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(fmt: str | None = None) -> str:
+    """'parquet' atau 'csv' (auto = parquet jika pyarrow terpasang)."""
+    fmt = (fmt or os.environ.get('ANALYTICS_EXPORT_FORMAT') or 'auto').strip().lower()
+    if fmt == 'auto':
+        return 'parquet' if pyarrow_available() else 'csv'
+    if fmt not in EXTENSIONS:
+        raise ValueError(f'Format export tidak dikenal: {fmt} (auto/parquet/csv)')
+    if fmt == 'parquet' and not pyarrow_available():
+        raise RuntimeError('Format parquet butuh pyarrow (pip install pyarrow)')
+    return fmt
+
+
+# -------------------- penulis file --------------------
+
+class _TableWriter:
+    """Satu file tujuan; ditulis ke `.part` lalu di-rename saat `close()`."""
+
+    def __init__(self, path: str, columns: list[tuple[str, str]], fmt: str, batch_size: int):
+        self.path = path
+        self.tmp_path = f'{path}.{os.getpid()}.part'
+        self.columns = columns
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.rows = 0
+        self._buffer: list[tuple] = []
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if fmt == 'csv':
+            self._fh = gzip.open(self.tmp_path, 'wt', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._fh)
+            self._csv.writerow([name for name, _ in columns])
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'datetime': pa.timestamp('us')}
+            self._schema = pa.schema([(name, types[kind]) for name, kind in columns])
+            self._parquet = pq.ParquetWriter(self.tmp_path, self._schema, compression='zstd')
+
+    def write(self, row: tuple) -> None:
+        self.rows += 1
+        if self.fmt == 'csv':
+            self._csv.writerow(['' if v is None else (v.isoformat(sep=' ') if isinstance(v, datetime) else v)
+                                for v in row])
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        import pyarrow as pa
+
+        arrays = {name: [row[i] for row in self._buffer] for i, (name, _) in enumerate(self.columns)}
+        self._parquet.write_table(pa.Table.from_pydict(arrays, schema=self._schema))
+        self._buffer = []
+
+    def close(self) -> None:
+        if self.fmt == 'csv':
+            self._fh.close()
+        else:
+            self._flush()
+            self._parquet.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        try:
+            if self.fmt == 'csv':
+                self._fh.close()
+            else:
+                self._parquet.close()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+
+class _PartitionedWriter:
+    """Writer per partisi `bulan=YYYY-MM` (dibuka saat baris pertama bulan itu datang)."""
+
+    def __init__(self, table_dir: str, columns: list[tuple[str, str]], fmt: str, part_name: str, batch_size: int):
+        self.table_dir = table_dir
+        self.columns = columns
+        self.fmt = fmt
+        self.part_name = part_name
+        self.batch_size = batch_size
+        self._writers: dict[str, _TableWriter] = {}
+
+    def write(self, bulan: str, row: tuple) -> None:
+        writer = self._writers.get(bulan)
+        if writer is None:
+            path = os.path.join(self.table_dir, f'bulan={bulan}', f'{self.part_name}{EXTENSIONS[self.fmt]}')
+            writer = self._writers[bulan] = _TableWriter(path, self.columns, self.fmt, self.batch_size)
+        writer.write(row)
+
+    @property
+    def rows(self) -> int:
+        return sum(w.rows for w in self._writers.values())
+
+    @property
+    def partitions(self) -> list[str]:
+        return sorted(self._writers)
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+    def abort(self) -> None:
+        for writer in self._writers.values():
+            writer.abort()
+
+
+# -------------------- watermark --------------------
+
+def read_watermark(out_dir: str | None = None) -> dict:
+    path = os.path.join(out_dir or get_export_dir(), WATERMARK_FILE)
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_watermark(out_dir: str, state: dict) -> None:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    tmp_path = f'{path}.{os.getpid()}.part'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp_path, path)
+
+
+# -------------------- export --------------------
+
+def _bulan(tanggal: datetime | None) -> str:
+    return tanggal.strftime('%Y-%m') if tanggal else 'unknown'
+
+
+def _iter_rows(session: Any, stmt, chunk_size: int) -> Iterable:
+    return session.execute(stmt.execution_options(yield_per=chunk_size))
+
+
+def export_analytics(
+    session: Any,
+    out_dir: str | None = None,
+    fmt: str | None = None,
+    full: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    """
+    Export transaksi baru sejak watermark + snapshot produk.
+
+    Args:
+        session: SQLAlchemy session (hanya membaca)
+        out_dir: Folder tujuan (default ANALYTICS_EXPORT_DIR / data/analytics)
+        fmt: 'auto', 'parquet', atau 'csv'
+        full: Hapus export lama dan tulis ulang semua transaksi
+
+    Returns:
+        dict format, dari_id, sampai_id, transaksi, item, produk, partisi
+    """
+    out_dir = out_dir or get_export_dir()
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Scheduler & CLI tidak boleh menulis watermark bersamaan
+    with file_lock(os.path.join(out_dir, '.lock')):
+        state = read_watermark(out_dir)
+        fmt = resolve_format(fmt or state.get('format'))
+        if not full and state.get('format') and state['format'] != fmt:
+            raise ValueError(f"Export lama memakai format {state['format']}; jalankan ulang dengan full=True")
+
+        last_id = 0 if full else int(state.get('transaksi_id') or 0)
+        max_id = session.query(func.coalesce(func.max(Transaksi.id), 0)).scalar()
+        if max_id < last_id:
+            # Transaksi direset (id mulai dari awal lagi): mirror ikut ditulis ulang
+            print(f'[Analytics] Transaksi terakhir #{max_id} < watermark #{last_id}, export ulang penuh')
+            full, last_id = True, 0
+
+        if full:
+            # Watermark di-nol-kan dulu: jika run ini terputus, run berikutnya tetap mulai dari awal
+            _write_watermark(out_dir, {'transaksi_id': 0, 'format': fmt})
+            for table in ('transaksi', 'transaksi_item'):
+                shutil.rmtree(os.path.join(out_dir, table), ignore_errors=True)
+
+        part_name = f'part-{last_id:010d}'
+        trx_writer = _PartitionedWriter(os.path.join(out_dir, 'transaksi'), TRANSAKSI_COLUMNS, fmt, part_name, chunk_size)
+        item_writer = _PartitionedWriter(os.path.join(out_dir, 'transaksi_item'), ITEM_COLUMNS, fmt, part_name, chunk_size)
+        produk_writer = _TableWriter(os.path.join(out_dir, 'produk', f'produk{EXTENSIONS[fmt]}'),
+                                     PRODUK_COLUMNS, fmt, chunk_size)
+        writers = (trx_writer, item_writer, produk_writer)
+
+        try:
+            if max_id > last_id:
+                trx_cols = [getattr(Transaksi, name) for name, _ in TRANSAKSI_COLUMNS]
+                stmt = (select(*trx_cols)
+                        .where(Transaksi.id > last_id, Transaksi.id <= max_id)
+                        .order_by(Transaksi.id))
+                for row in _iter_rows(session, stmt, chunk_size):
+                    trx_writer.write(_bulan(row.tanggal), tuple(row))
+
+                item_cols = [Transaksi.tanggal if name == 'tanggal' else getattr(TransaksiItem, name)
+                             for name, _ in ITEM_COLUMNS]
+                stmt = (select(*item_cols)
+                        .join(Transaksi, Transaksi.id == TransaksiItem.transaksi_id)
+                        .where(TransaksiItem.transaksi_id > last_id, TransaksiItem.transaksi_id <= max_id)
+                        .order_by(TransaksiItem.transaksi_id, TransaksiItem.id))
+                for row in _iter_rows(session, stmt, chunk_size):
+                    item_writer.write(_bulan(row.tanggal), tuple(row))
+
+            produk_cols = [Kategori.nama if name == 'kategori' else getattr(Produk, name)
+                           for name, _ in PRODUK_COLUMNS]
+            stmt = (select(*produk_cols)
+                    .outerjoin(Kategori, Kategori.id == Produk.kategori_id)
+                    .order_by(Produk.id))
+            for row in _iter_rows(session, stmt, chunk_size):
+                produk_writer.write(tuple(row))
+        except Exception:
+            for writer in writers:
+                writer.abort()
+            raise
+
+        for writer in writers:
+            writer.close()
+
+        # Watermark disimpan paling akhir: part di atas sudah lengkap di disk
+        _write_watermark(out_dir, {
+            'transaksi_id': max(max_id, last_id),
+            'format': fmt,
+            'updated_at': get_local_now().strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    result = {
+        'format': fmt,
+        'dari_id': last_id,
+        'sampai_id': max(max_id, last_id),
+        'transaksi': trx_writer.rows,
+        'item': item_writer.rows,
+        'produk': produk_writer.rows,
+        'partisi': trx_writer.partitions,
+    }
+    print(f"[Analytics] Export {fmt}: {result['transaksi']} transaksi, {result['item']} item "
+          f"(#{last_id + 1}..#{result['sampai_id']}), {result['produk']} produk -> {out_dir}")
+    return result
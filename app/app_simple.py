@@ -4,24 +4,37 @@ import shutil
 import math
 from datetime import datetime, timedelta, timezone
 import threading
+import importlib.util
 from flask import Flask, render_template, redirect, url_for, flash, request, jsonify, session, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import or_, text
+from sqlalchemy import bindparam, or_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from flask_wtf import FlaskForm, CSRFProtect
 from flask_wtf.csrf import CSRFError, generate_csrf
 from wtforms import StringField, PasswordField, SubmitField, DecimalField, IntegerField, SelectField, TextAreaField, HiddenField
 from wtforms.validators import DataRequired, Length, NumberRange, ValidationError, Optional
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime as dt, date
 import json
 import io
-from openpyxl import Workbook, load_workbook
-from openpyxl.chart import BarChart, Reference
-from openpyxl.styles import Alignment, Font
 from pathlib import Path
 
+# Model database (tanpa efek samping, juga dipakai tools & migrasi)
+try:
+    from app.models import (
+        db, get_local_now, get_member_level, LEVEL_RULES,
+        User, Kategori, Member, Produk, HargaVariasi, VarianProduk,
+        KodeSequence, PenjualanHarian, PenjualanHarianProduk, ExportJob, CacheVersion, KatalogVersi, CheckoutIdempotensi,
+        Transaksi, TransaksiItem, Pengaturan,
+    )
+except Exception:
+    from models import (
+        db, get_local_now, get_member_level, LEVEL_RULES,
+        User, Kategori, Member, Produk, HargaVariasi, VarianProduk,
+        KodeSequence, PenjualanHarian, PenjualanHarianProduk, ExportJob, CacheVersion, KatalogVersi, CheckoutIdempotensi,
+        Transaksi, TransaksiItem, Pengaturan,
+    )
+
 # Licensing (optional in older deployments)
 try:
     from app.license_manager import (
@@ -36,29 +49,140 @@ try:
 except Exception:
     LICENSE_AVAILABLE = False
 
-# Scheduler (optional)
+# Scheduler (optional, di-import saat start_scheduler dipanggil)
+SCHEDULER_AVAILABLE = importlib.util.find_spec('apscheduler') is not None
+if not SCHEDULER_AVAILABLE:
+    print('[WARNING] APScheduler not available. Scheduler features are disabled.')
+
+# Telegram Bot Integration (python-telegram-bot di-import saat bot pertama kali dipakai)
+TELEGRAM_AVAILABLE = importlib.util.find_spec('telegram') is not None
+if not TELEGRAM_AVAILABLE:
+    print('[WARNING] Telegram bot module not available. Telegram monitoring is disabled.')
+
+def _telegram_module():
+    # In Docker builds, the module may live as app.telegram_bot (package) instead of telegram_bot (top-level).
+    try:
+        from app import telegram_bot as module
+    except Exception:
+        import telegram_bot as module
+    return module
+
+def initialize_telegram_bot(token, admin_chat_ids, flask_app=None):
+    return _telegram_module().initialize_telegram_bot(token, admin_chat_ids, flask_app)
+
+def get_telegram_bot():
+    """Bot global, atau None jika modul bot belum pernah dimuat (berarti belum diinisialisasi)."""
+    module = sys.modules.get('app.telegram_bot') or sys.modules.get('telegram_bot')
+    return module.get_telegram_bot() if module else None
+
+# Background backup worker (coalesces post-checkout backups)
 try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-    from apscheduler.triggers.cron import CronTrigger
-    SCHEDULER_AVAILABLE = True
+    from app.backup_engine import online_backup, get_backup_progress
+    from app.backup_store import BackupStore
+    from app.backup_worker import initialize_backup_worker, get_backup_worker, DatabaseChangeWatcher
 except Exception:
-    BackgroundScheduler = None  # type: ignore[assignment]
-    CronTrigger = None  # type: ignore[assignment]
-    SCHEDULER_AVAILABLE = False
-    print('[WARNING] APScheduler not available. Scheduler features are disabled.')
+    from backup_engine import online_backup, get_backup_progress
+    from backup_store import BackupStore
+    from backup_worker import initialize_backup_worker, get_backup_worker, DatabaseChangeWatcher
 
-# Telegram Bot Integration
-# In Docker builds, the module may live as app.telegram_bot (package) instead of telegram_bot (top-level).
+# Leader election (multi-worker WSGI): hanya leader yang menjalankan bot & scheduler
 try:
-    from app.telegram_bot import initialize_telegram_bot, get_telegram_bot
-    TELEGRAM_AVAILABLE = True
+    from app.leader import is_leader
 except Exception:
-    try:
-        from telegram_bot import initialize_telegram_bot, get_telegram_bot
-        TELEGRAM_AVAILABLE = True
-    except Exception:
-        TELEGRAM_AVAILABLE = False
-        print('[WARNING] Telegram bot module not available. Telegram monitoring is disabled.')
+    from leader import is_leader
+
+# Atomic stock operations (conditional UPDATE)
+try:
+    from app.stock_ops import decrement_stock_bulk, find_shortages, InsufficientStock
+except Exception:
+    from stock_ops import decrement_stock_bulk, find_shortages, InsufficientStock
+
+# Nomor transaksi (sequence per scope, bebas tabrakan)
+try:
+    from app.kode_transaksi import allocate_kode_transaksi
+except Exception:
+    from kode_transaksi import allocate_kode_transaksi
+
+# SQLite PRAGMA tuning (WAL, busy_timeout, synchronous, mmap, cache), dipasang create_app()
+try:
+    from app.factory import create_app
+    from app.db_tuning import checkpoint, get_checkpoint_minutes
+except Exception:
+    from factory import create_app
+    from db_tuning import checkpoint, get_checkpoint_minutes
+
+# Filter rentang tanggal setengah terbuka (memakai idx_transaksi_tanggal)
+try:
+    from app.date_range import as_date, filter_tanggal
+except Exception:
+    from date_range import as_date, filter_tanggal
+
+# Export Excel streaming (write-only workbook, named style, spooled file)
+try:
+    from app.excel_export import (
+        new_workbook, set_column_widths, styled, styled_row, merge_row,
+        iter_query, send_workbook, XLSX_MIMETYPE,
+    )
+except Exception:
+    from excel_export import (
+        new_workbook, set_column_widths, styled, styled_row, merge_row,
+        iter_query, send_workbook, XLSX_MIMETYPE,
+    )
+
+# Cache hasil laporan (LRU memori + file xlsx di disk)
+try:
+    from app.report_cache import initialize_report_cache, get_report_cache, ensure_triggers as ensure_report_cache_triggers
+except Exception:
+    from report_cache import initialize_report_cache, get_report_cache, ensure_triggers as ensure_report_cache_triggers
+
+# Antrian job export di background (tabel export_job + thread pool)
+try:
+    from app.export_jobs import initialize_export_queue, get_export_queue
+except Exception:
+    from export_jobs import initialize_export_queue, get_export_queue
+
+# Export analitik kolumnar (Parquet / CSV.gz) incremental per bulan
+try:
+    from app.analytics_export import export_analytics, get_export_interval_minutes
+except Exception:
+    from analytics_export import export_analytics, get_export_interval_minutes
+
+# Query agregasi laporan (SUM/COUNT di SQL) & rollup penjualan harian
+try:
+    from app import report_queries, sales_rollup
+except Exception:
+    import report_queries
+    import sales_rollup
+
+# Index pencarian produk (SQLite FTS5 trigram)
+try:
+    from app import product_search
+except Exception:
+    import product_search
+
+# Serialisasi daftar produk untuk API (IN query + orjson opsional + ETag)
+try:
+    from app.produk_serializer import produk_dicts, json_response
+except Exception:
+    from produk_serializer import produk_dicts, json_response
+
+# Kunci idempotensi checkout (retry & antrian offline kasir)
+try:
+    from app import idempotensi
+except Exception:
+    import idempotensi
+
+# Snapshot + delta katalog untuk cache IndexedDB di halaman kasir
+try:
+    from app import katalog_sync
+except Exception:
+    import katalog_sync
+
+# Lookup barcode persis (map di memori per proses) untuk scanner kasir
+try:
+    from app.barcode_index import get_barcode_index, ensure_triggers as ensure_barcode_triggers
+except Exception:
+    from barcode_index import get_barcode_index, ensure_triggers as ensure_barcode_triggers
 
 _telegram_start_lock = threading.Lock()
 _telegram_started = False
@@ -69,6 +193,9 @@ def _start_telegram_bot_if_configured(app: Flask) -> None:
     if _telegram_started or not TELEGRAM_AVAILABLE:
         return
 
+    if not is_leader():
+        return
+
     if LICENSE_AVAILABLE and not allows_telegram():
         return
 
@@ -100,17 +227,8 @@ def _start_telegram_bot_if_configured(app: Flask) -> None:
         except Exception as e:
             print(f'❌ Telegram Bot error (auto): {e}')
 
-print('=' * 60)
-print('KASIR TOKO SEMBAKO - WITH SIMPLE BACKUP SYSTEM')
-print('=' * 60)
-
 # ==================== TIMEZONE HELPER ====================
 
-def get_local_now():
-    """Get current time in local timezone"""
-    # Gunakan waktu lokal sistem (otomatis detect timezone dari OS)
-    return datetime.now()
-
 def get_local_timezone_name():
     """Get local timezone name (WIB/WITA/WIT/etc)"""
     import time
@@ -139,16 +257,21 @@ def get_local_timezone_name():
         sign = '+' if offset_hours >= 0 else '-'
         return f'UTC{sign}{abs(offset_hours)}'
 
-# Debug: Print current time saat startup
-local_tz_name = get_local_timezone_name()
-print(f'[TIME] Local System Time: {get_local_now().strftime("%Y-%m-%d %H:%M:%S")}')
-print(f'[TIME] Detected Timezone: {local_tz_name}')
-print('=' * 60)
+def print_startup_banner():
+    """Banner & info waktu saat server start (tidak dijalankan saat modul di-import)"""
+    print('=' * 60)
+    print('KASIR TOKO SEMBAKO - WITH SIMPLE BACKUP SYSTEM')
+    print('=' * 60)
+    print(f'[TIME] Local System Time: {get_local_now().strftime("%Y-%m-%d %H:%M:%S")}')
+    print(f'[TIME] Detected Timezone: {get_local_timezone_name()}')
+    print('=' * 60)
 
 # ==================== SIMPLE BACKUP ====================
 
+backup_store = BackupStore(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backups', 'store'))
+
 def backup_database():
-    """Backup database dengan error handling yang lebih baik"""
+    """Backup database (online backup API, aman saat ada transaksi berjalan)"""
     # Get base directory (parent of app folder)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     db_file = os.path.join(base_dir, 'instance', 'kasir.db')
@@ -176,42 +299,32 @@ def backup_database():
                 print("[Backup] ⚠️ Database kosong, backup dibatalkan")
                 return False
             
-            # Nama file backup
-            timestamp = get_local_now().strftime('%Y%m%d_%H%M%S')
-            backup_file = f'{backup_folder}/kasir_backup_{timestamp}.db'
+            # Online backup (sqlite3 backup API) + verifikasi quick_check
+            # ke file staging, lalu disimpan ke store (chunk dedup + kompresi)
+            staging_file = os.path.join(backup_folder, 'store', f'_staging_{os.getpid()}_{threading.get_ident()}.db')
+            result = online_backup(db_file, staging_file)
+            if not result.ok:
+                print(f'[Backup] ✗ {result.reason}' + (f' ({result.verify})' if result.verify else ''))
+                return False
             
-            # Copy database dengan verifikasi
-            shutil.copy2(db_file, backup_file)
+            try:
+                snap = backup_store.add_snapshot(staging_file, created_at=get_local_now())
+            finally:
+                if os.path.exists(staging_file):
+                    os.remove(staging_file)
             
-            # Verifikasi backup
-            if os.path.exists(backup_file):
-                backup_size = os.path.getsize(backup_file)
-                if backup_size == db_size:
-                    print(f'[Backup] ✓ {backup_file}')
-                    print(f'[Backup] Size: {backup_size/1024:.1f} KB')
-                    
-                    # Hapus backup lama (simpan 10 terbaru)
-                    try:
-                        backups = sorted([
-                            f for f in os.listdir(backup_folder) 
-                            if f.startswith('kasir_backup_') and f.endswith('.db')
-                        ])
-                        if len(backups) > 10:
-                            for old_backup in backups[:-10]:
-                                old_path = os.path.join(backup_folder, old_backup)
-                                os.remove(old_path)
-                                print(f'[Backup] Hapus backup lama: {old_backup}')
-                    except Exception as e:
-                        print(f'[Backup] ⚠️ Gagal hapus backup lama: {e}')
-                    
-                    return True
-                else:
-                    print(f'[Backup] ✗ Ukuran backup tidak sesuai')
-                    os.remove(backup_file)  # Hapus backup yang rusak
-                    return False
-            else:
-                print(f'[Backup] ✗ File backup tidak terbuat')
-                return False
+            print(f'[Backup] ✓ {snap.id}')
+            print(f'[Backup] Size: {snap.size_bytes/1024:.1f} KB | {snap.chunk_count} chunks ({snap.new_chunks} baru, {snap.stored_bytes/1024:.1f} KB ditulis) | {result.duration_s:.2f}s | {result.verify}')
+            
+            # Retensi bertingkat (hourly/daily/weekly) + hapus chunk yatim
+            try:
+                pruned = backup_store.prune()
+                if pruned['snapshots_removed']:
+                    print(f"[Backup] Hapus snapshot lama: {pruned['snapshots_removed']} ({pruned['chunks_removed']} chunk)")
+            except Exception as e:
+                print(f'[Backup] ⚠️ Gagal hapus backup lama: {e}')
+            
+            return True
                 
         except Exception as e:
             print(f'[Backup] ✗ Error: {e}')
@@ -220,23 +333,24 @@ def backup_database():
         print(f'[Backup] ✗ Database not found: {db_file}')
         return False
 
+initialize_backup_worker(backup_database)
+
 # ==================== FLASK APP ====================
 
 # Get base directory
 base_app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 db_path = os.path.join(base_app_dir, 'instance', 'kasir.db')
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'rahasia-sangat-rahasia-123456'
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path.replace(os.sep, "/")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['REMEMBER_COOKIE_SAMESITE'] = 'Lax'
-
-# License enforcement toggle (opt-in; sale builds set LICENSE_ENFORCE=true)
-app.config['LICENSE_ENFORCE'] = (os.environ.get('LICENSE_ENFORCE', 'false') or 'false').lower() == 'true'
-
-db = SQLAlchemy(app)
+# Database + tuning SQLite lewat factory yang sama dengan tools/migrasi
+app = create_app({
+    'SECRET_KEY': 'rahasia-sangat-rahasia-123456',
+    'SESSION_COOKIE_SAMESITE': 'Lax',
+    'REMEMBER_COOKIE_SAMESITE': 'Lax',
+    # License enforcement toggle (opt-in; sale builds set LICENSE_ENFORCE=true)
+    'LICENSE_ENFORCE': (os.environ.get('LICENSE_ENFORCE', 'false') or 'false').lower() == 'true',
+}, import_name=__name__)
+initialize_report_cache(os.path.join(app.instance_path, 'report_cache'))
+initialize_export_queue(app, os.path.join(app.instance_path, 'exports'))
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 csrf = CSRFProtect(app)
@@ -324,7 +438,7 @@ def license_activate():
     )
 
 # ==================== SCHEDULER - Daily Saldo Archive ====================
-scheduler = BackgroundScheduler() if SCHEDULER_AVAILABLE else None
+scheduler = None
 
 def archive_daily_saldo():
     """Archive daily saldo setiap hari jam 22:30."""
@@ -383,6 +497,102 @@ def generate_daily_report():
         except Exception as e:
             print(f'[SCHEDULER ERROR] Failed to generate daily report: {e}')
 
+def recompute_member_aggregates(apply=True):
+    """
+    Hitung ulang points & total_spent member dari tabel Transaksi.
+
+    Dipakai untuk memperbaiki drift (mis. crash lama di tengah checkout).
+    Catatan: nilai hasil import Excel tanpa transaksi akan ikut di-reset,
+    karena itu job terjadwal default hanya melaporkan (MEMBER_AGGREGATE_REPAIR).
+
+    Returns:
+        List dict member yang nilainya berbeda (sebelum diperbaiki)
+    """
+    with app.app_context():
+        totals = {
+            row.member_id: (int(row.points or 0), float(row.total_spent or 0))
+            for row in db.session.query(
+                Transaksi.member_id,
+                db.func.sum(Transaksi.points_earned).label('points'),
+                db.func.sum(Transaksi.total).label('total_spent')
+            )
+            .filter(Transaksi.member_id.isnot(None))
+            .group_by(Transaksi.member_id)
+            .all()
+        }
+
+        drift = []
+        for member_id, points, total_spent in db.session.query(Member.id, Member.points, Member.total_spent).all():
+            exp_points, exp_spent = totals.get(member_id, (0, 0.0))
+            if (points or 0) != exp_points or abs((total_spent or 0) - exp_spent) > 0.005:
+                drift.append({
+                    'id': member_id,
+                    'points': points or 0,
+                    'expected_points': exp_points,
+                    'total_spent': total_spent or 0,
+                    'expected_total_spent': exp_spent,
+                })
+
+        if apply and drift:
+            db.session.execute(
+                Member.__table__.update()
+                .where(Member.__table__.c.id == bindparam('_id'))
+                .values(points=bindparam('_points'), total_spent=bindparam('_spent')),
+                [{'_id': d['id'], '_points': d['expected_points'], '_spent': d['expected_total_spent']} for d in drift]
+            )
+            db.session.commit()
+
+        status = 'diperbaiki' if apply else 'terdeteksi'
+        print(f'[MEMBER] Recompute agregat: {len(drift)} member {status}')
+        return drift
+
+def wal_checkpoint():
+    """Checkpoint WAL ke file database utama dan kosongkan file -wal."""
+    with app.app_context():
+        try:
+            result = checkpoint(db.engine, 'TRUNCATE')
+            if result and result['busy']:
+                print(f'[SCHEDULER] WAL checkpoint tertunda (database sibuk): {result}')
+        except Exception as e:
+            print(f'[SCHEDULER ERROR] WAL checkpoint failed: {e}')
+
+_db_change_watcher = None
+
+def backup_if_changed():
+    """Jadwalkan backup jika ada commit dari proses/worker mana pun."""
+    global _db_change_watcher
+    try:
+        if _db_change_watcher is None:
+            _db_change_watcher = DatabaseChangeWatcher(db_path)
+        worker = get_backup_worker()
+        if worker and _db_change_watcher.changed():
+            worker.mark_dirty()
+    except Exception as e:
+        print(f'[SCHEDULER ERROR] Backup change watch failed: {e}')
+
+def _scheduled_member_recompute():
+    mode = (os.environ.get('MEMBER_AGGREGATE_REPAIR', 'report') or 'report').strip().lower()
+    try:
+        recompute_member_aggregates(apply=(mode == 'apply'))
+    except Exception as e:
+        print(f'[SCHEDULER ERROR] Failed to recompute member aggregates: {e}')
+
+def _scheduled_idempotensi_prune():
+    try:
+        with app.app_context():
+            deleted = idempotensi.prune(db.session)
+            if deleted:
+                print(f'[SCHEDULER] Hapus {deleted} kunci idempotensi checkout lama')
+    except Exception as e:
+        print(f'[SCHEDULER ERROR] Failed to prune idempotency keys: {e}')
+
+def _scheduled_analytics_export():
+    try:
+        with app.app_context():
+            export_analytics(db.session)
+    except Exception as e:
+        print(f'[SCHEDULER ERROR] Failed to export analytics: {e}')
+
 def ensure_db_columns():
     """Ensure all required columns exist in database (auto-migration)."""
     try:
@@ -421,10 +631,18 @@ def ensure_db_columns():
 
 def start_scheduler():
     """Start background scheduler."""
-    if not SCHEDULER_AVAILABLE or scheduler is None:
+    global scheduler
+    if not SCHEDULER_AVAILABLE:
         print('[SCHEDULER] Skipped (APScheduler not installed)')
         return
 
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
+
+    if scheduler is None:
+        scheduler = BackgroundScheduler()
+
     if not scheduler.running:
         # Schedule daily report generation at 21:30 (9:30 PM)
         scheduler.add_job(
@@ -442,6 +660,48 @@ def start_scheduler():
             name='Archive daily saldo',
             replace_existing=True
         )
+        # Cek/perbaiki drift poin member jam 03:00
+        scheduler.add_job(
+            _scheduled_member_recompute,
+            trigger=CronTrigger(hour=3, minute=0),
+            id='member_aggregate_recompute',
+            name='Recompute member aggregates',
+            replace_existing=True
+        )
+        # Kunci idempotensi checkout lama (retry sudah tidak mungkin) jam 03:30
+        scheduler.add_job(
+            _scheduled_idempotensi_prune,
+            trigger=CronTrigger(hour=3, minute=30),
+            id='checkout_idempotency_prune',
+            name='Prune checkout idempotency keys',
+            replace_existing=True
+        )
+        # Perubahan dari worker lain (atau edit produk/member) ikut memicu backup
+        scheduler.add_job(
+            backup_if_changed,
+            trigger=IntervalTrigger(seconds=60),
+            id='backup_change_watch',
+            name='Backup on database change',
+            replace_existing=True
+        )
+        checkpoint_minutes = get_checkpoint_minutes()
+        if checkpoint_minutes:
+            scheduler.add_job(
+                wal_checkpoint,
+                trigger=IntervalTrigger(minutes=checkpoint_minutes),
+                id='sqlite_wal_checkpoint',
+                name='SQLite WAL checkpoint',
+                replace_existing=True
+            )
+        analytics_minutes = get_export_interval_minutes()
+        if analytics_minutes:
+            scheduler.add_job(
+                _scheduled_analytics_export,
+                trigger=IntervalTrigger(minutes=analytics_minutes),
+                id='analytics_export',
+                name='Incremental analytics export',
+                replace_existing=True
+            )
         scheduler.start()
         print('[SCHEDULER] Daily report scheduler started (21:30 every day)')
         print('[SCHEDULER] Daily saldo archive scheduler started (22:30 every day)')
@@ -453,18 +713,6 @@ def _auto_start_telegram_bot() -> None:
 # ==================== MEMBER CONFIG ====================
 
 POINTS_PER_RUPIAH = 10000  # 1 point per Rp 10.000
-LEVEL_RULES = [
-    (0, 'Bronze'),
-    (1000, 'Silver'),
-    (5000, 'Gold'),
-]
-
-def get_member_level(points):
-    level = 'Bronze'
-    for min_points, name in LEVEL_RULES:
-        if points >= min_points:
-            level = name
-    return level
 
 def calculate_points_from_total(total_rupiah):
     if total_rupiah <= 0:
@@ -523,178 +771,6 @@ def add_security_headers(response):
         response.headers['Expires'] = '0'
     return response
 
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(200), nullable=False)
-    nama = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(20), default='kasir')
-    
-    def set_password(self, password):
-        """Set password dengan hashing yang lebih aman"""
-        self.password_hash = generate_password_hash(
-            password, 
-            method='pbkdf2:sha256', 
-            salt_length=16
-        )
-    
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-    
-    @staticmethod
-    def validate_password_strength(password):
-        """Validasi kekuatan password"""
-        if len(password) < 8:
-            return False, "Password minimal 8 karakter"
-        if not any(c.isupper() for c in password):
-            return False, "Password harus mengandung huruf besar"
-        if not any(c.isdigit() for c in password):
-            return False, "Password harus mengandung angka"
-        return True, "Password valid"
-
-class Kategori(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    nama = db.Column(db.String(100), nullable=False, unique=True)
-    deskripsi = db.Column(db.Text)
-    produk = db.relationship('Produk', backref='kategori_ref', lazy=True)
-
-class Member(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    nama = db.Column(db.String(100), nullable=False)
-    no_telp = db.Column(db.String(30))
-    alamat = db.Column(db.Text)
-    catatan = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=get_local_now)
-    points = db.Column(db.Integer, default=0)
-    total_spent = db.Column(db.Float, default=0)
-
-    def get_level(self):
-        return get_member_level(self.points or 0)
-
-class Produk(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    kode = db.Column(db.String(50), unique=True, nullable=False)
-    nama = db.Column(db.String(200), nullable=False)
-    deskripsi = db.Column(db.Text)
-    harga_beli = db.Column(db.Float, nullable=False)
-    harga_jual = db.Column(db.Float, nullable=False)
-    stok = db.Column(db.Integer, default=0)
-    kategori_id = db.Column(db.Integer, db.ForeignKey('kategori.id'))
-    minimal_stok = db.Column(db.Integer, default=5)
-    satuan = db.Column(db.String(20), default='pcs')
-    harga_variasi = db.relationship('HargaVariasi', backref='produk', lazy=True, cascade='all, delete-orphan', order_by='HargaVariasi.min_qty')
-    varian_produk = db.relationship('VarianProduk', backref='produk_ref', lazy=True, cascade='all, delete-orphan', order_by='VarianProduk.created_at')
-    
-    def get_harga_by_qty(self, qty):
-        """Dapatkan harga berdasarkan quantity"""
-        # Cek apakah ada harga variasi
-        if self.harga_variasi:
-            # Sort descending by min_qty untuk cek dari qty terbesar
-            for variant in reversed(self.harga_variasi):
-                if qty >= variant.min_qty:
-                    return variant.harga
-        # Default ke harga jual
-        return self.harga_jual
-    
-    def to_dict(self):
-        # Get price variants
-        variants = []
-        if self.harga_variasi:
-            variants = [{'min_qty': v.min_qty, 'harga': v.harga} for v in self.harga_variasi]
-            
-        # Get product variants
-        product_variants = []
-        if self.varian_produk:
-            product_variants = [{
-                'id': v.id,
-                'nama_varian': v.nama_varian,
-                'barcode_varian': v.barcode_varian,
-                'stok': v.stok
-            } for v in self.varian_produk]
-            
-        return {
-            'id': self.id,
-            'kode': self.kode,
-            'nama': self.nama,
-            'harga_jual': self.harga_jual,
-            'harga_variasi': variants,
-            'varian_produk': product_variants,
-            'stok': self.stok,
-            'satuan': self.satuan
-        }
-
-class HargaVariasi(db.Model):
-    """Model untuk menyimpan harga bertingkat berdasarkan quantity"""
-    id = db.Column(db.Integer, primary_key=True)
-    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'), nullable=False)
-    min_qty = db.Column(db.Integer, nullable=False)  # Minimal quantity untuk harga ini
-    harga = db.Column(db.Float, nullable=False)  # Harga per unit
-    keterangan = db.Column(db.String(100))  # Opsional: keterangan tier harga
-
-class VarianProduk(db.Model):
-    """Model untuk menyimpan varian produk dengan barcode"""
-    id = db.Column(db.Integer, primary_key=True)
-    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'), nullable=False)
-    nama_varian = db.Column(db.String(200), nullable=False)  # Nama varian (misal: "Varian A", "Kemasan Besar")
-    barcode_varian = db.Column(db.String(100), unique=True, nullable=False)  # Barcode unik untuk varian
-    stok = db.Column(db.Integer, default=0)  # Stok untuk varian ini
-    created_at = db.Column(db.DateTime, default=get_local_now)
-    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
-
-class Transaksi(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    kode_transaksi = db.Column(db.String(50), unique=True, nullable=False)
-    tanggal = db.Column(db.DateTime, default=get_local_now)
-    subtotal = db.Column(db.Float, nullable=False, default=0)
-    discount_percent = db.Column(db.Float, default=0)
-    discount_amount = db.Column(db.Float, default=0)
-    total = db.Column(db.Float, nullable=False)
-    bayar = db.Column(db.Float, nullable=False)
-    kembalian = db.Column(db.Float, nullable=False)
-    payment_method = db.Column(db.String(20), default='tunai')  # tunai, qris, ewallet, debit, hutang
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    member_id = db.Column(db.Integer, db.ForeignKey('member.id'))
-    member_manual = db.Column(db.String(100))  # Untuk input manual nama/telp member
-    points_earned = db.Column(db.Integer, default=0)
-    user = db.relationship('User', backref='transaksi')
-    member = db.relationship('Member', backref='transaksi')
-    items = db.relationship('TransaksiItem', backref='transaksi_ref', lazy=True)
-
-class TransaksiItem(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    transaksi_id = db.Column(db.Integer, db.ForeignKey('transaksi.id'))
-    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'))
-    produk = db.relationship('Produk')
-    jumlah = db.Column(db.Integer, nullable=False)
-    harga = db.Column(db.Float, nullable=False)
-    subtotal = db.Column(db.Float, nullable=False)
-    varian_barcode = db.Column(db.String(100))  # Barcode varian jika ada
-    varian_nama = db.Column(db.String(200))     # Nama varian jika ada
-
-
-
-class Pengaturan(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    key = db.Column(db.String(50), unique=True, nullable=False)
-    value = db.Column(db.Text)
-    
-    @staticmethod
-    def get(key, default=''):
-        setting = Pengaturan.query.filter_by(key=key).first()
-        return setting.value if setting else default
-    
-    @staticmethod
-    def set(key, value):
-        setting = Pengaturan.query.filter_by(key=key).first()
-        if setting:
-            setting.value = value
-        else:
-            setting = Pengaturan(key=key, value=value)
-            db.session.add(setting)
-        db.session.commit()
-
-
-
 # ==================== FORMS ====================
 
 class LoginForm(FlaskForm):
@@ -781,18 +857,40 @@ def load_user(user_id):
 
 # ==================== ROUTES ====================
 
+def _sales_analytics():
+    """Analitik deret waktu (NumPy), di-import saat dipakai saja seperti openpyxl."""
+    try:
+        from app import sales_analytics
+    except Exception:
+        import sales_analytics
+    return sales_analytics
+
 @app.route('/')
 @login_required
 def index():
     total_produk = Produk.query.count()
     today = date.today()
-    total_transaksi_hari_ini = Transaksi.query.filter(db.func.date(Transaksi.tanggal) == today).count()
+    total_transaksi_hari_ini = Transaksi.query.filter(*filter_tanggal(Transaksi.tanggal, today, today)).count()
     produk_habis = Produk.query.filter(Produk.stok <= Produk.minimal_stok).count()
     
+    # Ringkasan tren & saran restock hanya untuk admin
+    tren = saran_restock = target = None
+    if current_user.role == 'admin':
+        try:
+            sales_analytics = _sales_analytics()
+            tren = sales_analytics.tren_penjualan(db.session, today)
+            target = sales_analytics.target_harian(db.session, today)
+            saran_restock = sales_analytics.saran_restock(db.session, today, limit=5)
+        except Exception as e:
+            print(f'[WARNING] Gagal menghitung analitik dashboard: {e}')
+    
     return render_template('index.html', 
                          total_produk=total_produk,
                          total_transaksi=total_transaksi_hari_ini,
                          produk_habis=produk_habis,
+                         tren=tren,
+                         target=target,
+                         saran_restock=saran_restock,
                          current_time=get_local_now(),
                          timezone_name=get_local_timezone_name())
 
@@ -894,21 +992,13 @@ def list_produk():
         if kategori_filter:
             query = query.filter(Produk.kategori_id == kategori_filter.id)
 
+    # Cari di produk utama (nama, kode) atau di barcode varian, urut relevansi
+    order_by = [Produk.kode]
     if search:
-        # Cari di produk utama (nama, kode) atau di barcode varian
-        query = query.filter(
-            or_(
-                Produk.nama.ilike(f'%{search}%'),
-                Produk.kode.ilike(f'%{search}%'),
-                # Cari produk yang memiliki varian dengan barcode yang cocok
-                Produk.id.in_(
-                    db.session.query(VarianProduk.produk_id)
-                    .filter(VarianProduk.barcode_varian.ilike(f'%{search}%'))
-                )
-            )
-        )
+        query, rank = product_search.apply_search(db.session, query, search)
+        order_by = rank or order_by
     
-    pagination = _paginate_query(query, page=page, per_page=per_page, order_by=Produk.kode)
+    pagination = _paginate_query(query.order_by(*order_by), page=page, per_page=per_page)
     produk_list = pagination['items']
     kategori_list = Kategori.query.all()
     return render_template('produk/list.html', 
@@ -1225,18 +1315,16 @@ def member_transaksi(id):
 @app.route('/member/export')
 @login_required
 def export_member():
-    members = Member.query.order_by(Member.nama).all()
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Members'
+    from openpyxl.chart import BarChart, Reference
+    
+    wb = new_workbook()
+    ws = wb.create_sheet('Members')
 
     headers = ['nama', 'no_telp', 'alamat', 'catatan', 'points', 'total_spent']
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
+    ws.append(styled_row(ws, headers, 'kasir_header_plain'))
 
-    for member in members:
+    # Member diambil per chunk, langsung ditulis (write-only)
+    for member in iter_query(Member.query.order_by(Member.nama)):
         ws.append([
             member.nama,
             member.no_telp or '',
@@ -1248,14 +1336,14 @@ def export_member():
 
     # Ranking sheet
     ws_rank = wb.create_sheet('Ranking')
-    ws_rank.append(['Member', 'Total Spent'])
-    for cell in ws_rank[1]:
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
+    ws_rank.append(styled_row(ws_rank, ['Member', 'Total Spent'], 'kasir_header_plain'))
 
-    top_members = sorted(members, key=lambda m: m.total_spent or 0, reverse=True)[:10]
-    for member in top_members:
-        ws_rank.append([member.nama, member.total_spent or 0])
+    top_members = (db.session.query(Member.nama, Member.total_spent)
+                   .order_by(db.func.coalesce(Member.total_spent, 0).desc())
+                   .limit(10)
+                   .all())
+    for nama, total_spent in top_members:
+        ws_rank.append([nama, total_spent or 0])
 
     if top_members:
         data = Reference(ws_rank, min_col=2, min_row=1, max_row=len(top_members) + 1)
@@ -1268,22 +1356,17 @@ def export_member():
         chart.set_categories(categories)
         chart.height = 8
         chart.width = 16
-        ws_rank.add_chart(chart, 'D2')
+        chart.anchor = 'D2'
+        ws_rank.add_chart(chart)
 
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    response = app.response_class(
-        output.getvalue(),
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response.headers['Content-Disposition'] = 'attachment; filename=member_export.xlsx'
-    return response
+    return send_workbook(wb, 'member_export.xlsx')
 
 @app.route('/member/template')
 @login_required
 def download_member_template():
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font
+    
     wb = Workbook()
     ws = wb.active
     ws.title = 'Members'
@@ -1304,7 +1387,7 @@ def download_member_template():
 
     response = app.response_class(
         output.getvalue(),
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        mimetype=XLSX_MIMETYPE
     )
     response.headers['Content-Disposition'] = 'attachment; filename=member_template.xlsx'
     return response
@@ -1312,6 +1395,8 @@ def download_member_template():
 @app.route('/member/import', methods=['POST'])
 @login_required
 def import_member():
+    from openpyxl import load_workbook
+    
     if 'file' not in request.files:
         flash('File XLSX tidak ditemukan.', 'danger')
         return redirect(url_for('list_member'))
@@ -1487,25 +1572,35 @@ def get_api_produk():
         )
     )
     
+    # Cari di nama, kode, atau barcode varian (index FTS), urut relevansi
+    order_by = [Produk.nama]
     if search:
-        query = query.filter(
-            or_(
-                Produk.nama.ilike(f'%{search}%'),
-                Produk.kode.ilike(f'%{search}%'),
-                # Cari produk yang memiliki varian dengan barcode yang cocok
-                Produk.id.in_(
-                    db.session.query(VarianProduk.produk_id)
-                    .filter(VarianProduk.barcode_varian.ilike(f'%{search}%'))
-                )
-            )
-        )
+        query, rank = product_search.apply_search(db.session, query, search)
+        order_by = rank or order_by
     
     if kategori_id:
-        query = query.filter_by(kategori_id=kategori_id)
+        query = query.filter(Produk.kategori_id == kategori_id)
     
-    produk_list = query.order_by(Produk.nama).limit(limit).all()  # Batasi hasil untuk performa
+    query = query.order_by(*order_by).limit(limit)  # Batasi hasil untuk performa
     
-    return jsonify([p.to_dict() for p in produk_list])
+    # Harga bertingkat & varian satu halaman dalam 2 query IN (bukan lazy load per produk)
+    return json_response(produk_dicts(db.session, query))
+
+@app.route('/api/katalog')
+@login_required
+def get_api_katalog():
+    """Katalog untuk cache kasir: snapshot penuh (since=0) atau perubahan sejak versi `since`"""
+    since = request.args.get('since', 0, type=int)
+    return json_response(katalog_sync.changes(db.session, since))
+
+@app.route('/api/produk/barcode/<path:kode>')
+@login_required
+def get_api_produk_barcode(kode):
+    """Lookup persis kode produk / barcode varian (hasil scan) tanpa pencarian teks"""
+    hasil = get_barcode_index().lookup(db.session, kode)
+    if hasil is None:
+        return jsonify({'success': False, 'message': 'Produk tidak ditemukan'}), 404
+    return jsonify({'success': True, **hasil})
 
 
 @app.route('/api/member')
@@ -1570,6 +1665,297 @@ def update_varian_stok(varian_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Gagal update stok: {str(e)}'}), 500
 
+# Maksimal penjualan per request /transaksi/checkout/batch (antrian offline kasir)
+CHECKOUT_BATCH_MAX = 50
+
+
+class CheckoutGagal(Exception):
+    """Penjualan ditolak sebelum ada yang ditulis (data/stok tidak valid)."""
+
+
+def _proses_checkout(data, kunci=None, waktu=None):
+    """
+    Validasi & tulis satu penjualan di transaksi database yang sedang berjalan
+    (tidak commit, dipakai checkout tunggal maupun batch).
+
+    `waktu` = saat penjualan terjadi di kasir (antrian offline), default sekarang;
+    dipakai untuk tanggal transaksi, rollup harian, dan nomor transaksi.
+
+    Semua validasi dilakukan sebelum penulisan pertama, jadi CheckoutGagal
+    tidak meninggalkan perubahan apa pun di session.
+
+    Returns:
+        (hasil, efek): response JSON dan data untuk notifikasi setelah commit
+
+    Raises:
+        CheckoutGagal: Data/stok tidak valid (pesan untuk kasir)
+        InsufficientStock: Stok diambil transaksi lain di antara validasi dan UPDATE
+        IntegrityError: `kunci` sudah dicatat request lain
+    """
+    items = data.get('items', [])
+    total = data.get('total', 0)
+    bayar = data.get('bayar', 0)
+    payment_method = data.get('payment_method', 'tunai')
+    member_id = data.get('member_id')
+    member_manual = data.get('member_manual')  # Input manual nama/telp
+    
+    print(f"[Checkout] Items: {len(items)}")
+    print(f"[Checkout] Total: Rp {total}")
+    print(f"[Checkout] Bayar: Rp {bayar}")
+    
+    if not items:
+        raise CheckoutGagal('Keranjang kosong')
+    
+    # Validasi tipe data
+    try:
+        total = float(total)
+        bayar = float(bayar)
+    except (TypeError, ValueError):
+        raise CheckoutGagal('Format angka tidak valid')
+    
+    member = None
+    if member_id:
+        try:
+            member = Member.query.get(int(member_id))
+        except (TypeError, ValueError):
+            raise CheckoutGagal('Member tidak valid')
+        if not member:
+            raise CheckoutGagal('Member tidak ditemukan')
+
+    # Calculate totals server-side
+    subtotal = 0
+    cart_lines = []
+    produk_ids = set()
+    barcodes = set()
+    for item in items:
+        try:
+            produk_id = int(item['id'])
+            qty = int(item.get('quantity', 1))
+            price = float(item.get('price', 0))
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutGagal('Format item tidak valid')
+        if qty < 1 or price < 0:
+            raise CheckoutGagal('Data item tidak valid')
+        subtotal += qty * price
+
+        scanned_variant = item.get('scanned_variant') or None
+        barcode = scanned_variant.get('barcode') if scanned_variant else None
+        produk_ids.add(produk_id)
+        if barcode:
+            barcodes.add(barcode)
+        cart_lines.append((produk_id, qty, price, scanned_variant, barcode))
+
+    total = subtotal
+    points_earned = calculate_points_from_total(total) if member else 0
+
+    if bayar < total:
+        raise CheckoutGagal('Pembayaran kurang')
+    
+    # Resolve produk, kategori & varian untuk seluruh keranjang dalam query massal
+    # (populate_existing: stok segar jika penjualan sebelumnya di batch yang sama sudah mengurangi)
+    produk_map = {
+        p.id: p
+        for p in Produk.query
+        .options(joinedload(Produk.kategori_ref))
+        .execution_options(populate_existing=True)
+        .filter(Produk.id.in_(produk_ids))
+        .all()
+    }
+    varian_map = {}
+    if barcodes:
+        varian_map = {
+            (v.produk_id, v.barcode_varian): v
+            for v in VarianProduk.query
+            .execution_options(populate_existing=True)
+            .filter(VarianProduk.barcode_varian.in_(barcodes))
+            .all()
+        }
+
+    # Validasi stok di memory (qty dijumlah jika produk/varian sama muncul di beberapa baris)
+    need_produk = {}
+    need_varian = {}
+    resolved_lines = []
+    for produk_id, qty, price, scanned_variant, barcode in cart_lines:
+        produk = produk_map.get(produk_id)
+        if not produk:
+            raise CheckoutGagal('Produk tidak ditemukan')
+        
+        varian = None
+        if barcode:
+            varian = varian_map.get((produk_id, barcode))
+            if not varian:
+                raise CheckoutGagal('Varian produk tidak ditemukan')
+            need_varian[varian.id] = need_varian.get(varian.id, 0) + qty
+            if (varian.stok or 0) < need_varian[varian.id]:
+                raise CheckoutGagal(f'Stok varian {scanned_variant.get("nama", "Unknown")} tidak cukup')
+        else:
+            need_produk[produk.id] = need_produk.get(produk.id, 0) + qty
+            if (produk.stok or 0) < need_produk[produk.id]:
+                raise CheckoutGagal(f'Stok {produk.nama} tidak cukup')
+        resolved_lines.append((produk, varian, qty, price, scanned_variant))
+    
+    now = waktu or get_local_now()
+    kode_transaksi = allocate_kode_transaksi(db.session, now)
+    print(f"[Checkout] Transaction code: {kode_transaksi}")
+    print(f"[Checkout] Local Time: {get_local_now().strftime('%Y-%m-%d %H:%M:%S')} {get_local_timezone_name()}")
+    
+    # Buat transaksi
+    transaksi = Transaksi(
+        kode_transaksi=kode_transaksi,
+        tanggal=now,
+        subtotal=subtotal,
+        discount_percent=0,
+        discount_amount=0,
+        total=total,
+        bayar=bayar,
+        kembalian=bayar - total,
+        payment_method=payment_method,
+        user_id=current_user.id,
+        member_id=member.id if member else None,
+        member_manual=member_manual if not member else None,  # Simpan input manual jika bukan member terdaftar
+        points_earned=points_earned
+    )
+    db.session.add(transaksi)
+    
+    # Tambahkan items (ORM) lalu kurangi stok dengan UPDATE bersyarat (atomik)
+    for produk, varian, quantity, price, scanned_variant in resolved_lines:
+        transaksi_item = TransaksiItem(
+            transaksi_ref=transaksi,
+            produk_id=produk.id,
+            jumlah=quantity,
+            harga=price,
+            subtotal=price * quantity,
+            harga_beli=produk.harga_beli,
+            varian_barcode=scanned_variant.get('barcode') if varian is not None else None,
+            varian_nama=scanned_variant.get('nama') if varian is not None else None
+        )
+        db.session.add(transaksi_item)
+    
+    try:
+        stok_produk = decrement_stock_bulk(db.session, Produk, need_produk)
+        stok_varian = decrement_stock_bulk(db.session, VarianProduk, need_varian)
+    except InsufficientStock as e:
+        # Pesan stok untuk kasir dicari pemanggil setelah rollback
+        e.checkout_needs = (need_produk, need_varian, produk_map, resolved_lines)
+        raise
+    
+    low_stock_alerts = []
+    threshold = app.config.get('TELEGRAM_NOTIFY_LOW_STOCK_THRESHOLD', 10)
+    for produk, varian, quantity, price, scanned_variant in resolved_lines:
+        kategori_nama = produk.kategori_ref.nama if produk.kategori_ref else "Tanpa Kategori"
+        if varian is not None:
+            item_name = f"{produk.nama} - {scanned_variant.get('nama', 'Varian')}"
+            stok = stok_varian.get(varian.id, 0)
+        else:
+            item_name = produk.nama
+            stok = stok_produk.get(produk.id, 0)
+        print(f"[Checkout] Item: {item_name} x{quantity}" + (" (varian)" if varian is not None else ""))
+        if stok <= threshold and all(a[0] != item_name for a in low_stock_alerts):
+            low_stock_alerts.append((item_name, stok, kategori_nama))
+    
+    # Rollup penjualan harian (UPSERT increment, ikut commit yang sama)
+    sales_rollup.record_checkout(
+        db.session,
+        now.date(),
+        total,
+        [(produk.id, quantity, price, produk.harga_beli) for produk, _, quantity, price, _ in resolved_lines],
+    )
+    
+    # Poin member ikut di unit of work yang sama (increment di SQL, aman untuk kasir paralel)
+    if member:
+        member.points = db.func.coalesce(Member.points, 0) + points_earned
+        member.total_spent = db.func.coalesce(Member.total_spent, 0) + total
+    
+    db.session.flush()
+    hasil = {
+        'success': True,
+        'kode_transaksi': kode_transaksi,
+        'kembalian': bayar - total,
+        'transaksi_id': transaksi.id,
+        'total': total,
+        'subtotal': subtotal,
+        'discount_percent': 0,
+        'discount_amount': 0,
+        'points_earned': points_earned,
+        'bayar': bayar,
+        'payment_method': payment_method,
+        'tanggal': transaksi.tanggal.strftime('%Y-%m-%d %H:%M:%S'),
+        'kasir': current_user.nama
+    }
+    # Kunci idempotensi ikut commit yang sama dengan penjualannya
+    if kunci:
+        idempotensi.simpan(db.session, kunci, current_user.id, transaksi.id, hasil)
+    
+    efek = {
+        'tanggal': now.date(),
+        'low_stock_alerts': low_stock_alerts,
+        'kode_transaksi': kode_transaksi,
+        'total': total,
+        'payment_method': payment_method,
+        'member_name': member.nama if member else member_manual,
+    }
+    return hasil, efek
+
+
+def _pesan_stok_kurang(e):
+    """Pesan stok untuk kasir setelah InsufficientStock (dipanggil setelah rollback)."""
+    need_produk, need_varian, produk_map, resolved_lines = e.checkout_needs
+    kurang = find_shortages(db.session, Produk, need_produk)
+    if kurang:
+        return f'Stok {produk_map[kurang[0]].nama} tidak cukup'
+    kurang = find_shortages(db.session, VarianProduk, need_varian)
+    if kurang:
+        varian_nama = next(
+            (sv.get('nama', 'Unknown') for _, v, _, _, sv in resolved_lines if v is not None and v.id == kurang[0]),
+            'Unknown'
+        )
+        return f'Stok varian {varian_nama} tidak cukup'
+    return 'Stok berubah, silakan coba lagi'
+
+
+def _setelah_checkout(efek_list):
+    """Invalidasi cache, notifikasi Telegram & backup setelah penjualan di-commit."""
+    # Laporan yang mencakup tanggal ini sudah basi
+    cache = get_report_cache()
+    if cache:
+        for tanggal in {efek['tanggal'] for efek in efek_list}:
+            cache.invalidate_date(tanggal)
+    
+    # === TELEGRAM NOTIFICATION ===
+    if TELEGRAM_AVAILABLE and (not LICENSE_AVAILABLE or allows_telegram()):
+        for efek in efek_list:
+            if efek['low_stock_alerts']:
+                try:
+                    bot = get_telegram_bot()
+                    if bot:
+                        for item_name, stok, kategori_nama in efek['low_stock_alerts']:
+                            bot.notify_low_stock_sync(produk_nama=item_name, stok=stok, kategori=kategori_nama)
+                            print(f"[Checkout] ⚠ Low stock alert sent: {item_name} (stok: {stok})")
+                except Exception as e:
+                    print(f"[Checkout] ⚠ Low stock notification failed: {e}")
+            
+            try:
+                bot = get_telegram_bot()
+                if bot and app.config.get('TELEGRAM_NOTIFY_NEW_TRANSACTION', False):
+                    bot.notify_new_transaction_sync(
+                        kode_transaksi=efek['kode_transaksi'],
+                        total=efek['total'],
+                        payment_method=efek['payment_method'],
+                        kasir=current_user.nama,
+                        member_name=efek['member_name']
+                    )
+                    print("[Checkout] ✓ Telegram notification sent")
+            except Exception as e:
+                print(f"[Checkout] ⚠ Telegram notification failed: {e}")
+    
+    # === BACKUP SETELAH TRANSAKSI ===
+    # Backup dijalankan worker di background (digabung per interval)
+    worker = get_backup_worker()
+    if worker:
+        worker.mark_dirty()
+        print("[Backup] Backup dijadwalkan (background worker)")
+
+
 @app.route('/transaksi/checkout', methods=['POST'])
 @login_required
 @csrf.exempt
@@ -1588,210 +1974,47 @@ def checkout():
         if not data:
             return jsonify({'success': False, 'message': 'Data tidak valid'})
         
-        items = data.get('items', [])
-        total = data.get('total', 0)
-        bayar = data.get('bayar', 0)
-        payment_method = data.get('payment_method', 'tunai')
-        member_id = data.get('member_id')
-        member_manual = data.get('member_manual')  # Input manual nama/telp
-        
-        print(f"[Checkout] Items: {len(items)}")
-        print(f"[Checkout] Total: Rp {total}")
-        print(f"[Checkout] Bayar: Rp {bayar}")
-        
-        if not items:
-            return jsonify({'success': False, 'message': 'Keranjang kosong'})
-        
-        # Validasi tipe data
+        # Retry dengan kunci yang sama mengembalikan hasil asli, bukan penjualan baru
         try:
-            total = float(total)
-            bayar = float(bayar)
-        except ValueError:
-            return jsonify({'success': False, 'message': 'Format angka tidak valid'})
-        
-        member = None
-        if member_id:
-            try:
-                member = Member.query.get(int(member_id))
-            except (TypeError, ValueError):
-                return jsonify({'success': False, 'message': 'Member tidak valid'})
-            if not member:
-                return jsonify({'success': False, 'message': 'Member tidak ditemukan'})
-
-        # Calculate totals server-side
-        subtotal = 0
-        for item in items:
-            try:
-                qty = int(item.get('quantity', 1))
-                price = float(item.get('price', 0))
-            except (TypeError, ValueError):
-                return jsonify({'success': False, 'message': 'Format item tidak valid'})
-            if qty < 1 or price < 0:
-                return jsonify({'success': False, 'message': 'Data item tidak valid'})
-            subtotal += qty * price
-
-        total = subtotal
-        points_earned = calculate_points_from_total(total) if member else 0
-
-        if bayar < total:
-            return jsonify({'success': False, 'message': 'Pembayaran kurang'})
-        
-        kode_transaksi = f'TRX{get_local_now().strftime("%Y%m%d%H%M%S")}'
-        print(f"[Checkout] Transaction code: {kode_transaksi}")
-        print(f"[Checkout] Local Time: {get_local_now().strftime('%Y-%m-%d %H:%M:%S')} {get_local_timezone_name()}")
-        
-        # Buat transaksi
-        transaksi = Transaksi(
-            kode_transaksi=kode_transaksi,
-            subtotal=subtotal,
-            discount_percent=0,
-            discount_amount=0,
-            total=total,
-            bayar=bayar,
-            kembalian=bayar - total,
-            payment_method=payment_method,
-            user_id=current_user.id,
-            member_id=member.id if member else None,
-            member_manual=member_manual if not member else None,  # Simpan input manual jika bukan member terdaftar
-            points_earned=points_earned
-        )
-        db.session.add(transaksi)
-        db.session.flush()
-        
-        # Log timestamp transaksi
-        print(f"[Checkout] Transaction timestamp: {transaksi.tanggal.strftime('%Y-%m-%d %H:%M:%S')}")
+            kunci = idempotensi.parse_key(request.headers.get(idempotensi.KEY_HEADER) or data.get('idempotency_key'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)})
+        if kunci:
+            hasil = idempotensi.cari(db.session, kunci, current_user.id)
+            if hasil is not None:
+                print(f"[Checkout] Idempotency key {kunci} sudah diproses, kirim hasil asli")
+                return jsonify(hasil)
         
-        # Tambahkan items
-        for item in items:
-            produk = Produk.query.get(item['id'])
-            if not produk:
-                return jsonify({'success': False, 'message': f'Produk tidak ditemukan'})
-                
-            quantity = item.get('quantity', 1)
-            scanned_variant = item.get('scanned_variant')
-            
-            # Cek stok berdasarkan varian atau produk utama
-            if scanned_variant and scanned_variant.get('barcode'):
-                # Cari varian berdasarkan barcode
-                varian = VarianProduk.query.filter_by(
-                    produk_id=item['id'], 
-                    barcode_varian=scanned_variant['barcode']
-                ).first()
-                
-                if not varian:
-                    return jsonify({'success': False, 'message': f'Varian produk tidak ditemukan'})
-                
-                if varian.stok < quantity:
-                    return jsonify({'success': False, 'message': f'Stok varian {scanned_variant.get("nama", "Unknown")} tidak cukup'})
-                
-                # Kurangi stok varian
-                varian.stok -= quantity
-                item_name = f"{produk.nama} - {scanned_variant.get('nama', 'Varian')}"
-                print(f"[Checkout] Item: {item_name} x{quantity} (varian)")
-                
-                # Check low stock for variant
-                if TELEGRAM_AVAILABLE:
-                    try:
-                        bot = get_telegram_bot()
-                        threshold = app.config.get('TELEGRAM_NOTIFY_LOW_STOCK_THRESHOLD', 10)
-                        if bot and varian.stok <= threshold:
-                            bot.notify_low_stock_sync(
-                                produk_nama=f"{produk.nama} - {scanned_variant.get('nama', 'Varian')}",
-                                stok=varian.stok,
-                                kategori=produk.kategori.nama if produk.kategori else "Tanpa Kategori"
-                            )
-                            print(f"[Checkout] ⚠ Low stock alert sent for variant: {item_name} (stok: {varian.stok})")
-                    except Exception as e:
-                        print(f"[Checkout] ⚠ Low stock notification failed: {e}")
-            else:
-                # Produk utama
-                if produk.stok < quantity:
-                    return jsonify({'success': False, 'message': f'Stok {produk.nama} tidak cukup'})
-                
-                # Kurangi stok produk utama
-                produk.stok -= quantity
-                item_name = produk.nama
-                print(f"[Checkout] Item: {item_name} x{quantity}")
-                
-                # Check low stock for product
-                if TELEGRAM_AVAILABLE and (not LICENSE_AVAILABLE or allows_telegram()):
-                    try:
-                        bot = get_telegram_bot()
-                        threshold = app.config.get('TELEGRAM_NOTIFY_LOW_STOCK_THRESHOLD', 10)
-                        if bot and produk.stok <= threshold:
-                            bot.notify_low_stock_sync(
-                                produk_nama=produk.nama,
-                                stok=produk.stok,
-                                kategori=produk.kategori.nama if produk.kategori else "Tanpa Kategori"
-                            )
-                            print(f"[Checkout] ⚠ Low stock alert sent for product: {item_name} (stok: {produk.stok})")
-                    except Exception as e:
-                        print(f"[Checkout] ⚠ Low stock notification failed: {e}")
-            
-            transaksi_item = TransaksiItem(
-                transaksi_id=transaksi.id,
-                produk_id=item['id'],
-                jumlah=quantity,
-                harga=item['price'],
-                subtotal=item['price'] * quantity,
-                varian_barcode=scanned_variant.get('barcode') if scanned_variant else None,
-                varian_nama=scanned_variant.get('nama') if scanned_variant else None
-            )
-            db.session.add(transaksi_item)
+        try:
+            hasil, efek = _proses_checkout(data, kunci)
+        except CheckoutGagal as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': str(e)})
+        except InsufficientStock as e:
+            # Stok diambil transaksi lain di antara validasi dan UPDATE
+            db.session.rollback()
+            print(f"[Checkout] ✗ {e}")
+            return jsonify({'success': False, 'message': _pesan_stok_kurang(e)})
+        except IntegrityError:
+            db.session.rollback()
+            hasil = idempotensi.cari(db.session, kunci, current_user.id) if kunci else None
+            if hasil is None:
+                raise
+            print(f"[Checkout] Idempotency key {kunci} diproses request lain, kirim hasilnya")
+            return jsonify(hasil)
         
-        # Commit transaksi
+        # Satu commit untuk transaksi, items, stok, rollup, poin member & kunci idempotensi
         db.session.commit()
-
-        if member:
-            member.points = (member.points or 0) + points_earned
-            member.total_spent = (member.total_spent or 0) + total
-            db.session.commit()
+        print(f"[Checkout] Transaction timestamp: {hasil['tanggal']}")
         print("[Checkout] ✓ Transaction saved to database")
         
-        # === TELEGRAM NOTIFICATION ===
-        if TELEGRAM_AVAILABLE and (not LICENSE_AVAILABLE or allows_telegram()):
-            try:
-                bot = get_telegram_bot()
-                if bot and app.config.get('TELEGRAM_NOTIFY_NEW_TRANSACTION', False):
-                    bot.notify_new_transaction_sync(
-                        kode_transaksi=kode_transaksi,
-                        total=total,
-                        payment_method=payment_method,
-                        kasir=current_user.nama,
-                        member_name=member.nama if member else member_manual
-                    )
-                    print("[Checkout] ✓ Telegram notification sent")
-            except Exception as e:
-                print(f"[Checkout] ⚠ Telegram notification failed: {e}")
-        
-        # === BACKUP SETELAH TRANSAKSI ===
-        print("\n[Backup] Starting backup after transaction...")
-        backup_success = backup_database()
-        
-        if backup_success:
-            print("[Backup] ✓ Backup completed successfully!")
-        else:
-            print("[Backup] ✗ Backup failed!")
+        _setelah_checkout([efek])
         
         print("="*50)
         print("CHECKOUT PROCESS COMPLETED")
         print("="*50 + "\n")
         
-        return jsonify({
-            'success': True,
-            'kode_transaksi': kode_transaksi,
-            'kembalian': bayar - total,
-            'transaksi_id': transaksi.id,
-            'total': total,
-            'subtotal': subtotal,
-            'discount_percent': 0,
-            'discount_amount': 0,
-            'points_earned': points_earned,
-            'bayar': bayar,
-            'payment_method': payment_method,
-            'tanggal': transaksi.tanggal.strftime('%Y-%m-%d %H:%M:%S'),
-            'kasir': current_user.nama
-        })
+        return jsonify(hasil)
         
     except Exception as e:
         db.session.rollback()
@@ -1800,11 +2023,144 @@ def checkout():
         error_detail = traceback.format_exc()
         print(f"[Checkout TRACEBACK] {error_detail}")
         
+        # retry: kasir boleh mengirim ulang (dengan kunci yang sama) lewat antrian
         return jsonify({
             'success': False, 
-            'message': 'Terjadi kesalahan sistem'
+            'message': 'Terjadi kesalahan sistem',
+            'retry': True
         })
 
+def _mulai_transaksi_batch():
+    """
+    Mulai transaksi SQLite secara eksplisit sebelum SAVEPOINT per penjualan.
+
+    pysqlite baru mengirim BEGIN sebelum INSERT/UPDATE pertama; SAVEPOINT di
+    luar transaksi akan membuka transaksi sendiri dan RELEASE-nya langsung
+    commit. IMMEDIATE sekaligus mengambil lock tulis, jadi stok yang dibaca
+    tiap penjualan tidak berubah oleh kasir lain selama batch berjalan.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    driver_connection = connection.connection.driver_connection
+    if not driver_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+def _waktu_penjualan_offline(value):
+    """
+    Waktu penjualan antrian offline (`dibuat_pada`, ISO 8601 dari browser) ->
+    datetime lokal server. Kosong = sekarang (klien lama).
+
+    Waktu di masa depan (jam perangkat kasir maju) dipotong ke sekarang.
+
+    Raises:
+        CheckoutGagal: Format salah, atau lebih tua dari retensi kunci
+            idempotensi (kiriman ulang tidak lagi bisa dideteksi sebagai duplikat)
+    """
+    now = get_local_now()
+    if not value:
+        return now
+    try:
+        waktu = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise CheckoutGagal('Waktu transaksi antrian tidak valid')
+    if waktu.tzinfo is not None:
+        waktu = waktu.astimezone().replace(tzinfo=None)
+    if waktu > now:
+        return now
+    retensi = idempotensi.get_retention_days()
+    if waktu < now - timedelta(days=retensi):
+        raise CheckoutGagal(f'Transaksi antrian lebih dari {retensi} hari, input ulang manual')
+    return waktu
+
+
+def _proses_checkout_batch(sale, kunci):
+    """
+    Satu penjualan batch di SAVEPOINT sendiri.
+
+    Returns:
+        (hasil, efek): efek None jika penjualan ditolak (sudah di-rollback ke
+        SAVEPOINT, penjualan lain di batch tidak terpengaruh)
+    """
+    try:
+        waktu = _waktu_penjualan_offline(sale.get('dibuat_pada'))
+        with db.session.begin_nested():
+            return _proses_checkout(sale, kunci, waktu)
+    except CheckoutGagal as e:
+        return {'success': False, 'message': str(e)}, None
+    except InsufficientStock as e:
+        print(f"[Checkout] ✗ Batch {kunci}: {e}")
+        return {'success': False, 'message': _pesan_stok_kurang(e)}, None
+    except Exception as e:
+        # Galat yang berulang (data rusak dll.): ditolak, jangan diulang terus
+        print(f"[Checkout] ✗ Batch {kunci} ditolak: {e}")
+        return {'success': False, 'message': 'Terjadi kesalahan sistem saat memproses transaksi ini'}, None
+
+
+@app.route('/transaksi/checkout/batch', methods=['POST'])
+@login_required
+@csrf.exempt
+def checkout_batch():
+    """
+    Kirim ulang antrian penjualan offline kasir (urut) dalam satu transaksi database.
+
+    Body: {"sales": [{...body checkout..., "idempotency_key": "...",
+    "dibuat_pada": "2024-05-01T14:59:30.000Z"}]}. `dibuat_pada` (waktu
+    penjualan di kasir) menjadi tanggal transaksi, sehingga penjualan sebelum
+    tengah malam yang baru terkirim besok pagi tetap tercatat di hari itu.
+    Hasil per penjualan sama dengan /transaksi/checkout. Setiap penjualan
+    berjalan di SAVEPOINT sendiri: penjualan yang ditolak (stok kurang, data
+    tidak valid, atau galat lain saat diproses) di-rollback sendiri dan
+    dibalas `success: False` tanpa `retry`, sehingga penjualan sesudahnya
+    tetap tersimpan dan antrian kasir tidak macet. Hanya galat di luar
+    penjualan (mulai/commit transaksi) yang membatalkan seluruh batch dengan
+    `retry: True` (aman dikirim ulang karena kunci idempotensi).
+    """
+    data = request.get_json(silent=True) or {}
+    sales = data.get('sales')
+    if not isinstance(sales, list) or not sales:
+        return jsonify({'success': False, 'message': 'Data tidak valid'}), 400
+    if len(sales) > CHECKOUT_BATCH_MAX:
+        return jsonify({'success': False, 'message': f'Maksimal {CHECKOUT_BATCH_MAX} penjualan per batch'}), 400
+    
+    print(f"[Checkout] Batch {len(sales)} penjualan dari {current_user.username} ({request.remote_addr})")
+    results = []
+    efek_list = []
+    try:
+        _mulai_transaksi_batch()
+        for sale in sales:
+            if not isinstance(sale, dict):
+                results.append({'success': False, 'message': 'Data tidak valid'})
+                continue
+            try:
+                kunci = idempotensi.parse_key(sale.get('idempotency_key'))
+            except ValueError as e:
+                results.append({'success': False, 'message': str(e)})
+                continue
+            if not kunci:
+                results.append({'success': False, 'message': 'Idempotency key wajib untuk batch'})
+                continue
+            
+            hasil = idempotensi.cari(db.session, kunci, current_user.id)
+            if hasil is None:
+                hasil, efek = _proses_checkout_batch(sale, kunci)
+                if efek is not None:
+                    efek_list.append(efek)
+            results.append({**hasil, 'idempotency_key': kunci})
+        
+        # Satu commit untuk semua penjualan yang berhasil
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[Checkout] ✗ Batch dibatalkan: {e}")
+        return jsonify({'success': False, 'message': 'Batch gagal, silakan kirim ulang', 'retry': True}), 503
+    
+    print(f"[Checkout] ✓ Batch: {len(efek_list)} penjualan baru disimpan")
+    if efek_list:
+        _setelah_checkout(efek_list)
+    return jsonify({'success': True, 'results': results})
+
 @app.route('/transaksi')
 @login_required
 def list_transaksi():
@@ -1819,10 +2175,10 @@ def list_transaksi():
     query = Transaksi.query
     
     # Apply filters
-    if tanggal_mulai:
-        query = query.filter(db.func.date(Transaksi.tanggal) >= tanggal_mulai)
-    if tanggal_selesai:
-        query = query.filter(db.func.date(Transaksi.tanggal) <= tanggal_selesai)
+    try:
+        query = query.filter(*filter_tanggal(Transaksi.tanggal, tanggal_mulai, tanggal_selesai))
+    except ValueError:
+        flash('Format tanggal tidak valid!', 'warning')
     if payment_method:
         query = query.filter(Transaksi.payment_method == payment_method)
     if kode:
@@ -1865,38 +2221,35 @@ def laporan():
     tanggal_mulai = request.args.get('tanggal_mulai', date.today().strftime('%Y-%m-%d'))
     tanggal_selesai = request.args.get('tanggal_selesai', date.today().strftime('%Y-%m-%d'))
     
-    transaksi_list = Transaksi.query.filter(
-        db.func.date(Transaksi.tanggal) >= tanggal_mulai,
-        db.func.date(Transaksi.tanggal) <= tanggal_selesai
+    try:
+        as_date(tanggal_mulai)
+        as_date(tanggal_selesai)
+    except ValueError:
+        flash('Format tanggal tidak valid!', 'warning')
+        tanggal_mulai = tanggal_selesai = date.today().strftime('%Y-%m-%d')
+    
+    # Detail transaksi untuk tabel (user di-join, items tidak dimuat)
+    transaksi_list = Transaksi.query.options(joinedload(Transaksi.user)).filter(
+        *filter_tanggal(Transaksi.tanggal, tanggal_mulai, tanggal_selesai)
     ).order_by(Transaksi.tanggal).all()
     
-    total_penjualan = sum(t.total for t in transaksi_list)
-    total_transaksi = len(transaksi_list)
-    total_keuntungan = 0
-    for t in transaksi_list:
-        for item in t.items:
-            harga_beli = item.produk.harga_beli if item.produk else 0
-            total_keuntungan += (item.harga - harga_beli) * item.jumlah
+    # Angka ringkasan & data chart dihitung di SQL
+    def hitung_laporan():
+        summary = report_queries.ringkasan(db.session, tanggal_mulai, tanggal_selesai)
+        return {
+            'total_penjualan': summary['total_penjualan'],
+            'total_transaksi': summary['total_transaksi'],
+            'total_keuntungan': summary['total_keuntungan'],
+            'sales_by_date': report_queries.penjualan_per_tanggal(db.session, tanggal_mulai, tanggal_selesai),
+            'payment_count': report_queries.distribusi_pembayaran(db.session, tanggal_mulai, tanggal_selesai),
+            'top_products': [
+                (p['nama'], p['omzet'])
+                for p in report_queries.produk_terlaris(db.session, tanggal_mulai, tanggal_selesai, limit=5)
+            ],
+        }
     
-    # Chart data: Sales per day
-    from collections import defaultdict
-    sales_by_date = defaultdict(float)
-    for t in transaksi_list:
-        date_str = t.tanggal.strftime('%Y-%m-%d')
-        sales_by_date[date_str] += t.total
-    
-    # Chart data: Payment method distribution
-    payment_count = defaultdict(int)
-    for t in transaksi_list:
-        payment_count[t.payment_method or 'tunai'] += 1
-    
-    # Chart data: Top 5 products
-    from collections import Counter
-    product_sales = Counter()
-    for t in transaksi_list:
-        for item in t.items:
-            product_sales[item.produk.nama] += item.subtotal
-    top_products = product_sales.most_common(5)
+    # Dicache per rentang tanggal; otomatis basi jika ada transaksi di rentang itu
+    data = get_report_cache().get_or_compute(db.session, 'laporan', tanggal_mulai, tanggal_selesai, hitung_laporan)
 
     # Top 25 Members - berdasarkan bulan berjalan (reset setiap bulan)
     from datetime import datetime
@@ -1937,12 +2290,12 @@ def laporan():
                          transaksi_list=transaksi_list,
                          tanggal_mulai=tanggal_mulai,
                          tanggal_selesai=tanggal_selesai,
-                         total_penjualan=total_penjualan,
-                         total_keuntungan=total_keuntungan,
-                         total_transaksi=total_transaksi,
-                         sales_by_date=dict(sales_by_date),
-                         payment_count=dict(payment_count),
-                         top_products=top_products,
+                         total_penjualan=data['total_penjualan'],
+                         total_keuntungan=data['total_keuntungan'],
+                         total_transaksi=data['total_transaksi'],
+                         sales_by_date=data['sales_by_date'],
+                         payment_count=data['payment_count'],
+                         top_products=data['top_products'],
                          top_members=top_members,
                          timezone_name=get_local_timezone_name())
 
@@ -1962,24 +2315,25 @@ def export_laporan_excel():
         # Debug log
         print(f'[EXPORT] tanggal_mulai={tanggal_mulai}, tanggal_selesai={tanggal_selesai}, mode={mode}')
         
-        if mode == 'hari':
-            wb = generate_laporan_hari(tanggal_mulai, tanggal_selesai)
-        elif mode == 'bulan':
-            wb = generate_laporan_bulan(tanggal_mulai, tanggal_selesai)
-        elif mode == 'tahun':
-            wb = generate_laporan_tahun(tanggal_mulai, tanggal_selesai)
-        else:
-            print(f'[EXPORT ERROR] Invalid mode: {mode}')
-            return jsonify({'error': f'Mode tidak valid: {mode}'}), 400
-        
-        # Save to BytesIO buffer
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        try:
+            validate_laporan_excel_args(tanggal_mulai, tanggal_selesai, mode)
+        except ValueError as e:
+            print(f'[EXPORT ERROR] {e}')
+            return jsonify({'error': str(e)}), 400
         
-        from flask import send_file
-        filename = f"laporan_keuangan_{mode}_{date.today().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name=filename)
+        # Workbook dibuat di background; client polling status lalu download
+        filename = f"laporan_keuangan_{mode}_{get_local_now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        job = get_export_queue().enqueue(
+            'laporan_excel',
+            {'tanggal_mulai': tanggal_mulai, 'tanggal_selesai': tanggal_selesai, 'mode': mode},
+            filename,
+            user_id=current_user.id,
+        )
+        return jsonify({
+            'success': True,
+            'job': job,
+            'status_url': url_for('export_job_status', job_id=job['id']),
+        }), 202
     
     except Exception as e:
         print(f'[EXPORT ERROR] {str(e)}')
@@ -1987,6 +2341,45 @@ def export_laporan_excel():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def _export_job_response(job):
+    data = dict(job)
+    if job['status'] == 'done' and job['filename']:
+        data['download_url'] = url_for('download_export', filename=job['filename'])
+    return data
+
+@app.route('/laporan/export-jobs/<job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    """Status & progress job export"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    job = get_export_queue().status(job_id)
+    if job is None:
+        return jsonify({'error': 'Job tidak ditemukan'}), 404
+    return jsonify({'success': True, 'job': _export_job_response(job)}), 200
+
+@app.route('/laporan/download-export/<filename>', methods=['GET'])
+@login_required
+def download_export(filename):
+    """Download file hasil job export yang sudah selesai"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Security: only allow export_<job id>.xlsx files
+    job_id = filename[len('export_'):-len('.xlsx')] if filename.startswith('export_') and filename.endswith('.xlsx') else ''
+    if not job_id.isalnum():
+        return jsonify({'error': 'Invalid filename'}), 400
+    
+    queue = get_export_queue()
+    job = queue.get(job_id)
+    path = queue.file_path(job) if job is not None and job.status == 'done' else None
+    if not path:
+        return jsonify({'error': 'File not found'}), 404
+    
+    from flask import send_file
+    return send_file(path, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=job.download_name or filename)
+
 @app.route('/laporan/trigger-daily-report', methods=['POST'])
 @csrf.exempt
 @login_required
@@ -2067,494 +2460,209 @@ def download_daily_report(filename):
             return jsonify({'error': 'File not found'}), 404
         
         from flask import send_file
-        return send_file(filepath, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name=filename)
+        return send_file(filepath, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=filename)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def generate_laporan_hari(tanggal_mulai, tanggal_selesai):
-    """Generate laporan per hari dengan detail produk"""
-    from openpyxl.styles import PatternFill, Border, Side, Font as OpenpyxlFont
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Laporan Per Hari"
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 5
-    ws.column_dimensions['B'].width = 30
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 15
-    
-    # Header styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = OpenpyxlFont(bold=True, color="FFFFFF")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    row = 1
-    # Title
-    ws['A1'] = "LAPORAN KEUANGAN TOKO"
-    ws['A1'].font = OpenpyxlFont(bold=True, size=14)
-    ws.merge_cells('A1:G1')
-    row = 2
-    
-    ws[f'A{row}'] = f"Periode: {tanggal_mulai} s/d {tanggal_selesai}"
-    ws.merge_cells(f'A{row}:G{row}')
+LAPORAN_HEADERS = ['No', 'Nama Barang', 'Jumlah', 'Harga Barang', 'Total Pembayaran', 'HPP', 'Keuntungan']
+LAPORAN_DATA_STYLES = ['kasir_cell', 'kasir_cell', 'kasir_cell', 'kasir_currency', 'kasir_currency', 'kasir_currency', 'kasir_currency']
+LAPORAN_WIDTHS = {'A': 5, 'B': 30, 'C': 12, 'D': 15, 'E': 15, 'F': 15, 'G': 15}
+
+def _tulis_judul_laporan(ws, judul, tanggal_mulai, tanggal_selesai, last_col):
+    """Judul + periode + baris kosong (baris 1-3); return baris berikutnya."""
+    ws.append([styled(ws, judul, 'kasir_title')])
+    merge_row(ws, 1, 'A', last_col)
+    ws.append([f"Periode: {tanggal_mulai} s/d {tanggal_selesai}"])
+    merge_row(ws, 2, 'A', last_col)
+    ws.append([])
+    return 4
+
+def _tulis_blok_harian(ws, row, blok, bulanan=False):
+    """Satu blok tanggal (header, baris produk, subtotal, baris kosong); return baris berikutnya."""
+    if bulanan:
+        ws.append([styled(ws, f"TANGGAL: {blok['tanggal']}", 'kasir_date_bar')])
+        merge_row(ws, row, 'A', 'G')
+    else:
+        ws.append(styled_row(ws, ["TANGGAL:", blok['tanggal']], 'kasir_bold'))
+    ws.append(styled_row(ws, LAPORAN_HEADERS, 'kasir_header'))
     row += 2
     
-    # Get all transactions for date range
-    transaksi_list = Transaksi.query.filter(
-        db.func.date(Transaksi.tanggal) >= tanggal_mulai,
-        db.func.date(Transaksi.tanggal) <= tanggal_selesai
-    ).order_by(Transaksi.tanggal).all()
-    
-    # Group by date
-    from collections import defaultdict
-    transaksi_by_date = defaultdict(list)
-    for t in transaksi_list:
-        date_key = t.tanggal.strftime('%Y-%m-%d')
-        transaksi_by_date[date_key].append(t)
-    
-    # Totals for all data
-    grand_total_pembayaran = 0
-    grand_total_hpp = 0
-    grand_total_keuntungan = 0
-    
-    # Process each date
-    for date_key in sorted(transaksi_by_date.keys()):
-        transaksi_hari = transaksi_by_date[date_key]
-        
-        # Date header
-        ws[f'A{row}'] = "TANGGAL:" if row > 4 else f"{date_key}"
-        ws[f'B{row}'] = date_key
-        ws[f'A{row}'].font = OpenpyxlFont(bold=True)
-        ws[f'B{row}'].font = OpenpyxlFont(bold=True)
+    for no, data in enumerate(blok['rows'], 1):
+        ws.append(styled_row(ws, [
+            no, data['nama'], data['jumlah'], data['harga_jual'],
+            data['pembayaran'], data['hpp'], data['keuntungan'],
+        ], LAPORAN_DATA_STYLES))
         row += 1
-        
-        # Column headers for this day
-        headers = ['No', 'Nama Barang', 'Jumlah', 'Harga Barang', 'Total Pembayaran', 'HPP', 'Keuntungan']
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+    
+    label, style = ("TOTAL HARI", 'kasir_subtotal_green') if bulanan else ("TOTAL", 'kasir_subtotal')
+    ws.append([styled(ws, label, 'kasir_bold'), None, None, None] + styled_row(
+        ws, [blok['pembayaran'], blok['hpp'], blok['keuntungan']], style))
+    merge_row(ws, row, 'A', 'D')
+    ws.append([])
+    return row + 2
+
+def _tulis_ringkasan_bulanan(ws, row, month_totals, total_label):
+    """Tabel total per bulan + baris total keseluruhan; return baris berikutnya."""
+    ws.append(styled_row(ws, ['Bulan', 'Total Pembayaran', 'Total HPP', 'Total Keuntungan'], 'kasir_header'))
+    row += 1
+    
+    for month_key in sorted(month_totals):
+        totals = month_totals[month_key]
+        ws.append(styled_row(
+            ws, [month_key, totals['pembayaran'], totals['hpp'], totals['keuntungan']],
+            ['kasir_cell', 'kasir_currency', 'kasir_currency', 'kasir_currency'],
+        ))
         row += 1
-        
-        # Data for this day - aggregate same products
-        no = 1
-        daily_total_pembayaran = 0
-        daily_total_hpp = 0
-        daily_total_keuntungan = 0
-        
-        # Collect product data
-        product_data = {}  # {nama_produk: {jumlah, harga_jual, hpp, pembayaran, keuntungan}}
-        
-        for transaksi in transaksi_hari:
-            for item in transaksi.items:
-                nama_produk = item.produk.nama if item.produk else "Unknown"
-                jumlah = item.jumlah
-                harga_jual = item.harga
-                total_pembayaran = item.subtotal
-                hpp = item.produk.harga_beli if item.produk else 0
-                keuntungan = (harga_jual - hpp) * jumlah
-                
-                # Aggregate the data
-                if nama_produk not in product_data:
-                    product_data[nama_produk] = {
-                        'jumlah': 0,
-                        'harga_jual': harga_jual,
-                        'hpp': hpp,
-                        'pembayaran': 0,
-                        'keuntungan': 0
-                    }
-                
-                product_data[nama_produk]['jumlah'] += jumlah
-                product_data[nama_produk]['pembayaran'] += total_pembayaran
-                product_data[nama_produk]['keuntungan'] += keuntungan
-        
-        # Write aggregated data to Excel
-        for nama_produk, data in product_data.items():
-            daily_total_pembayaran += data['pembayaran']
-            daily_total_hpp += data['hpp'] * data['jumlah']
-            daily_total_keuntungan += data['keuntungan']
-            
-            grand_total_pembayaran += data['pembayaran']
-            grand_total_hpp += data['hpp'] * data['jumlah']
-            grand_total_keuntungan += data['keuntungan']
-            
-            # Write data row
-            ws[f'A{row}'] = no
-            ws[f'B{row}'] = nama_produk
-            ws[f'C{row}'] = data['jumlah']
-            ws[f'D{row}'] = data['harga_jual']
-            ws[f'E{row}'] = data['pembayaran']
-            ws[f'F{row}'] = data['hpp']
-            ws[f'G{row}'] = data['keuntungan']
-            
-            # Format currency columns
-            for col in ['D', 'E', 'F', 'G']:
-                ws[f'{col}{row}'].number_format = '#,##0.00'
-            
-            for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
-                ws[f'{col}{row}'].border = border
-            
-            no += 1
-            row += 1
-        
-        # Subtotal for this day
-        subtotal_row = row
-        ws[f'A{row}'] = "TOTAL"
-        ws[f'A{row}'].font = OpenpyxlFont(bold=True)
-        ws.merge_cells(f'A{row}:D{row}')
-        ws[f'E{row}'] = daily_total_pembayaran
-        ws[f'F{row}'] = daily_total_hpp
-        ws[f'G{row}'] = daily_total_keuntungan
-        
-        for col in ['E', 'F', 'G']:
-            cell = ws[f'{col}{row}']
-            cell.font = OpenpyxlFont(bold=True)
-            cell.number_format = '#,##0.00'
-            cell.border = border
-            cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        
-        row += 2
+    
+    ws.append(styled_row(ws, [
+        total_label,
+        sum(v['pembayaran'] for v in month_totals.values()),
+        sum(v['hpp'] for v in month_totals.values()),
+        sum(v['keuntungan'] for v in month_totals.values()),
+    ], 'kasir_grand'))
+    return row + 1
+
+def generate_laporan_hari(tanggal_mulai, tanggal_selesai):
+    """Generate laporan per hari dengan detail produk (workbook write-only/streaming)"""
+    wb = new_workbook()
+    ws = wb.create_sheet("Laporan Per Hari")
+    set_column_widths(ws, LAPORAN_WIDTHS)
+    row = _tulis_judul_laporan(ws, "LAPORAN KEUANGAN TOKO", tanggal_mulai, tanggal_selesai, 'G')
+    
+    grand = {'pembayaran': 0, 'hpp': 0, 'keuntungan': 0}
+    for blok in report_queries.blok_harian(db.session, tanggal_mulai, tanggal_selesai):
+        row = _tulis_blok_harian(ws, row, blok)
+        for key in grand:
+            grand[key] += blok[key]
     
     # Grand total at bottom
-    ws[f'A{row}'] = "GRAND TOTAL"
-    ws[f'A{row}'].font = OpenpyxlFont(bold=True, size=12)
-    ws.merge_cells(f'A{row}:D{row}')
-    ws[f'E{row}'] = grand_total_pembayaran
-    ws[f'F{row}'] = grand_total_hpp
-    ws[f'G{row}'] = grand_total_keuntungan
-    
-    for col in ['E', 'F', 'G']:
-        cell = ws[f'{col}{row}']
-        cell.font = OpenpyxlFont(bold=True, color="FFFFFF", size=12)
-        cell.number_format = '#,##0.00'
-        cell.border = border
-        cell.fill = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
+    ws.append([styled(ws, "GRAND TOTAL", 'kasir_grand_label'), None, None, None] + styled_row(
+        ws, [grand['pembayaran'], grand['hpp'], grand['keuntungan']], 'kasir_grand'))
+    merge_row(ws, row, 'A', 'D')
     
     return wb
 
 def generate_laporan_bulan(tanggal_mulai, tanggal_selesai):
-    """Generate laporan per bulan (blok harian dengan summary bulanan)"""
-    from openpyxl.styles import PatternFill, Border, Side, Font as OpenpyxlFont
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Laporan Per Bulan"
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 5
-    ws.column_dimensions['B'].width = 30
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 15
-    
-    # Styles
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = OpenpyxlFont(bold=True, color="FFFFFF")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    row = 1
-    # Title
-    ws['A1'] = "LAPORAN KEUANGAN BULANAN"
-    ws['A1'].font = OpenpyxlFont(bold=True, size=14)
-    ws.merge_cells('A1:G1')
-    row = 2
-    
-    ws[f'A{row}'] = f"Periode: {tanggal_mulai} s/d {tanggal_selesai}"
-    ws.merge_cells(f'A{row}:G{row}')
-    row += 2
-    
-    # Get all transactions
-    transaksi_list = Transaksi.query.filter(
-        db.func.date(Transaksi.tanggal) >= tanggal_mulai,
-        db.func.date(Transaksi.tanggal) <= tanggal_selesai
-    ).order_by(Transaksi.tanggal).all()
+    """
+    Generate laporan per bulan: blok harian dengan detail produk + ringkasan bulanan.
     
+    Satu pass atas rollup tanggal × produk; total bulan diakumulasi dari
+    subtotal harian di pass yang sama (workbook write-only/streaming).
+    """
     from collections import defaultdict
-    transaksi_by_date = defaultdict(list)
-    for t in transaksi_list:
-        date_key = t.tanggal.strftime('%Y-%m-%d')
-        transaksi_by_date[date_key].append(t)
     
-    month_totals = defaultdict(lambda: {'pembayaran': 0, 'hpp': 0, 'keuntungan': 0})
+    wb = new_workbook()
+    ws = wb.create_sheet("Laporan Per Bulan")
+    set_column_widths(ws, LAPORAN_WIDTHS)
+    row = _tulis_judul_laporan(ws, "LAPORAN KEUANGAN BULANAN", tanggal_mulai, tanggal_selesai, 'G')
     
-    # Process each date
-    for date_key in sorted(transaksi_by_date.keys()):
-        transaksi_hari = transaksi_by_date[date_key]
-        month_key = date_key[:7]  # YYYY-MM
-        
-        # Date header
-        ws[f'A{row}'] = f"TANGGAL: {date_key}"
-        ws[f'A{row}'].font = OpenpyxlFont(bold=True, color="FFFFFF")
-        ws.merge_cells(f'A{row}:G{row}')
-        ws[f'A{row}'].fill = PatternFill(start_color="595959", end_color="595959", fill_type="solid")
-        row += 1
-        
-        # Column headers
-        headers = ['No', 'Nama Barang', 'Jumlah', 'Harga Barang', 'Total Pembayaran', 'HPP', 'Keuntungan']
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        row += 1
-        
-        # Data - aggregate same products per day
-        no = 1
-        daily_pembayaran = 0
-        daily_hpp = 0
-        daily_keuntungan = 0
-        
-        # Collect product data for this day
-        product_data = {}
-        
-        for transaksi in transaksi_hari:
-            for item in transaksi.items:
-                nama_produk = item.produk.nama if item.produk else "Unknown"
-                jumlah = item.jumlah
-                harga_jual = item.harga
-                total_pembayaran = item.subtotal
-                hpp = item.produk.harga_beli if item.produk else 0
-                keuntungan = (harga_jual - hpp) * jumlah
-                
-                if nama_produk not in product_data:
-                    product_data[nama_produk] = {
-                        'jumlah': 0,
-                        'harga_jual': harga_jual,
-                        'hpp': hpp,
-                        'pembayaran': 0,
-                        'keuntungan': 0
-                    }
-                
-                product_data[nama_produk]['jumlah'] += jumlah
-                product_data[nama_produk]['pembayaran'] += total_pembayaran
-                product_data[nama_produk]['keuntungan'] += keuntungan
-        
-        # Write aggregated data and accumulate totals
-        for nama_produk, data in product_data.items():
-            daily_pembayaran += data['pembayaran']
-            daily_hpp += data['hpp'] * data['jumlah']
-            daily_keuntungan += data['keuntungan']
-            
-            # Add to month total
-            month_totals[month_key]['pembayaran'] += data['pembayaran']
-            month_totals[month_key]['hpp'] += data['hpp'] * data['jumlah']
-            month_totals[month_key]['keuntungan'] += data['keuntungan']
-            
-            # Write row
-            ws[f'A{row}'] = no
-            ws[f'B{row}'] = nama_produk
-            ws[f'C{row}'] = data['jumlah']
-            ws[f'D{row}'] = data['harga_jual']
-            ws[f'E{row}'] = data['pembayaran']
-            ws[f'F{row}'] = data['hpp']
-            ws[f'G{row}'] = data['keuntungan']
-            
-            for col in ['D', 'E', 'F', 'G']:
-                ws[f'{col}{row}'].number_format = '#,##0.00'
-            
-            for col in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
-                ws[f'{col}{row}'].border = border
-            
-            no += 1
-            row += 1
-        
-        # Daily subtotal
-        ws[f'A{row}'] = "TOTAL HARI"
-        ws[f'A{row}'].font = OpenpyxlFont(bold=True)
-        ws.merge_cells(f'A{row}:D{row}')
-        ws[f'E{row}'] = daily_pembayaran
-        ws[f'F{row}'] = daily_hpp
-        ws[f'G{row}'] = daily_keuntungan
-        
-        for col in ['E', 'F', 'G']:
-            cell = ws[f'{col}{row}']
-            cell.font = OpenpyxlFont(bold=True)
-            cell.number_format = '#,##0.00'
-            cell.border = border
-            cell.fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
-        
-        row += 2
+    month_totals = defaultdict(lambda: {'pembayaran': 0, 'hpp': 0, 'keuntungan': 0})
+    for blok in report_queries.blok_harian(db.session, tanggal_mulai, tanggal_selesai):
+        row = _tulis_blok_harian(ws, row, blok, bulanan=True)
+        totals = month_totals[blok['tanggal'][:7]]  # YYYY-MM
+        for key in totals:
+            totals[key] += blok[key]
     
     # Monthly summary
+    ws.append([])
     row += 1
-    ws[f'A{row}'] = "RINGKASAN BULANAN"
-    ws[f'A{row}'].font = OpenpyxlFont(bold=True, size=12, color="FFFFFF")
-    ws.merge_cells(f'A{row}:G{row}')
-    ws[f'A{row}'].fill = PatternFill(start_color="0070C0", end_color="0070C0", fill_type="solid")
-    row += 1
-    
-    # Month header
-    headers = ['Bulan', 'Total Pembayaran', 'Total HPP', 'Total Keuntungan']
-    month_header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=row, column=col_idx)
-        cell.value = header
-        cell.fill = month_header_fill
-        cell.font = OpenpyxlFont(bold=True, color="FFFFFF")
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center', vertical='center')
+    ws.append([styled(ws, "RINGKASAN BULANAN", 'kasir_section')])
+    merge_row(ws, row, 'A', 'G')
     row += 1
-    
-    # Month data
-    for month_key in sorted(month_totals.keys()):
-        ws[f'A{row}'] = month_key
-        ws[f'B{row}'] = month_totals[month_key]['pembayaran']
-        ws[f'C{row}'] = month_totals[month_key]['hpp']
-        ws[f'D{row}'] = month_totals[month_key]['keuntungan']
-        
-        for col in ['B', 'C', 'D']:
-            ws[f'{col}{row}'].number_format = '#,##0.00'
-            ws[f'{col}{row}'].border = border
-        ws[f'A{row}'].border = border
-        
-        row += 1
-    
-    # Grand total for month report
-    ws[f'A{row}'] = "TOTAL KESELURUHAN"
-    ws[f'A{row}'].font = OpenpyxlFont(bold=True, color="FFFFFF")
-    ws.merge_cells(f'A{row}:A{row}')
-    
-    total_all_pembayaran = sum(v['pembayaran'] for v in month_totals.values())
-    total_all_hpp = sum(v['hpp'] for v in month_totals.values())
-    total_all_keuntungan = sum(v['keuntungan'] for v in month_totals.values())
-    
-    ws[f'B{row}'] = total_all_pembayaran
-    ws[f'C{row}'] = total_all_hpp
-    ws[f'D{row}'] = total_all_keuntungan
-    
-    for col in ['A', 'B', 'C', 'D']:
-        cell = ws[f'{col}{row}']
-        cell.font = OpenpyxlFont(bold=True, color="FFFFFF", size=11)
-        cell.fill = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
-        cell.border = border
-        cell.number_format = '#,##0.00'
+    _tulis_ringkasan_bulanan(ws, row, month_totals, "TOTAL KESELURUHAN")
     
     return wb
 
 def generate_laporan_tahun(tanggal_mulai, tanggal_selesai):
-    """Generate laporan per tahun dengan summary bulanan"""
-    from openpyxl.styles import PatternFill, Border, Side, Font as OpenpyxlFont
+    """Generate laporan per tahun dengan summary bulanan (workbook write-only/streaming)"""
+    wb = new_workbook()
+    ws = wb.create_sheet("Laporan Per Tahun")
+    set_column_widths(ws, {'A': 15, 'B': 20, 'C': 20, 'D': 20})
+    row = _tulis_judul_laporan(ws, "LAPORAN KEUANGAN TAHUNAN", tanggal_mulai, tanggal_selesai, 'D')
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Laporan Per Tahun"
-    
-    # Set column widths
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 20
-    ws.column_dimensions['C'].width = 20
-    ws.column_dimensions['D'].width = 20
-    
-    # Styles
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = OpenpyxlFont(bold=True, color="FFFFFF")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    row = 1
-    # Title
-    ws['A1'] = "LAPORAN KEUANGAN TAHUNAN"
-    ws['A1'].font = OpenpyxlFont(bold=True, size=14)
-    ws.merge_cells('A1:D1')
-    row = 2
-    
-    ws[f'A{row}'] = f"Periode: {tanggal_mulai} s/d {tanggal_selesai}"
-    ws.merge_cells(f'A{row}:D{row}')
-    row += 2
-    
-    # Get all transactions
-    transaksi_list = Transaksi.query.filter(
-        db.func.date(Transaksi.tanggal) >= tanggal_mulai,
-        db.func.date(Transaksi.tanggal) <= tanggal_selesai
-    ).order_by(Transaksi.tanggal).all()
+    # Total per bulan dihitung di SQL (GROUP BY bulan atas rollup harian)
+    month_totals = report_queries.total_per_bulan(db.session, tanggal_mulai, tanggal_selesai)
+    _tulis_ringkasan_bulanan(ws, row, month_totals, "TOTAL TAHUN")
     
-    from collections import defaultdict
-    month_totals = defaultdict(lambda: {'pembayaran': 0, 'hpp': 0, 'keuntungan': 0})
-    
-    # Calculate monthly totals
-    for transaksi in transaksi_list:
-        month_key = transaksi.tanggal.strftime('%Y-%m')
-        for item in transaksi.items:
-            hpp = item.produk.harga_beli if item.produk else 0
-            keuntungan = (item.harga - hpp) * item.jumlah
-            
-            month_totals[month_key]['pembayaran'] += item.subtotal
-            month_totals[month_key]['hpp'] += hpp * item.jumlah
-            month_totals[month_key]['keuntungan'] += keuntungan
-    
-    # Table header
-    headers = ['Bulan', 'Total Pembayaran', 'Total HPP', 'Total Keuntungan']
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=row, column=col_idx)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = border
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-    row += 1
-    
-    # Month data
-    for month_key in sorted(month_totals.keys()):
-        ws[f'A{row}'] = month_key
-        ws[f'B{row}'] = month_totals[month_key]['pembayaran']
-        ws[f'C{row}'] = month_totals[month_key]['hpp']
-        ws[f'D{row}'] = month_totals[month_key]['keuntungan']
-        
-        for col in ['A', 'B', 'C', 'D']:
-            cell = ws[f'{col}{row}']
-            cell.border = border
-            if col in ['B', 'C', 'D']:
-                cell.number_format = '#,##0.00'
-        
-        row += 1
-    
-    # Grand total
-    ws[f'A{row}'] = "TOTAL TAHUN"
-    ws[f'A{row}'].font = OpenpyxlFont(bold=True, color="FFFFFF")
-    
-    total_all_pembayaran = sum(v['pembayaran'] for v in month_totals.values())
-    total_all_hpp = sum(v['hpp'] for v in month_totals.values())
-    total_all_keuntungan = sum(v['keuntungan'] for v in month_totals.values())
-    
-    ws[f'B{row}'] = total_all_pembayaran
-    ws[f'C{row}'] = total_all_hpp
-    ws[f'D{row}'] = total_all_keuntungan
+    return wb
+
+LAPORAN_EXCEL_MODES = ('hari', 'bulan', 'tahun')
+
+def validate_laporan_excel_args(tanggal_mulai, tanggal_selesai, mode):
+    """Raises ValueError untuk mode/tanggal export yang tidak valid."""
+    if mode not in LAPORAN_EXCEL_MODES:
+        raise ValueError(f'Mode tidak valid: {mode}')
+    try:
+        as_date(tanggal_mulai)
+        as_date(tanggal_selesai)
+    except ValueError:
+        raise ValueError('Format tanggal tidak valid (YYYY-MM-DD)')
+
+def laporan_excel_path(tanggal_mulai, tanggal_selesai, mode, progress=None):
+    """
+    Path file xlsx laporan keuangan untuk rentang & mode.
+    
+    File diambil dari report cache jika data di rentang itu belum berubah;
+    jika belum ada, workbook dibuat lalu disimpan ke cache.
+    Raises ValueError untuk mode/tanggal tidak valid.
+    
+    Args:
+        progress: Optional `progress(persen, pesan)` (dipakai job export)
+    """
+    validate_laporan_excel_args(tanggal_mulai, tanggal_selesai, mode)
+    generators = {
+        'hari': generate_laporan_hari,
+        'bulan': generate_laporan_bulan,
+        'tahun': generate_laporan_tahun,
+    }
+    report = progress or (lambda percent, message=None: None)
     
-    for col in ['A', 'B', 'C', 'D']:
-        cell = ws[f'{col}{row}']
-        cell.font = OpenpyxlFont(bold=True, color="FFFFFF", size=12)
-        cell.fill = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
-        cell.border = border
-        cell.number_format = '#,##0.00'
+    def build(path):
+        report(10, 'Menyusun laporan')
+        wb = generators[mode](tanggal_mulai, tanggal_selesai)
+        report(70, 'Menyimpan file')
+        wb.save(path)
     
-    return wb
+    report(5, 'Cek cache laporan')
+    return get_report_cache().get_or_build_file(
+        db.session, 'laporan_excel', tanggal_mulai, tanggal_selesai, build, mode=mode
+    )
+
+def _run_laporan_excel_job(params, progress):
+    return laporan_excel_path(params['tanggal_mulai'], params['tanggal_selesai'], params['mode'], progress=progress)
+
+def _send_export_to_telegram(job):
+    """Kirim hasil job export yang diminta dari Telegram ke chat peminta."""
+    if not job.get('telegram_chat_id') or not TELEGRAM_AVAILABLE:
+        return
+    bot = get_telegram_bot()
+    if not bot:
+        return
+    if job['status'] == 'done':
+        params = job['params']
+        caption = f"📊 Laporan keuangan ({params.get('mode')}) {params.get('tanggal_mulai')} s/d {params.get('tanggal_selesai')}"
+        bot.send_document_sync(job['telegram_chat_id'], get_export_queue().file_path(job), job['download_name'], caption)
+    else:
+        bot.send_message_sync(job['telegram_chat_id'], f"❌ Export laporan gagal: {job.get('error') or '-'}")
+
+get_export_queue().register('laporan_excel', _run_laporan_excel_job)
+get_export_queue().on_finish(_send_export_to_telegram)
+
+def recover_export_jobs():
+    """
+    Jalankan ulang job export yang terputus karena restart.
+
+    Hanya dipanggil di leader (setelah bot Telegram jalan): hasil job yang
+    diminta dari Telegram dikirim lewat bot, dan di follower bot tidak ada
+    sehingga hasilnya tidak akan pernah sampai ke chat peminta.
+    """
+    with app.app_context():
+        try:
+            get_export_queue().recover()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Export] Warning: gagal memulihkan job export: {e}")
 
 # ==================== PENGATURAN ROUTES ====================
 
@@ -2605,6 +2713,89 @@ def backup_now():
     
     return redirect(url_for('index'))
 
+@app.route('/admin/backup-status')
+@login_required
+def backup_status():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Akses ditolak!'}), 403
+    
+    worker = get_backup_worker()
+    if not worker:
+        return jsonify({'success': False, 'message': 'Backup worker tidak tersedia'}), 503
+    
+    snapshots = backup_store.list_snapshots()
+    store_info = {
+        'snapshots': len(snapshots),
+        'latest': snapshots[0].id if snapshots else None,
+        'latest_size_bytes': snapshots[0].size_bytes if snapshots else 0,
+        'disk_bytes': backup_store.disk_usage(),
+        'codec': backup_store.codec,
+    }
+    return jsonify({'success': True, 'status': worker.status(), 'progress': get_backup_progress(), 'store': store_info})
+
+@app.route('/admin/member/recompute', methods=['POST'])
+@login_required
+def member_recompute():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Akses ditolak!'}), 403
+    
+    apply = str(request.args.get('apply', '1')).lower() not in ('0', 'false', 'no')
+    try:
+        drift = recompute_member_aggregates(apply=apply)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Gagal hitung ulang: {str(e)}'}), 500
+    return jsonify({'success': True, 'applied': apply, 'count': len(drift), 'members': drift[:100]})
+
+@app.route('/admin/rollup/rebuild', methods=['POST'])
+@login_required
+def rollup_rebuild():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Akses ditolak!'}), 403
+    
+    tanggal_mulai = request.args.get('tanggal_mulai') or None
+    tanggal_selesai = request.args.get('tanggal_selesai') or None
+    try:
+        result = sales_rollup.rebuild(db.session, tanggal_mulai, tanggal_selesai)
+        db.session.commit()
+        get_report_cache().invalidate_range(tanggal_mulai, tanggal_selesai)
+    except ValueError:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Format tanggal tidak valid (YYYY-MM-DD)'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Gagal rebuild rollup: {str(e)}'}), 500
+    return jsonify({'success': True, **result})
+
+@app.route('/api/analytics/tren')
+@login_required
+def api_analytics_tren():
+    """Tren omzet harian, moving average 7 hari, growth & indeks musiman"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    sales_analytics = _sales_analytics()
+    hari = max(14, min(366, request.args.get('hari', sales_analytics.DEFAULT_RIWAYAT_HARI, type=int) or 14))
+    try:
+        tren = sales_analytics.tren_penjualan(db.session, request.args.get('tanggal') or None, hari)
+    except ValueError:
+        return jsonify({'error': 'Format tanggal tidak valid (YYYY-MM-DD)'}), 400
+    target, sumber = sales_analytics.target_harian(db.session, tren['selesai'])
+    return jsonify({'success': True, 'tren': tren, 'target': {'nilai': target, 'sumber': sumber}})
+
+@app.route('/api/analytics/saran-restock')
+@login_required
+def api_analytics_saran_restock():
+    """Produk yang diprediksi habis dalam horizon (default 7 hari)"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    sales_analytics = _sales_analytics()
+    horizon = max(1, min(60, request.args.get('horizon', sales_analytics.DEFAULT_HORIZON_HARI, type=int) or 7))
+    limit = request.args.get('limit', type=int)
+    saran = sales_analytics.saran_restock(db.session, horizon=horizon, limit=limit)
+    return jsonify({'success': True, 'horizon': horizon, 'produk': saran})
+
 @app.route('/admin/restore-backup')
 @login_required
 def restore_backup():
@@ -2664,6 +2855,14 @@ def init_database():
             if 'points_earned' not in tx_columns:
                 db.session.execute(text("ALTER TABLE transaksi ADD COLUMN points_earned INTEGER DEFAULT 0"))
 
+            result = db.session.execute(text("PRAGMA table_info(transaksi_item)"))
+            item_columns = {row[1] for row in result}
+            if 'harga_beli' not in item_columns:
+                db.session.execute(text("ALTER TABLE transaksi_item ADD COLUMN harga_beli REAL"))
+                # Isi HPP item lama dari rollup harian (harga beli saat itu), fallback harga produk
+                filled = sales_rollup.backfill_harga_beli(db.session)
+                print(f"[DB] Snapshot harga_beli diisi untuk {filled} item transaksi lama")
+
             result = db.session.execute(text("PRAGMA table_info(member)"))
             member_columns = {row[1] for row in result}
             if 'points' not in member_columns:
@@ -2695,6 +2894,19 @@ def init_database():
             db.session.rollback()
             print(f"[DB] Warning: gagal membuat index: {e}")
         
+        # Index pencarian produk (FTS5) + trigger sinkronisasi
+        product_search.ensure_index(db.session)
+        ensure_barcode_triggers(db.session)
+        katalog_sync.ensure_triggers(db.session)
+        ensure_report_cache_triggers(db.session)
+        
+        # Backfill rollup penjualan harian untuk database lama
+        try:
+            sales_rollup.ensure_backfilled(db.session)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Rollup] Warning: gagal backfill rollup penjualan: {e}")
+        
         if not User.query.filter_by(username='admin').first():
             admin = User(username='admin', nama='Administrator', role='admin')
             admin.set_password('Admin123')
@@ -2753,6 +2965,7 @@ def init_database():
 # ==================== RUN APP ====================
 
 if __name__ == '__main__':
+    print_startup_banner()
     init_database()
     
     # Initialize Telegram Bot (only in main process, not in reloader)
@@ -2815,4 +3028,9 @@ if __name__ == '__main__':
     # Start scheduler for daily saldo archive
     start_scheduler()
     
+    # Job export yang terputus karena restart dijalankan ulang (di proses
+    # reloader yang melayani request, sama seperti bot Telegram)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        recover_export_jobs()
+    
     app.run(host='0.0.0.0', debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Online backup engine untuk database SQLite kasir.
+
+Menggunakan `sqlite3.Connection.backup()` sehingga salinan selalu konsisten
+walaupun ada request lain yang sedang menulis. Halaman database disalin per
+batch (`pages_per_step`) dan worker memberi jeda di antara batch supaya kasir
+tidak terkunci lama. Hasil backup diverifikasi dengan `PRAGMA quick_check`
+(atau `integrity_check`) sebelum file dipindah ke nama akhirnya.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+
+DEFAULT_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP', '256') or 256)
+DEFAULT_STEP_SLEEP_S = float(os.environ.get('BACKUP_STEP_SLEEP_MS', '5') or 5) / 1000.0
+DEFAULT_VERIFY = (os.environ.get('BACKUP_VERIFY', 'quick') or 'quick').strip().lower()
+
+# Jika sumber terus berubah selama backup bertahap, SQLite mengulang dari awal.
+# Setelah sekian kali restart, salin sekaligus dalam satu langkah.
+MAX_RESTARTS = 3
+
+
+@dataclass(frozen=True)
+class BackupResult:
+    ok: bool
+    dest_path: str | None = None
+    size_bytes: int = 0
+    pages: int = 0
+    duration_s: float = 0.0
+    verify: str | None = None
+    reason: str | None = None
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+_progress_lock = threading.Lock()
+_progress: dict[str, Any] = {
+    'state': 'idle',
+    'dest': None,
+    'pages_total': 0,
+    'pages_done': 0,
+    'percent': 0.0,
+    'restarts': 0,
+    'started_at': None,
+    'finished_at': None,
+    'reason': None,
+}
+
+
+def _now_str() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _set_progress(**kwargs: Any) -> None:
+    with _progress_lock:
+        _progress.update(kwargs)
+        total = _progress.get('pages_total') or 0
+        done = _progress.get('pages_done') or 0
+        _progress['percent'] = round(done * 100.0 / total, 1) if total else 0.0
+
+
+def get_backup_progress() -> dict[str, Any]:
+    """Snapshot progress backup yang sedang/terakhir berjalan."""
+    with _progress_lock:
+        return dict(_progress)
+
+
+def verify_database(path: str, mode: str = 'quick') -> tuple[bool, str]:
+    """Jalankan PRAGMA quick_check / integrity_check pada file database."""
+    if mode not in ('quick', 'full'):
+        return True, 'skipped'
+    pragma = 'quick_check' if mode == 'quick' else 'integrity_check'
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = [r[0] for r in conn.execute(f'PRAGMA {pragma}').fetchall()]
+    finally:
+        conn.close()
+    if rows == ['ok']:
+        return True, pragma
+    return False, f'{pragma}: ' + '; '.join(str(r) for r in rows[:5])
+
+
+def online_backup(
+    src_path: str,
+    dest_path: str,
+    *,
+    pages_per_step: int | None = None,
+    sleep_s: float | None = None,
+    verify: str | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> BackupResult:
+    """
+    Backup `src_path` ke `dest_path` memakai SQLite online backup API.
+
+    Args:
+        pages_per_step: Jumlah halaman yang disalin per langkah
+        sleep_s: Jeda antar langkah (memberi kesempatan writer)
+        verify: 'quick', 'full', atau 'none'
+        progress: Callback opsional (pages_done, pages_total)
+    """
+    pages_per_step = pages_per_step or DEFAULT_PAGES_PER_STEP
+    sleep_s = DEFAULT_STEP_SLEEP_S if sleep_s is None else max(0.0, sleep_s)
+    verify = (verify or DEFAULT_VERIFY).lower()
+
+    if not os.path.exists(src_path):
+        return BackupResult(ok=False, reason=f'Database not found: {src_path}')
+
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    tmp_path = dest_path + '.part'
+    started = time.monotonic()
+    _set_progress(state='copying', dest=dest_path, pages_total=0, pages_done=0,
+                  restarts=0, started_at=_now_str(), finished_at=None, reason=None)
+
+    state = {'last_remaining': None, 'restarts': 0, 'total': 0}
+
+    def _on_step(status: int, remaining: int, total: int) -> None:
+        last = state['last_remaining']
+        if last is not None and remaining > last:
+            state['restarts'] += 1
+            if state['restarts'] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state['last_remaining'] = remaining
+        state['total'] = total
+        done = total - remaining
+        _set_progress(pages_total=total, pages_done=done, restarts=state['restarts'])
+        if progress:
+            progress(done, total)
+        if remaining and sleep_s:
+            time.sleep(sleep_s)
+
+    src = None
+    dst = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        src = sqlite3.connect(src_path, timeout=30)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=pages_per_step, progress=_on_step)
+        except _TooManyRestarts:
+            # Database sibuk: salin sekaligus (satu read transaction)
+            print('[Backup] Sumber sering berubah, salin dalam satu langkah')
+            src.backup(dst, pages=-1, progress=_on_step)
+        # Salinan dijadikan file tunggal (tanpa -wal/-shm) walau sumbernya WAL
+        dst.execute('PRAGMA journal_mode = DELETE')
+        dst.close()
+        dst = None
+
+        _set_progress(state='verifying')
+        ok, detail = verify_database(tmp_path, verify)
+        if not ok:
+            os.remove(tmp_path)
+            _set_progress(state='failed', finished_at=_now_str(), reason=detail)
+            return BackupResult(ok=False, verify=detail, reason='Verifikasi backup gagal')
+
+        os.replace(tmp_path, dest_path)
+        size = os.path.getsize(dest_path)
+        duration = time.monotonic() - started
+        _set_progress(state='done', pages_done=state['total'], finished_at=_now_str())
+        return BackupResult(
+            ok=True,
+            dest_path=dest_path,
+            size_bytes=size,
+            pages=state['total'],
+            duration_s=duration,
+            verify=detail,
+        )
+    except Exception as e:
+        _set_progress(state='failed', finished_at=_now_str(), reason=str(e))
+        try:
+            if dst is not None:
+                dst.close()
+                dst = None
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return BackupResult(ok=False, reason=str(e))
+    finally:
+        if dst is not None:
+            dst.close()
+        if src is not None:
+            src.close()
@@ -0,0 +1,375 @@
+"""
+Backup store dengan deduplikasi (content-addressed) untuk kasir.db.
+
+Setiap snapshot dipecah menjadi chunk berukuran kelipatan page SQLite.
+Chunk disimpan sekali berdasarkan hash SHA-256 (dikompresi zstd jika modul
+`zstandard` tersedia, selain itu gzip), sedangkan snapshot hanya berupa
+manifest kecil berisi daftar hash. Karena sebagian besar page tidak berubah
+antar backup, ruang disk jauh lebih hemat dibanding menyimpan salinan penuh.
+
+Struktur folder:
+    backups/store/chunks/ab/<hash>.zst|.gz
+    backups/store/manifests/snap_YYYYmmdd_HHMMSS.json.gz
+
+Retensi berbasis tingkatan waktu (hourly/daily/weekly), lihat `prune()`.
+`add_snapshot()` dan `prune()` memegang file lock `backups/store/.lock`, jadi
+backup otomatis, tombol backup, dan tool standalone yang berjalan di proses
+berbeda tidak saling menghapus chunk yang sedang ditulis.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+try:
+    from app.leader import file_lock
+except Exception:
+    from leader import file_lock
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+
+DEFAULT_CHUNK_SIZE = int(os.environ.get('BACKUP_CHUNK_SIZE', str(64 * 1024)) or 64 * 1024)
+
+# Retensi default: 10 snapshot terakhir, lalu 1 per jam selama 24 jam,
+# 1 per hari selama 30 hari, dan 1 per minggu selama 26 minggu.
+KEEP_LAST = int(os.environ.get('BACKUP_KEEP_LAST', '10') or 10)
+KEEP_HOURLY = int(os.environ.get('BACKUP_KEEP_HOURLY', '24') or 24)
+KEEP_DAILY = int(os.environ.get('BACKUP_KEEP_DAILY', '30') or 30)
+KEEP_WEEKLY = int(os.environ.get('BACKUP_KEEP_WEEKLY', '26') or 26)
+
+# Chunk tanpa manifest yang lebih muda dari ini tidak dihapus GC (mungkin milik
+# snapshot yang manifest-nya belum ditulis oleh proses lain)
+CHUNK_GC_GRACE_SECONDS = int(os.environ.get('BACKUP_CHUNK_GC_GRACE_SECONDS', '3600') or 3600)
+
+MANIFEST_PREFIX = 'snap_'
+MANIFEST_SUFFIX = '.json.gz'
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    id: str
+    created_at: datetime
+    size_bytes: int
+    chunk_count: int
+    new_chunks: int = 0
+    stored_bytes: int = 0
+
+
+def _sqlite_page_size(path: str) -> int:
+    """Baca page size dari header file SQLite (offset 16, big-endian)."""
+    try:
+        with open(path, 'rb') as fh:
+            header = fh.read(100)
+        if header[:16] != b'SQLite format 3\x00':
+            return 4096
+        value = int.from_bytes(header[16:18], 'big')
+        return 65536 if value == 1 else (value or 4096)
+    except Exception:
+        return 4096
+
+
+class BackupStore:
+    def __init__(self, root: str, chunk_size: int | None = None, codec: str | None = None):
+        self.root = root
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        self.chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if codec is None:
+            codec = 'zst' if zstandard is not None else 'gz'
+        if codec == 'zst' and zstandard is None:
+            codec = 'gz'
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(root, '.lock')
+
+    # -------------------- chunk I/O --------------------
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zst':
+            return zstandard.ZstdCompressor(level=6).compress(data)
+        return gzip.compress(data, compresslevel=6, mtime=0)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == 'zst':
+            if zstandard is None:
+                raise RuntimeError('Chunk zstd butuh modul zstandard (pip install zstandard)')
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _chunk_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], f'{digest}.{codec}')
+
+    def _find_chunk(self, digest: str) -> tuple[str, str] | None:
+        for codec in ('zst', 'gz'):
+            path = self._chunk_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def _write_chunk(self, digest: str, data: bytes) -> int:
+        """Simpan chunk jika belum ada. Return jumlah byte yang ditulis."""
+        found = self._find_chunk(digest)
+        if found:
+            # Dipakai lagi: perbarui mtime agar masuk masa tenggang GC
+            try:
+                os.utime(found[0])
+            except OSError:
+                pass
+            return 0
+        path = self._chunk_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = self._compress(data)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+        return len(payload)
+
+    def _read_chunk(self, digest: str) -> bytes:
+        found = self._find_chunk(digest)
+        if not found:
+            raise FileNotFoundError(f'Chunk hilang: {digest}')
+        path, codec = found
+        with open(path, 'rb') as fh:
+            data = self._decompress(fh.read(), codec)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f'Chunk rusak (hash tidak cocok): {digest}')
+        return data
+
+    # -------------------- manifests --------------------
+
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.manifests_dir, f'{snapshot_id}{MANIFEST_SUFFIX}')
+
+    def _load_manifest(self, snapshot_id: str) -> dict[str, Any]:
+        with gzip.open(self._manifest_path(snapshot_id), 'rt', encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def _save_manifest(self, manifest: dict[str, Any]) -> None:
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = self._manifest_path(manifest['id'])
+        tmp = path + '.tmp'
+        with gzip.open(tmp, 'wt', encoding='utf-8') as fh:
+            json.dump(manifest, fh, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def list_snapshots(self) -> list[SnapshotInfo]:
+        """Daftar snapshot, terbaru lebih dulu."""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        result = []
+        for name in os.listdir(self.manifests_dir):
+            if not (name.startswith(MANIFEST_PREFIX) and name.endswith(MANIFEST_SUFFIX)):
+                continue
+            snapshot_id = name[:-len(MANIFEST_SUFFIX)]
+            try:
+                m = self._load_manifest(snapshot_id)
+            except Exception as e:
+                print(f'[BackupStore] ⚠️ Manifest tidak terbaca {name}: {e}')
+                continue
+            result.append(SnapshotInfo(
+                id=snapshot_id,
+                created_at=datetime.strptime(m['created_at'], '%Y-%m-%d %H:%M:%S'),
+                size_bytes=int(m.get('size') or 0),
+                chunk_count=len(m.get('chunks') or []),
+            ))
+        result.sort(key=lambda s: s.created_at, reverse=True)
+        return result
+
+    # -------------------- snapshot / restore --------------------
+
+    def add_snapshot(self, db_file: str, created_at: datetime | None = None) -> SnapshotInfo:
+        """
+        Simpan file database (sebaiknya hasil online backup yang konsisten)
+        sebagai snapshot baru.
+        """
+        created_at = (created_at or datetime.now()).replace(microsecond=0)
+        page_size = _sqlite_page_size(db_file)
+        chunk_size = max(page_size, (self.chunk_size // page_size) * page_size)
+
+        with self._lock, file_lock(self._lock_path):
+            snapshot_id = f"{MANIFEST_PREFIX}{created_at.strftime('%Y%m%d_%H%M%S')}"
+            suffix = 1
+            while os.path.exists(self._manifest_path(snapshot_id)):
+                suffix += 1
+                snapshot_id = f"{MANIFEST_PREFIX}{created_at.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+
+            chunks: list[str] = []
+            new_chunks = 0
+            stored_bytes = 0
+            size = 0
+            whole = hashlib.sha256()
+            with open(db_file, 'rb') as fh:
+                while True:
+                    data = fh.read(chunk_size)
+                    if not data:
+                        break
+                    size += len(data)
+                    whole.update(data)
+                    digest = hashlib.sha256(data).hexdigest()
+                    written = self._write_chunk(digest, data)
+                    if written:
+                        new_chunks += 1
+                        stored_bytes += written
+                    chunks.append(digest)
+
+            self._save_manifest({
+                'id': snapshot_id,
+                'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'size': size,
+                'sha256': whole.hexdigest(),
+                'page_size': page_size,
+                'chunk_size': chunk_size,
+                'chunks': chunks,
+            })
+
+        return SnapshotInfo(
+            id=snapshot_id,
+            created_at=created_at,
+            size_bytes=size,
+            chunk_count=len(chunks),
+            new_chunks=new_chunks,
+            stored_bytes=stored_bytes,
+        )
+
+    def restore_snapshot(self, snapshot_id: str, dest_path: str) -> str:
+        """Bangun ulang file database dari manifest ke `dest_path`."""
+        manifest = self._load_manifest(snapshot_id)
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        tmp = dest_path + '.part'
+        whole = hashlib.sha256()
+        try:
+            with open(tmp, 'wb') as out:
+                for digest in manifest['chunks']:
+                    data = self._read_chunk(digest)
+                    whole.update(data)
+                    out.write(data)
+            if whole.hexdigest() != manifest.get('sha256'):
+                raise ValueError('Checksum hasil restore tidak cocok dengan manifest')
+
+            conn = sqlite3.connect(f'file:{tmp}?mode=ro', uri=True)
+            try:
+                check = conn.execute('PRAGMA quick_check').fetchone()
+            finally:
+                conn.close()
+            if not check or check[0] != 'ok':
+                raise ValueError(f'quick_check gagal: {check[0] if check else "-"}')
+
+            os.replace(tmp, dest_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return dest_path
+
+    # -------------------- retention --------------------
+
+    @staticmethod
+    def select_keep(
+        snapshots: list[SnapshotInfo],
+        keep_last: int = KEEP_LAST,
+        hourly: int = KEEP_HOURLY,
+        daily: int = KEEP_DAILY,
+        weekly: int = KEEP_WEEKLY,
+    ) -> set[str]:
+        """Pilih snapshot yang dipertahankan (terbaru per jam/hari/minggu)."""
+        ordered = sorted(snapshots, key=lambda s: s.created_at, reverse=True)
+        keep = {s.id for s in ordered[:keep_last]}
+
+        tiers = [
+            (hourly, lambda d: d.strftime('%Y%m%d%H')),
+            (daily, lambda d: d.strftime('%Y%m%d')),
+            (weekly, lambda d: '%04d-W%02d' % d.isocalendar()[:2]),
+        ]
+        for limit, bucket_of in tiers:
+            seen: set[str] = set()
+            for s in ordered:
+                if len(seen) >= limit:
+                    break
+                bucket = bucket_of(s.created_at)
+                if bucket in seen:
+                    continue
+                seen.add(bucket)
+                keep.add(s.id)
+        return keep
+
+    def prune(self, **tier_kwargs: int) -> dict[str, int]:
+        """Hapus snapshot di luar retensi lalu hapus chunk yang tidak terpakai."""
+        with self._lock, file_lock(self._lock_path):
+            snapshots = self.list_snapshots()
+            keep = self.select_keep(snapshots, **tier_kwargs)
+            removed = 0
+            for s in snapshots:
+                if s.id not in keep:
+                    try:
+                        os.remove(self._manifest_path(s.id))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+
+            chunks_removed = self._gc_chunks()
+        return {'snapshots_removed': removed, 'chunks_removed': chunks_removed, 'snapshots_kept': len(keep)}
+
+    def _gc_chunks(self, grace_seconds: int | None = None) -> int:
+        """
+        Hapus chunk yang tidak dirujuk manifest mana pun (dipanggil di bawah lock).
+
+        File `.tmp` (sedang ditulis) dan chunk yang lebih muda dari
+        `grace_seconds` dilewati.
+        """
+        if grace_seconds is None:
+            grace_seconds = CHUNK_GC_GRACE_SECONDS
+        cutoff = time.time() - grace_seconds
+        referenced: set[str] = set()
+        if os.path.isdir(self.manifests_dir):
+            for name in os.listdir(self.manifests_dir):
+                if name.startswith(MANIFEST_PREFIX) and name.endswith(MANIFEST_SUFFIX):
+                    try:
+                        referenced.update(self._load_manifest(name[:-len(MANIFEST_SUFFIX)])['chunks'])
+                    except Exception:
+                        # Manifest rusak: jangan hapus chunk apa pun
+                        return 0
+
+        removed = 0
+        if not os.path.isdir(self.chunks_dir):
+            return 0
+        for sub in os.listdir(self.chunks_dir):
+            sub_dir = os.path.join(self.chunks_dir, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for name in os.listdir(sub_dir):
+                if name.endswith('.tmp'):
+                    continue
+                digest = name.split('.', 1)[0]
+                if digest in referenced:
+                    continue
+                path = os.path.join(sub_dir, name)
+                try:
+                    if os.path.getmtime(path) > cutoff:
+                        continue
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def disk_usage(self) -> int:
+        total = 0
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
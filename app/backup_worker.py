@@ -0,0 +1,242 @@
+"""
+Background backup worker untuk Kasir Toko Sembako.
+
+Checkout tidak lagi menjalankan backup secara sinkron. Setiap transaksi
+cukup memanggil `mark_dirty()`; worker thread akan menggabungkan (coalesce)
+sinyal yang datang beruntun dan menjalankan paling banyak satu backup per
+interval (`BACKUP_MIN_INTERVAL_SECONDS`).
+
+Dengan beberapa worker WSGI hanya leader yang aktif; worker lain dinonaktifkan
+dan perubahan dari proses mereka dideteksi leader lewat `DatabaseChangeWatcher`.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+
+DEFAULT_MIN_INTERVAL_SECONDS = 300
+
+
+def _env_interval() -> float:
+    try:
+        return max(0.0, float(os.environ.get('BACKUP_MIN_INTERVAL_SECONDS', DEFAULT_MIN_INTERVAL_SECONDS)))
+    except (TypeError, ValueError):
+        return float(DEFAULT_MIN_INTERVAL_SECONDS)
+
+
+def _fmt_ts(ts: float | None) -> str | None:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class BackupWorker:
+    def __init__(self, backup_func: Callable[[], bool], min_interval_s: float | None = None):
+        """
+        Args:
+            backup_func: Fungsi backup yang mengembalikan True jika berhasil
+            min_interval_s: Jarak minimum antar backup (detik)
+        """
+        self.backup_func = backup_func
+        self.min_interval_s = _env_interval() if min_interval_s is None else max(0.0, float(min_interval_s))
+
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._active = True
+
+        self._dirty = False
+        self._force = False
+        self._dirty_since: float | None = None
+        self._signals = 0
+        self._running = False
+
+        self._last_started: float | None = None
+        self._last_finished: float | None = None
+        self._last_success: float | None = None
+        self._last_ok: bool | None = None
+        self._last_error: str | None = None
+        self._total_runs = 0
+        self._total_failures = 0
+
+    def start(self) -> None:
+        """Start worker thread (idempotent)."""
+        with self._cond:
+            if not self._active or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='backup-worker', daemon=True)
+            self._thread.start()
+        print(f'[Backup] Worker started (interval minimal {self.min_interval_s:g} detik)')
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def activate(self) -> None:
+        with self._cond:
+            self._active = True
+            pending = self._dirty
+        if pending:
+            self.start()
+
+    def deactivate(self) -> None:
+        """Nonaktifkan worker di proses follower (sinyal diabaikan)."""
+        with self._cond:
+            self._active = False
+        self.stop()
+
+    def mark_dirty(self) -> None:
+        """Tandai database berubah; backup akan dijadwalkan oleh worker."""
+        with self._cond:
+            if not self._active:
+                return
+            self._signals += 1
+            if not self._dirty:
+                self._dirty = True
+                self._dirty_since = time.time()
+            self._cond.notify_all()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def request_now(self) -> None:
+        """Minta backup secepatnya (abaikan interval minimum)."""
+        with self._cond:
+            if not self._active:
+                return
+            self._signals += 1
+            self._dirty = True
+            self._force = True
+            self._dirty_since = self._dirty_since or time.time()
+            self._cond.notify_all()
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def _next_allowed_at(self) -> float:
+        if self._force or self._last_started is None:
+            return 0.0
+        return self._last_started + self.min_interval_s
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._dirty:
+                        wait_s = self._next_allowed_at() - time.time()
+                        if wait_s <= 0:
+                            break
+                        self._cond.wait(wait_s)
+                    else:
+                        self._cond.wait()
+                if self._stopping:
+                    return
+
+                # Ambil semua sinyal yang terkumpul sebagai satu backup
+                self._dirty = False
+                self._force = False
+                self._dirty_since = None
+                self._running = True
+                self._last_started = time.time()
+
+            ok = False
+            error = None
+            try:
+                ok = bool(self.backup_func())
+            except Exception as e:
+                error = str(e)
+                print(f'[Backup] ✗ Worker error: {e}')
+
+            with self._cond:
+                self._running = False
+                self._last_finished = time.time()
+                self._last_ok = ok
+                self._last_error = error if not ok else None
+                self._total_runs += 1
+                if ok:
+                    self._last_success = self._last_finished
+                else:
+                    self._total_failures += 1
+                    if self._last_error is None:
+                        self._last_error = 'backup_func returned False'
+
+    def status(self) -> dict[str, Any]:
+        with self._cond:
+            alive = self._thread is not None and self._thread.is_alive()
+            next_at = self._next_allowed_at() if self._dirty else None
+            return {
+                'active': self._active,
+                'worker_alive': alive,
+                'min_interval_seconds': self.min_interval_s,
+                'dirty': self._dirty,
+                'dirty_since': _fmt_ts(self._dirty_since),
+                'running': self._running,
+                'signals_received': self._signals,
+                'next_backup_at': _fmt_ts(max(next_at, time.time())) if next_at is not None else None,
+                'last_started': _fmt_ts(self._last_started),
+                'last_finished': _fmt_ts(self._last_finished),
+                'last_success': _fmt_ts(self._last_success),
+                'last_ok': self._last_ok,
+                'last_error': self._last_error,
+                'total_runs': self._total_runs,
+                'total_failures': self._total_failures,
+            }
+
+
+class DatabaseChangeWatcher:
+    """
+    Deteksi commit dari koneksi/proses lain lewat `PRAGMA data_version`.
+
+    Koneksi watcher tidak pernah menulis, jadi setiap perubahan nilai berarti
+    ada commit baru (checkpoint WAL tidak dihitung sebagai perubahan).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._version: int | None = None
+        self._lock = threading.Lock()
+
+    def changed(self) -> bool:
+        with self._lock:
+            if not os.path.exists(self.db_path):
+                return False
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+                return False
+            version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            if version != self._version:
+                self._version = version
+                return True
+            return False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global worker instance
+backup_worker = None
+
+
+def initialize_backup_worker(backup_func: Callable[[], bool], min_interval_s: float | None = None) -> BackupWorker:
+    """Initialize global backup worker instance"""
+    global backup_worker
+    if backup_worker is None:
+        backup_worker = BackupWorker(backup_func, min_interval_s=min_interval_s)
+    return backup_worker
+
+
+def get_backup_worker() -> BackupWorker | None:
+    """Get global backup worker instance"""
+    return backup_worker
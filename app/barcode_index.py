@@ -0,0 +1,174 @@
+"""
+Lookup barcode persis untuk scanner kasir.
+
+Sebagian besar input di kotak cari kasir adalah hasil scan: `Produk.kode`
+atau `VarianProduk.barcode_varian` persis. Daripada menjalankan pencarian
+teks lalu mencocokkan di browser, setiap proses menyimpan di memori:
+
+- `barcode (lowercase) -> (produk_id, varian_id)`
+- data statis produk (nama, harga, harga bertingkat, daftar varian)
+
+    index = get_barcode_index()
+    hasil = index.lookup(db.session, '8991002101234')
+    # {'produk': {... seperti Produk.to_dict()}, 'varian': {...} | None, 'cocok': 'barcode_varian'}
+
+Keduanya dibangun ulang jika nomor versi di tabel `cache_version` (baris
+'barcode') berubah. Versi itu dinaikkan oleh trigger SQLite saat produk,
+varian, atau harga bertingkat ditambah/dihapus/diubah (kolom yang ikut
+dikirim), sehingga perubahan dari worker gunicorn lain, tools/, atau import
+langsung ke database ikut terlihat. Stok berubah di setiap checkout, jadi
+tidak dicache: per scan hanya ada dua query kecil (versi + stok).
+
+Jika trigger/versi belum dipasang (`ensure_triggers()` dipanggil
+`init_database`), data dibaca langsung dari database per scan.
+"""
+
+import threading
+from typing import Any
+
+from sqlalchemy import text
+
+
+VERSION_NAME = 'barcode'
+
+_BUMP = f"UPDATE cache_version SET versi = versi + 1 WHERE nama = '{VERSION_NAME}'"
+
+_TRIGGERS = [
+    ('barcode_versi_produk_ai', 'AFTER INSERT ON produk'),
+    ('barcode_versi_produk_au', 'AFTER UPDATE OF id, kode, nama, harga_jual, satuan ON produk'),
+    ('barcode_versi_produk_ad', 'AFTER DELETE ON produk'),
+    ('barcode_versi_varian_ai', 'AFTER INSERT ON varian_produk'),
+    ('barcode_versi_varian_au', 'AFTER UPDATE OF id, produk_id, barcode_varian, nama_varian ON varian_produk'),
+    ('barcode_versi_varian_ad', 'AFTER DELETE ON varian_produk'),
+    ('barcode_versi_harga_ai', 'AFTER INSERT ON harga_variasi'),
+    ('barcode_versi_harga_au', 'AFTER UPDATE ON harga_variasi'),
+    ('barcode_versi_harga_ad', 'AFTER DELETE ON harga_variasi'),
+]
+
+_SQL_VERSION = f"SELECT versi FROM cache_version WHERE nama = '{VERSION_NAME}'"
+_SQL_STOK = "SELECT NULL, stok FROM produk WHERE id = ? UNION ALL SELECT id, stok FROM varian_produk WHERE produk_id = ?"
+_SQL_KODE = "SELECT id FROM produk WHERE lower(kode) = ?"
+_SQL_BARCODE = "SELECT produk_id, id FROM varian_produk WHERE lower(barcode_varian) = ?"
+_SQL_PRODUK = "SELECT id, kode, nama, harga_jual, satuan FROM produk"
+_SQL_VARIAN = "SELECT id, produk_id, nama_varian, barcode_varian FROM varian_produk"
+_SQL_HARGA = "SELECT produk_id, min_qty, harga FROM harga_variasi"
+
+
+def ensure_triggers(session: Any) -> bool:
+    """Pasang baris versi & trigger (commit sendiri). False jika bukan SQLite / gagal."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    try:
+        session.execute(
+            text("INSERT OR IGNORE INTO cache_version (nama, versi) VALUES (:nama, 0)"), {'nama': VERSION_NAME}
+        )
+        for name, event in _TRIGGERS:
+            session.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {_BUMP}; END"))
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"[Barcode] Warning: gagal memasang trigger versi barcode: {e}")
+        return False
+
+
+def _normalize(code: str) -> str:
+    return (code or '').strip().lower()
+
+
+def _sql(session: Any, sql: str, params: tuple = ()):
+    # Langsung ke driver: query kecil ini dijalankan di setiap scan
+    return session.connection().exec_driver_sql(sql, params)
+
+
+def _build(session: Any, produk_id: int | None = None) -> tuple[dict, dict]:
+    """(barcode -> (produk_id, varian_id), produk_id -> data statis produk)."""
+    where, params = (' WHERE id = ?', (produk_id,)) if produk_id is not None else ('', ())
+    where_fk = ' WHERE produk_id = ?' if produk_id is not None else ''
+
+    produk = {}
+    for pid, kode, nama, harga_jual, satuan in _sql(session, _SQL_PRODUK + where, params):
+        produk[pid] = {'id': pid, 'kode': kode, 'nama': nama, 'harga_jual': harga_jual,
+                       'harga_variasi': [], 'varian_produk': [], 'satuan': satuan}
+    for pid, min_qty, harga in _sql(session, _SQL_HARGA + where_fk + ' ORDER BY min_qty', params):
+        if pid in produk:
+            produk[pid]['harga_variasi'].append({'min_qty': min_qty, 'harga': harga})
+
+    mapping: dict[str, tuple[int, int | None]] = {}
+    for varian_id, pid, nama_varian, barcode in _sql(session, _SQL_VARIAN + where_fk + ' ORDER BY created_at, id', params):
+        if pid in produk:
+            produk[pid]['varian_produk'].append({'id': varian_id, 'nama_varian': nama_varian, 'barcode_varian': barcode})
+            if barcode:
+                mapping[_normalize(barcode)] = (pid, varian_id)
+    # Kode produk menang jika sama dengan barcode varian (seperti pencarian lama di kasir)
+    for pid, data in produk.items():
+        if data['kode']:
+            mapping[_normalize(data['kode'])] = (pid, None)
+    return mapping, produk
+
+
+class BarcodeIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._map: dict[str, tuple[int, int | None]] = {}
+        self._produk: dict[int, dict] = {}
+        self._version: int | None = None
+        self.rebuilds = 0
+
+    @staticmethod
+    def current_version(session: Any) -> int | None:
+        return _sql(session, _SQL_VERSION).scalar()
+
+    def _resolve(self, session: Any, key: str) -> tuple[tuple[int, int | None] | None, dict | None]:
+        version = self.current_version(session)
+        if version is None:
+            # Tanpa versi: lookup persis lewat database, tanpa cache
+            produk_id = _sql(session, _SQL_KODE, (key,)).scalar()
+            hit = (produk_id, None) if produk_id is not None else _sql(session, _SQL_BARCODE, (key,)).first()
+            if hit is None:
+                return None, None
+            return tuple(hit), _build(session, hit[0])[1].get(hit[0])
+
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._map, self._produk = _build(session)
+                    self._version = version
+                    self.rebuilds += 1
+        hit = self._map.get(key)
+        return hit, self._produk.get(hit[0]) if hit else None
+
+    def resolve(self, session: Any, code: str) -> tuple[int, int | None] | None:
+        """(produk_id, varian_id) untuk kode/barcode persis (tanpa beda huruf besar/kecil)."""
+        key = _normalize(code)
+        return self._resolve(session, key)[0] if key else None
+
+    def lookup(self, session: Any, code: str) -> dict | None:
+        """
+        Produk (bentuk sama dengan `Produk.to_dict()`), varian yang discan, dan
+        jenis kecocokan ('kode' / 'barcode_varian'); None jika tidak ditemukan.
+        """
+        key = _normalize(code)
+        if not key:
+            return None
+        hit, data = self._resolve(session, key)
+        if data is None:
+            return None
+        produk_id, varian_id = hit
+
+        stok = dict(_sql(session, _SQL_STOK, (produk_id, produk_id)).all())
+        varian_produk = [{**v, 'stok': stok.get(v['id'], 0)} for v in data['varian_produk']]
+        return {
+            'produk': {**data, 'varian_produk': varian_produk, 'stok': stok.get(None, 0)},
+            'varian': next((v for v in varian_produk if v['id'] == varian_id), None),
+            'cocok': 'kode' if varian_id is None else 'barcode_varian',
+        }
+
+
+# Global barcode index instance (per proses)
+barcode_index = BarcodeIndex()
+
+
+def get_barcode_index() -> BarcodeIndex:
+    """Get global barcode index instance"""
+    return barcode_index
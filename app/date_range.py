@@ -0,0 +1,56 @@
+"""
+Filter rentang tanggal yang bisa memakai index.
+
+`func.date(Transaksi.tanggal) >= :d` membungkus kolom dengan fungsi sehingga
+SQLite tidak bisa memakai `idx_transaksi_tanggal` (full table scan). Helper
+di sini mengubah tanggal 'YYYY-MM-DD' menjadi batas datetime setengah terbuka
+`[awal, akhir)` dan membandingkan kolom mentah:
+
+    Transaksi.query.filter(*filter_tanggal(Transaksi.tanggal, '2026-01-01', '2026-01-31'))
+    # tanggal >= '2026-01-01 00:00:00' AND tanggal < '2026-02-01 00:00:00'
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+
+def as_date(value: date | datetime | str) -> date:
+    """date / datetime / string 'YYYY-MM-DD' -> date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def rentang_tanggal(
+    mulai: date | datetime | str,
+    selesai: date | datetime | str | None = None,
+) -> tuple[datetime, datetime]:
+    """
+    Batas datetime setengah terbuka untuk hari `mulai` s/d `selesai` (inklusif).
+
+    Returns:
+        (awal, akhir): awal = mulai 00:00, akhir = (selesai + 1 hari) 00:00
+    """
+    awal = datetime.combine(as_date(mulai), time.min)
+    akhir = datetime.combine(as_date(selesai if selesai is not None else mulai), time.min) + timedelta(days=1)
+    return awal, akhir
+
+
+def filter_tanggal(
+    column: Any,
+    mulai: date | datetime | str | None = None,
+    selesai: date | datetime | str | None = None,
+) -> list:
+    """
+    Kondisi SQLAlchemy `column >= awal AND column < akhir`.
+
+    `mulai` atau `selesai` boleh None (batas terbuka di sisi itu).
+    """
+    kondisi = []
+    if mulai:
+        kondisi.append(column >= datetime.combine(as_date(mulai), time.min))
+    if selesai:
+        kondisi.append(column < datetime.combine(as_date(selesai), time.min) + timedelta(days=1))
+    return kondisi
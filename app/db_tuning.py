@@ -0,0 +1,109 @@
+"""
+Tuning koneksi SQLite untuk Kasir Toko Sembako.
+
+Setiap koneksi baru dari SQLAlchemy menjalankan PRAGMA berikut (semua bisa
+diatur lewat env):
+
+    SQLITE_JOURNAL_MODE   WAL       reader tidak memblokir writer (dan sebaliknya)
+    SQLITE_BUSY_TIMEOUT   5000      ms menunggu lock sebelum "database is locked"
+    SQLITE_SYNCHRONOUS    NORMAL    aman di WAL, fsync hanya saat checkpoint
+    SQLITE_MMAP_SIZE      67108864  byte file yang di-mmap (0 = mati)
+    SQLITE_CACHE_SIZE     -16000    halaman (negatif = KiB)
+    SQLITE_TEMP_STORE     MEMORY    tabel sementara / sort di memory
+
+Di mode WAL, file `-wal` bisa terus membesar jika selalu ada reader. Scheduler
+memanggil `checkpoint()` (`PRAGMA wal_checkpoint(TRUNCATE)`) secara berkala
+(`SQLITE_CHECKPOINT_MINUTES`, default 15).
+"""
+
+import os
+from typing import Any
+
+from sqlalchemy import event
+
+
+_SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+_TEMP_STORE = ('DEFAULT', 'FILE', 'MEMORY')
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = (os.environ.get(name) or default).strip().upper()
+    return value if value in choices else default
+
+
+def get_sqlite_settings() -> dict[str, Any]:
+    """Baca pengaturan PRAGMA dari environment."""
+    return {
+        'journal_mode': _env_choice('SQLITE_JOURNAL_MODE', 'WAL', _JOURNAL_MODES),
+        'busy_timeout': max(0, _env_int('SQLITE_BUSY_TIMEOUT', 5000)),
+        'synchronous': _env_choice('SQLITE_SYNCHRONOUS', 'NORMAL', _SYNCHRONOUS),
+        'mmap_size': max(0, _env_int('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+        'cache_size': _env_int('SQLITE_CACHE_SIZE', -16000),
+        'temp_store': _env_choice('SQLITE_TEMP_STORE', 'MEMORY', _TEMP_STORE),
+    }
+
+
+def get_checkpoint_minutes() -> int:
+    return max(0, _env_int('SQLITE_CHECKPOINT_MINUTES', 15))
+
+
+def apply_pragmas(dbapi_conn: Any, settings: dict[str, Any]) -> None:
+    """Jalankan PRAGMA pada satu koneksi sqlite3."""
+    cursor = dbapi_conn.cursor()
+    try:
+        # busy_timeout dulu supaya ganti journal_mode ikut menunggu lock
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+        cursor.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        cursor.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        cursor.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_tuning(engine: Any, settings: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    """
+    Pasang event `connect` pada engine SQLite.
+
+    Returns:
+        Pengaturan yang dipakai, atau None jika engine bukan SQLite
+    """
+    if engine.dialect.name != 'sqlite':
+        return None
+    settings = settings or get_sqlite_settings()
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_conn, connection_record):
+        apply_pragmas(dbapi_conn, settings)
+
+    # Koneksi yang sudah ada di pool dibuat ulang supaya ikut di-tuning
+    engine.dispose()
+    print('[DB] SQLite tuning: ' + ', '.join(f'{k}={v}' for k, v in settings.items()))
+    return settings
+
+
+def checkpoint(engine: Any, mode: str = 'TRUNCATE') -> dict[str, int] | None:
+    """
+    Jalankan `PRAGMA wal_checkpoint(mode)`.
+
+    Returns:
+        {'busy', 'log_frames', 'checkpointed_frames'} atau None jika bukan SQLite/WAL
+    """
+    mode = mode.upper()
+    if engine.dialect.name != 'sqlite' or mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        return None
+    with engine.connect() as conn:
+        journal = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+        if str(journal).lower() != 'wal':
+            return None
+        busy, log_frames, done = conn.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one()
+    return {'busy': int(busy), 'log_frames': int(log_frames), 'checkpointed_frames': int(done)}
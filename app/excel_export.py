@@ -0,0 +1,128 @@
+"""
+Pipeline export Excel streaming.
+
+Workbook dibuat dengan `Workbook(write_only=True)`: setiap baris langsung
+ditulis ke file sementara openpyxl dan tidak disimpan sebagai objek Cell di
+memori. Style dipakai bersama lewat named style (sekali per workbook, bukan
+objek Font/Border/Fill per sel). Data diambil dari database per chunk
+(`yield_per`), lalu file xlsx ditulis ke `SpooledTemporaryFile` (di memori
+sampai EXCEL_SPOOL_MAX_BYTES, sesudah itu ke disk) dan dikirim ke client
+sebagai stream.
+
+    wb = new_workbook()
+    ws = wb.create_sheet('Data')
+    ws.append(styled_row(ws, ['No', 'Nama'], 'kasir_header'))
+    for p in iter_query(Produk.query.order_by(Produk.id)):
+        ws.append([p.id, p.nama])
+    return send_workbook(wb, 'produk.xlsx')
+
+openpyxl di-import saat fungsi dipanggil, bukan saat modul di-import.
+"""
+
+import os
+import tempfile
+from typing import Any, Iterable, Iterator
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CURRENCY_FORMAT = '#,##0.00'
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def get_spool_max_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get('EXCEL_SPOOL_MAX_BYTES', 8 * 1024 * 1024)))
+    except (TypeError, ValueError):
+        return 8 * 1024 * 1024
+
+
+def _named_styles() -> list:
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def fill(color):
+        return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+    def style(name, **kwargs):
+        s = NamedStyle(name=name)
+        for key, value in kwargs.items():
+            setattr(s, key, value)
+        return s
+
+    center = Alignment(horizontal='center', vertical='center')
+    return [
+        style('kasir_title', font=Font(bold=True, size=14)),
+        style('kasir_bold', font=Font(bold=True)),
+        style('kasir_header', font=Font(bold=True, color='FFFFFF'), fill=fill('4472C4'), border=border, alignment=center),
+        style('kasir_header_plain', font=Font(bold=True), alignment=Alignment(horizontal='center')),
+        style('kasir_cell', border=border),
+        style('kasir_currency', border=border, number_format=CURRENCY_FORMAT),
+        style('kasir_date_bar', font=Font(bold=True, color='FFFFFF'), fill=fill('595959')),
+        style('kasir_section', font=Font(bold=True, size=12, color='FFFFFF'), fill=fill('0070C0')),
+        style('kasir_subtotal', font=Font(bold=True), fill=fill('D9E1F2'), border=border, number_format=CURRENCY_FORMAT),
+        style('kasir_subtotal_green', font=Font(bold=True), fill=fill('E2EFDA'), border=border, number_format=CURRENCY_FORMAT),
+        style('kasir_grand_label', font=Font(bold=True, size=12)),
+        style('kasir_grand', font=Font(bold=True, color='FFFFFF', size=12), fill=fill('00B050'), border=border,
+              number_format=CURRENCY_FORMAT),
+    ]
+
+
+def new_workbook():
+    """Workbook write-only dengan named style `kasir_*` sudah terdaftar."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for named_style in _named_styles():
+        wb.add_named_style(named_style)
+    return wb
+
+
+def set_column_widths(ws: Any, widths: dict[str, float]) -> None:
+    """Harus dipanggil sebelum baris pertama ditulis (batasan write-only)."""
+    for col, width in widths.items():
+        ws.column_dimensions[col].width = width
+
+
+def styled(ws: Any, value: Any, style: str | None = None):
+    """Satu sel write-only dengan named style (None = tanpa style)."""
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value=value)
+    if style:
+        cell.style = style
+    return cell
+
+
+def styled_row(ws: Any, values: Iterable[Any], styles: str | Iterable[str | None] | None) -> list:
+    """Baris sel; `styles` satu nama untuk semua sel atau daftar per kolom."""
+    values = list(values)
+    if styles is None or isinstance(styles, str):
+        styles = [styles] * len(values)
+    return [styled(ws, value, style) for value, style in zip(values, styles)]
+
+
+def merge_row(ws: Any, row: int, first_col: str, last_col: str) -> None:
+    """Merge sel pada baris `row` (write-only: dicatat, ditulis saat save)."""
+    ws.merged_cells.add(f'{first_col}{row}:{last_col}{row}')
+
+
+def iter_query(query: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Iterasi hasil query per chunk (`yield_per`) tanpa memuat semuanya."""
+    return iter(query.yield_per(chunk_size))
+
+
+def save_spooled(wb: Any):
+    """Simpan workbook ke SpooledTemporaryFile (posisi di awal file)."""
+    fh = tempfile.SpooledTemporaryFile(max_size=get_spool_max_bytes(), suffix='.xlsx')
+    wb.save(fh)
+    fh.seek(0)
+    return fh
+
+
+def send_workbook(wb: Any, filename: str):
+    """Flask response yang men-stream workbook sebagai attachment xlsx."""
+    from flask import send_file
+
+    return send_file(save_spooled(wb), mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=filename)
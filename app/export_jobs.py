@@ -0,0 +1,349 @@
+"""
+Antrian job export di background.
+
+`/laporan/export-excel` dan tombol Telegram `lap_excel_*` tidak membuat
+workbook di dalam request. Job dicatat di tabel `export_job` (status,
+progress, file hasil) lalu dikerjakan thread pool (EXPORT_JOB_WORKERS,
+default 2), sehingga thread server langsung bebas lagi:
+
+    queue = get_export_queue()
+    job = queue.enqueue('laporan_excel', {'tanggal_mulai': ..., 'mode': 'hari'}, 'laporan.xlsx')
+    queue.status(job['id'])   # {'status': 'running', 'progress': 40, ...}
+
+Runner per jenis job didaftarkan dengan `register(kind, runner)`. Runner
+menerima `(params, progress)` dan mengembalikan path file hasil; file itu
+di-hardlink (atau dicopy) ke `instance/exports/export_<id>.xlsx` supaya tidak
+ikut terhapus saat report cache di-invalidasi.
+
+Job queued/running milik proses yang sudah mati (restart/crash) diambil alih
+oleh `recover()` saat startup. Job & file yang selesai lebih dari
+EXPORT_JOB_RETENTION_HOURS (default 24) dihapus saat ada job baru.
+"""
+
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable
+
+from sqlalchemy import update
+
+try:
+    from app.models import db, get_local_now, ExportJob
+except Exception:
+    from models import db, get_local_now, ExportJob
+
+
+DEFAULT_WORKERS = 2
+DEFAULT_RETENTION_HOURS = 24
+# Tanpa cara cek PID (Windows / host lain): job dianggap yatim jika tidak ada update selama ini
+STALE_SECONDS = 30 * 60
+
+ACTIVE_STATUSES = ('queued', 'running')
+HOSTNAME = socket.gethostname()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _fmt_dt(value) -> str | None:
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
+
+def _owner_alive(owner: str | None, updated_at) -> bool:
+    """Apakah proses pemegang job (host:pid) kemungkinan masih hidup."""
+    host, _, pid = (owner or '').rpartition(':')
+    if not pid.isdigit():
+        return False
+    if host == HOSTNAME and os.name == 'posix':
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    if updated_at is None:
+        return False
+    return (get_local_now() - updated_at).total_seconds() < STALE_SECONDS
+
+
+class ExportJobQueue:
+    def __init__(
+        self,
+        app: Any,
+        output_dir: str,
+        max_workers: int | None = None,
+        retention_hours: int | None = None,
+    ):
+        """
+        Args:
+            app: Flask app (worker thread berjalan di app context-nya)
+            output_dir: Folder file hasil export
+            max_workers: Jumlah thread worker
+            retention_hours: Umur job selesai sebelum dihapus
+        """
+        self.app = app
+        self.output_dir = output_dir
+        self.max_workers = max_workers or _env_int('EXPORT_JOB_WORKERS', DEFAULT_WORKERS)
+        self.retention_hours = retention_hours or _env_int('EXPORT_JOB_RETENTION_HOURS', DEFAULT_RETENTION_HOURS)
+
+        self._runners: dict[str, Callable[[dict, Callable[..., None]], str]] = {}
+        self._finish_callbacks: list[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+
+    @property
+    def owner(self) -> str:
+        # Dihitung ulang: proses hasil fork (gunicorn preload) punya PID sendiri
+        return f'{HOSTNAME}:{os.getpid()}'
+
+    def register(self, kind: str, runner: Callable[[dict, Callable[..., None]], str]) -> None:
+        """Daftarkan runner: `runner(params, progress) -> path file hasil`."""
+        self._runners[kind] = runner
+
+    def on_finish(self, callback: Callable[[dict], None]) -> None:
+        """Callback `callback(job)` setelah job selesai atau gagal (di worker thread)."""
+        self._finish_callbacks.append(callback)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export-job')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    # -------------------- API --------------------
+
+    def enqueue(
+        self,
+        kind: str,
+        params: dict,
+        download_name: str,
+        user_id: int | None = None,
+        telegram_chat_id: int | str | None = None,
+    ) -> dict:
+        """
+        Catat job baru lalu jadwalkan ke worker (harus di dalam app context).
+
+        Job identik (jenis, parameter & tujuan Telegram sama) yang masih
+        queued/running dipakai ulang, bukan dibuat dua kali.
+        """
+        if kind not in self._runners:
+            raise ValueError(f'Jenis export tidak dikenal: {kind}')
+        self.cleanup()
+
+        params_json = json.dumps(params, sort_keys=True)
+        chat_id = str(telegram_chat_id) if telegram_chat_id is not None else None
+        existing = ExportJob.query.filter(
+            ExportJob.kind == kind,
+            ExportJob.params == params_json,
+            ExportJob.status.in_(ACTIVE_STATUSES),
+            ExportJob.telegram_chat_id.is_(None) if chat_id is None else ExportJob.telegram_chat_id == chat_id,
+        ).first()
+        if existing is not None and _owner_alive(existing.owner, existing.updated_at):
+            return self.to_dict(existing)
+
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=params_json,
+            status='queued',
+            progress=0,
+            message='Menunggu antrian',
+            download_name=download_name,
+            owner=self.owner,
+            user_id=user_id,
+            telegram_chat_id=chat_id,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._pool().submit(self._run, job.id)
+        print(f'[Export] Job {job.id} ({kind}) masuk antrian')
+        return self.to_dict(job)
+
+    def get(self, job_id: str) -> ExportJob | None:
+        return db.session.get(ExportJob, job_id, populate_existing=True)
+
+    def status(self, job_id: str) -> dict | None:
+        job = self.get(job_id)
+        return self.to_dict(job) if job else None
+
+    def file_path(self, job: ExportJob | dict) -> str | None:
+        """Path file hasil job yang sudah selesai (None jika belum/tidak ada)."""
+        filename = job['filename'] if isinstance(job, dict) else job.filename
+        if not filename:
+            return None
+        path = os.path.join(self.output_dir, filename)
+        return path if os.path.exists(path) else None
+
+    def wait(self, job_id: str, timeout: float = 60.0, interval: float = 0.1) -> dict | None:
+        """Tunggu sampai job selesai/gagal (untuk tools & test)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job is None or job['status'] not in ACTIVE_STATUSES or time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    @staticmethod
+    def to_dict(job: ExportJob) -> dict:
+        return {
+            'id': job.id,
+            'kind': job.kind,
+            'params': json.loads(job.params or '{}'),
+            'status': job.status,
+            'progress': job.progress or 0,
+            'message': job.message,
+            'error': job.error,
+            'filename': job.filename if job.status == 'done' else None,
+            'download_name': job.download_name,
+            'user_id': job.user_id,
+            'telegram_chat_id': job.telegram_chat_id,
+            'created_at': _fmt_dt(job.created_at),
+            'started_at': _fmt_dt(job.started_at),
+            'finished_at': _fmt_dt(job.finished_at),
+        }
+
+    # -------------------- worker --------------------
+
+    def _set(self, job_id: str, **values: Any) -> int:
+        """Update baris job lewat koneksi sendiri (tidak mengganggu session runner)."""
+        values.setdefault('updated_at', get_local_now())
+        with db.engine.begin() as conn:
+            return conn.execute(update(ExportJob).where(ExportJob.id == job_id).values(**values)).rowcount
+
+    def _run(self, job_id: str) -> None:
+        with self.app.app_context():
+            job = None
+            try:
+                with db.engine.begin() as conn:
+                    claimed = conn.execute(
+                        update(ExportJob)
+                        .where(ExportJob.id == job_id, ExportJob.status == 'queued', ExportJob.owner == self.owner)
+                        .values(status='running', progress=1, message='Memproses', started_at=get_local_now(),
+                                updated_at=get_local_now())
+                    ).rowcount
+                if not claimed:
+                    return
+
+                job = self.get(job_id)
+                runner = self._runners.get(job.kind)
+                if runner is None:
+                    raise ValueError(f'Jenis export tidak dikenal: {job.kind}')
+
+                def progress(percent: float, message: str | None = None) -> None:
+                    values = {'progress': max(1, min(99, int(percent)))}
+                    if message:
+                        values['message'] = message
+                    self._set(job_id, **values)
+
+                source = runner(json.loads(job.params or '{}'), progress)
+
+                ext = os.path.splitext(source)[1] or '.xlsx'
+                filename = f'export_{job_id}{ext}'
+                self._publish(source, os.path.join(self.output_dir, filename))
+                self._set(job_id, status='done', progress=100, message='Selesai', filename=filename,
+                          finished_at=get_local_now())
+                print(f'[Export] ✓ Job {job_id} selesai')
+            except Exception as e:
+                db.session.rollback()
+                self._set(job_id, status='failed', message='Gagal', error=str(e), finished_at=get_local_now())
+                print(f'[Export] ✗ Job {job_id} gagal: {e}')
+            finally:
+                db.session.remove()
+
+            if job is None:
+                return
+            result = self.status(job_id)
+            for callback in self._finish_callbacks:
+                try:
+                    callback(result)
+                except Exception as e:
+                    print(f'[Export] ✗ Callback job {job_id} error: {e}')
+            db.session.remove()
+
+    @staticmethod
+    def _publish(source: str, target: str) -> None:
+        """Hardlink (atau copy) file hasil ke folder export secara atomik."""
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.part'
+        try:
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # -------------------- pemeliharaan --------------------
+
+    def recover(self) -> int:
+        """Ambil alih & jalankan ulang job aktif milik proses yang sudah mati."""
+        recovered = 0
+        for job in ExportJob.query.filter(ExportJob.status.in_(ACTIVE_STATUSES)).all():
+            if job.owner == self.owner or _owner_alive(job.owner, job.updated_at):
+                continue
+            with db.engine.begin() as conn:
+                claimed = conn.execute(
+                    update(ExportJob)
+                    .where(ExportJob.id == job.id, ExportJob.owner == job.owner,
+                           ExportJob.status.in_(ACTIVE_STATUSES))
+                    .values(status='queued', owner=self.owner, progress=0,
+                            message='Diulang setelah restart', updated_at=get_local_now())
+                ).rowcount
+            if claimed:
+                self._pool().submit(self._run, job.id)
+                recovered += 1
+        if recovered:
+            print(f'[Export] {recovered} job diulang setelah restart')
+        return recovered
+
+    def cleanup(self) -> int:
+        """Hapus job selesai/gagal (beserta file) yang lebih lama dari retensi."""
+        batas = get_local_now() - timedelta(hours=self.retention_hours)
+        old = ExportJob.query.filter(
+            ExportJob.status.notin_(ACTIVE_STATUSES),
+            ExportJob.finished_at < batas,
+        ).all()
+        for job in old:
+            path = self.file_path(job)
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            db.session.delete(job)
+        if old:
+            db.session.commit()
+        return len(old)
+
+
+# Global export queue instance
+export_queue = None
+
+
+def initialize_export_queue(app: Any, output_dir: str) -> ExportJobQueue:
+    """Initialize global export queue instance"""
+    global export_queue
+    if export_queue is None:
+        export_queue = ExportJobQueue(app, output_dir)
+    return export_queue
+
+
+def get_export_queue() -> ExportJobQueue | None:
+    """Get global export queue instance"""
+    return export_queue
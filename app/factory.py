@@ -0,0 +1,74 @@
+"""
+Application factory Kasir Toko Sembako.
+
+`create_app()` membuat app Flask minimal (hanya database + tuning SQLite)
+untuk tools, migrasi, dan benchmark, tanpa memuat route, openpyxl, Telegram,
+atau scheduler:
+
+    from app.factory import create_app
+    from app.models import db, Produk
+
+    app = create_app()
+    with app.app_context():
+        print(Produk.query.count())
+
+Aplikasi web (app.app_simple) dibangun dengan factory yang sama
+(`create_app(..., import_name='app.app_simple')`) lalu route didaftarkan di
+modul itu, jadi hanya ada satu per proses. `create_app(web=True)` mengembalikan
+instance tersebut; `config` yang bertentangan dengan konfigurasinya ditolak
+(ValueError) karena tidak bisa diterapkan lagi setelah app dibuat, atur lewat
+environment sebelum import.
+"""
+
+import os
+
+from flask import Flask
+
+try:
+    from app.models import db
+    from app.db_tuning import install_sqlite_tuning
+except Exception:
+    from models import db
+    from db_tuning import install_sqlite_tuning
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'instance', 'kasir.db')
+
+
+def get_database_uri() -> str:
+    return os.environ.get('SQLALCHEMY_DATABASE_URI') or f'sqlite:///{DEFAULT_DB_PATH.replace(os.sep, "/")}'
+
+
+def create_app(config: dict | None = None, *, web: bool = False, import_name: str = 'kasir') -> Flask:
+    """
+    Args:
+        config: Override konfigurasi Flask (mis. SQLALCHEMY_DATABASE_URI)
+        web: True untuk aplikasi web lengkap (routes, login, CSRF)
+        import_name: Nama modul pemilik app (menentukan folder templates/static)
+
+    Raises:
+        ValueError: `web=True` dengan `config` yang berbeda dari app web yang sudah ada
+    """
+    if web:
+        try:
+            from app.app_simple import app
+        except Exception:
+            from app_simple import app
+        conflicts = sorted(key for key, value in (config or {}).items() if app.config.get(key) != value)
+        if conflicts:
+            raise ValueError(
+                f"Konfigurasi app web sudah dibuat saat import app.app_simple, tidak bisa diubah: {', '.join(conflicts)}"
+            )
+        return app
+
+    app = Flask(import_name, instance_path=os.path.join(BASE_DIR, 'instance'))
+    app.config['SQLALCHEMY_DATABASE_URI'] = get_database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_tuning(db.engine)
+    return app
@@ -0,0 +1,90 @@
+"""
+Kunci idempotensi checkout (retry & antrian offline kasir tanpa transaksi ganda).
+
+Klien membuat satu kunci acak per penjualan dan mengirimnya di header
+`Idempotency-Key` (atau field `idempotency_key` untuk batch). Checkout yang
+berhasil menyimpan kunci + response-nya di tabel `checkout_idempotensi`,
+di dalam transaksi database yang sama dengan penjualannya:
+
+    hasil = idempotensi.cari(db.session, kunci, current_user.id)
+    if hasil is None:
+        ...  # proses checkout
+        idempotensi.simpan(db.session, kunci, current_user.id, transaksi.id, hasil)
+        db.session.commit()
+
+Jadi kunci tercatat jika dan hanya jika penjualannya tercatat. Retry dengan
+kunci yang sama mengembalikan response asli (`duplikat: True`). Dua retry
+yang masuk bersamaan bentrok di primary key: yang kalah di-rollback lalu
+membaca hasil yang menang. Checkout yang gagal (stok kurang dll.) tidak
+disimpan, jadi boleh diulang dengan kunci yang sama.
+
+Kunci lebih lama dari `CHECKOUT_IDEMPOTENCY_RETENTION_DAYS` (default 7
+hari) dihapus scheduler harian.
+"""
+
+import json
+import os
+import re
+from datetime import timedelta
+from typing import Any
+
+try:
+    from app.models import CheckoutIdempotensi, get_local_now
+except Exception:
+    from models import CheckoutIdempotensi, get_local_now
+
+
+KEY_HEADER = 'Idempotency-Key'
+DEFAULT_RETENTION_DAYS = 7
+
+# UUID dari crypto.randomUUID() atau string acak lain yang cukup panjang
+_KEY_RE = re.compile(r'^[A-Za-z0-9_.:-]{8,64}$')
+
+
+def get_retention_days() -> int:
+    try:
+        return max(1, int(os.environ.get('CHECKOUT_IDEMPOTENCY_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)))
+    except (TypeError, ValueError):
+        return DEFAULT_RETENTION_DAYS
+
+
+def parse_key(value: Any) -> str | None:
+    """Kunci yang valid, None jika kosong. Raises ValueError jika formatnya salah."""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str) or not _KEY_RE.match(value):
+        raise ValueError('Idempotency key tidak valid')
+    return value
+
+
+def cari(session: Any, kunci: str, user_id: int) -> dict | None:
+    """Response checkout asli untuk `kunci`, None jika belum pernah berhasil."""
+    row = session.get(CheckoutIdempotensi, kunci)
+    if row is None:
+        return None
+    if row.user_id != user_id:
+        return {'success': False, 'message': 'Idempotency key sudah dipakai user lain'}
+    return {**json.loads(row.hasil), 'duplikat': True}
+
+
+def simpan(session: Any, kunci: str, user_id: int, transaksi_id: int, hasil: dict) -> None:
+    """
+    Catat kunci di transaksi pemanggil (flush sekarang, tidak commit).
+
+    Raises:
+        IntegrityError: Kunci sudah dicatat request lain (retry bersamaan)
+    """
+    session.add(CheckoutIdempotensi(
+        kunci=kunci, user_id=user_id, transaksi_id=transaksi_id, hasil=json.dumps(hasil),
+    ))
+    session.flush()
+
+
+def prune(session: Any, days: int | None = None) -> int:
+    """Hapus kunci yang lebih lama dari retensi (commit sendiri). Returns jumlah baris."""
+    batas = get_local_now() - timedelta(days=days or get_retention_days())
+    deleted = session.query(CheckoutIdempotensi).filter(CheckoutIdempotensi.created_at < batas).delete(
+        synchronize_session=False
+    )
+    session.commit()
+    return deleted
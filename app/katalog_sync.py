@@ -0,0 +1,110 @@
+"""
+Sinkronisasi katalog produk ke cache browser kasir (snapshot + delta).
+
+Halaman kasir menyimpan katalog di IndexedDB dan mencari/mencocokkan barcode
+secara lokal. Server cukup mengirim perubahan sejak versi terakhir klien:
+
+    GET /api/katalog?since=0     -> snapshot penuh
+    GET /api/katalog?since=1234  -> hanya produk yang berubah
+    # {'versi': 1240, 'penuh': False, 'produk': [...seperti to_dict()], 'dihapus': [7]}
+
+Tabel `katalog_versi` menyimpan versi perubahan terakhir per produk. Trigger
+SQLite di `produk`, `varian_produk`, dan `harga_variasi` memberi produk yang
+berubah (termasuk stok setelah checkout) versi baru = max + 1, jadi delta
+adalah `versi > since` lewat index, dan tabelnya tidak tumbuh melebihi jumlah
+produk. Baris produk yang dihapus tetap ada (tombstone) agar klien ikut
+menghapus. SQLite hanya punya satu penulis, jadi urutan versi = urutan commit.
+
+Versi dibaca sebelum data: perubahan yang masuk di antaranya ikut terkirim
+lagi di delta berikutnya (tidak ada yang terlewat, klien menimpa per id).
+"""
+
+from typing import Any
+
+from sqlalchemy import func, select, text
+
+try:
+    from app.models import KatalogVersi, Produk
+    from app.produk_serializer import produk_dicts
+except Exception:
+    from models import KatalogVersi, Produk
+    from produk_serializer import produk_dicts
+
+
+# Lebih dari ini produk berubah: kirim snapshot penuh saja
+DELTA_MAX = 2000
+
+_BUMP = ("INSERT OR REPLACE INTO katalog_versi (produk_id, versi) "
+         "VALUES ({ref}, (SELECT coalesce(max(versi), 0) + 1 FROM katalog_versi))")
+
+_TRIGGERS = [
+    ('katalog_produk_ai', 'AFTER INSERT ON produk', ['new.id']),
+    ('katalog_produk_au', 'AFTER UPDATE OF kode, nama, harga_jual, stok, satuan ON produk', ['new.id']),
+    ('katalog_produk_ad', 'AFTER DELETE ON produk', ['old.id']),
+    ('katalog_varian_ai', 'AFTER INSERT ON varian_produk', ['new.produk_id']),
+    ('katalog_varian_au', 'AFTER UPDATE OF produk_id, nama_varian, barcode_varian, stok ON varian_produk',
+     ['new.produk_id']),
+    ('katalog_varian_pindah', 'AFTER UPDATE OF produk_id ON varian_produk WHEN old.produk_id IS NOT new.produk_id',
+     ['old.produk_id']),
+    ('katalog_varian_ad', 'AFTER DELETE ON varian_produk', ['old.produk_id']),
+    ('katalog_harga_ai', 'AFTER INSERT ON harga_variasi', ['new.produk_id']),
+    ('katalog_harga_au', 'AFTER UPDATE ON harga_variasi', ['new.produk_id']),
+    ('katalog_harga_pindah', 'AFTER UPDATE OF produk_id ON harga_variasi WHEN old.produk_id IS NOT new.produk_id',
+     ['old.produk_id']),
+    ('katalog_harga_ad', 'AFTER DELETE ON harga_variasi', ['old.produk_id']),
+]
+
+
+def ensure_triggers(session: Any) -> bool:
+    """
+    Pasang trigger versi katalog dan beri versi ke produk yang belum punya
+    (database lama / ditulis sebelum trigger ada), commit sendiri.
+    False jika bukan SQLite / gagal.
+    """
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    try:
+        for name, event, refs in _TRIGGERS:
+            body = ' '.join(_BUMP.format(ref=ref) + ';' for ref in refs)
+            session.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END"))
+        # Tanpa ini versi tetap 0 dan klien terus meminta snapshot penuh
+        session.execute(text(
+            "INSERT INTO katalog_versi (produk_id, versi) "
+            "SELECT id, (SELECT coalesce(max(versi), 0) FROM katalog_versi) + row_number() OVER (ORDER BY id) "
+            "FROM produk WHERE id NOT IN (SELECT produk_id FROM katalog_versi)"
+        ))
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"[Katalog] Warning: gagal memasang trigger versi katalog: {e}")
+        return False
+
+
+def current_version(session: Any) -> int:
+    return session.execute(select(func.coalesce(func.max(KatalogVersi.versi), 0))).scalar()
+
+
+def changes(session: Any, since: int | None = None) -> dict:
+    """
+    Perubahan katalog sejak versi `since`.
+
+    Snapshot penuh (`penuh=True`) jika `since` kosong/0, lebih baru dari versi
+    server (mis. database dipulihkan dari backup), atau perubahan > DELTA_MAX.
+    """
+    versi = current_version(session)
+    changed = None
+    if since and 0 < since <= versi:
+        changed = session.execute(
+            select(KatalogVersi.produk_id).where(KatalogVersi.versi > since).limit(DELTA_MAX + 1)
+        ).scalars().all()
+        if len(changed) > DELTA_MAX:
+            changed = None
+
+    if changed is None:
+        produk = produk_dicts(session, Produk.query.order_by(Produk.id))
+        return {'versi': versi, 'penuh': True, 'produk': produk, 'dihapus': []}
+
+    produk = produk_dicts(session, Produk.query.filter(Produk.id.in_(changed)).order_by(Produk.id)) if changed else []
+    ada = {p['id'] for p in produk}
+    return {'versi': versi, 'penuh': False, 'produk': produk, 'dihapus': [pid for pid in changed if pid not in ada]}
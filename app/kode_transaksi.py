@@ -0,0 +1,80 @@
+"""
+Generator nomor transaksi (kode_transaksi) bebas tabrakan.
+
+Format lama `TRX{YYYYmmddHHMMSS}` bentrok jika dua checkout terjadi di detik
+yang sama. Nomor sekarang diambil dari sequence di tabel `kode_sequence`,
+dinaikkan di dalam transaksi checkout yang sama:
+
+    INSERT INTO kode_sequence (scope, last) VALUES (:s, 1)
+    ON CONFLICT (scope) DO UPDATE SET last = last + 1
+    RETURNING last
+
+SQLite men-serialisasi writer, jadi beberapa worker/kasir tidak pernah
+mendapat nomor yang sama. Jika checkout di-rollback, nomor ikut batal
+(tidak ada lubang urutan).
+
+Format bisa diatur lewat env `KODE_TRANSAKSI_FORMAT`, contoh default:
+`TRX{date:%Y%m%d}-{seq:04d}` -> `TRX20260118-0042`. Placeholder yang
+tersedia: `{date}` (datetime), `{seq}` (int), `{node}` (env `KODE_NODE`).
+
+Scope sequence adalah format yang dirender dengan seq=0, jadi format dengan
+tanggal harian otomatis reset tiap hari, sedangkan format tanpa tanggal
+memakai satu counter terus-menerus.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import text
+
+
+DEFAULT_FORMAT = 'TRX{date:%Y%m%d}-{seq:04d}'
+
+# RETURNING tersedia sejak SQLite 3.35
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def get_kode_format() -> str:
+    fmt = (os.environ.get('KODE_TRANSAKSI_FORMAT') or DEFAULT_FORMAT).strip()
+    if '{seq' not in fmt:
+        print(f'[Kode] Format {fmt!r} tanpa {{seq}}, pakai default')
+        return DEFAULT_FORMAT
+    return fmt
+
+
+def format_kode(now: datetime, seq: int, fmt: str | None = None, node: str | None = None) -> str:
+    fmt = fmt or get_kode_format()
+    node = os.environ.get('KODE_NODE', '') if node is None else node
+    return fmt.format(date=now, seq=seq, node=node)
+
+
+def next_sequence(session: Any, scope: str) -> int:
+    """Naikkan dan kembalikan sequence untuk `scope` (di transaksi milik session)."""
+    params = {'s': scope}
+    if _HAS_RETURNING:
+        return int(session.execute(text(
+            'INSERT INTO kode_sequence (scope, last) VALUES (:s, 1) '
+            'ON CONFLICT (scope) DO UPDATE SET last = last + 1 '
+            'RETURNING last'
+        ), params).scalar_one())
+
+    # SQLite lama: UPDATE dulu (mengambil write lock), baru baca
+    updated = session.execute(text(
+        'UPDATE kode_sequence SET last = last + 1 WHERE scope = :s'
+    ), params).rowcount
+    if not updated:
+        session.execute(text(
+            'INSERT INTO kode_sequence (scope, last) VALUES (:s, 1)'
+        ), params)
+    return int(session.execute(text(
+        'SELECT last FROM kode_sequence WHERE scope = :s'
+    ), params).scalar_one())
+
+
+def allocate_kode_transaksi(session: Any, now: datetime, fmt: str | None = None) -> str:
+    """Ambil nomor transaksi berikutnya untuk waktu `now`."""
+    fmt = fmt or get_kode_format()
+    seq = next_sequence(session, format_kode(now, 0, fmt=fmt))
+    return format_kode(now, seq, fmt=fmt)
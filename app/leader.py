@@ -0,0 +1,166 @@
+"""
+Leader election antar worker WSGI memakai file lock.
+
+Saat dijalankan dengan beberapa worker (gunicorn/waitress), hanya satu proses
+yang boleh menjalankan Telegram bot, scheduler, dan backup worker. Proses yang
+berhasil mengambil lock eksklusif pada `instance/leader.lock` menjadi leader
+dan memegang lock selama proses hidup. OS melepas lock otomatis jika proses
+mati, lalu follower yang mencoba ulang secara berkala akan mengambil alih.
+"""
+
+import os
+import threading
+from typing import Callable
+
+try:
+    import fcntl  # POSIX
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+DEFAULT_RETRY_SECONDS = 15
+
+
+class LeaderLock:
+    def __init__(self, path: str, retry_s: float | None = None):
+        """
+        Args:
+            path: File lock (dibuat jika belum ada)
+            retry_s: Interval follower mencoba mengambil alih lock
+        """
+        self.path = path
+        if retry_s is None:
+            try:
+                retry_s = float(os.environ.get('LEADER_RETRY_SECONDS', DEFAULT_RETRY_SECONDS))
+            except (TypeError, ValueError):
+                retry_s = DEFAULT_RETRY_SECONDS
+        self.retry_s = max(1.0, retry_s)
+
+        self._fh = None
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fh is not None
+
+    def on_elected(self, callback: Callable[[], None]) -> None:
+        """Daftarkan callback yang dijalankan sekali saat proses ini menjadi leader."""
+        self._callbacks.append(callback)
+
+    def try_acquire(self) -> bool:
+        """Coba ambil lock tanpa menunggu. True jika proses ini leader."""
+        with self._lock:
+            if self._fh is not None:
+                return True
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fh = open(self.path, 'a+')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                fh.close()
+                return False
+
+            fh.seek(0)
+            fh.truncate()
+            fh.write(f'{os.getpid()}\n')
+            fh.flush()
+            self._fh = fh
+
+        print(f'[Leader] Proses {os.getpid()} menjadi leader')
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f'[Leader] ✗ Callback error: {e}')
+        return True
+
+    def start(self) -> bool:
+        """Ambil lock sekarang; jika gagal, coba ulang di background thread."""
+        if self.try_acquire():
+            return True
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._retry_loop, name='leader-election', daemon=True)
+            self._thread.start()
+        print(f'[Leader] Proses {os.getpid()} berjalan sebagai follower')
+        return False
+
+    def _retry_loop(self) -> None:
+        while not self._stop.wait(self.retry_s):
+            if self.try_acquire():
+                return
+
+    def release(self) -> None:
+        self._stop.set()
+        with self._lock:
+            if self._fh is None:
+                return
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._fh.seek(0)
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                self._fh.close()
+                self._fh = None
+
+
+class file_lock:
+    """Lock eksklusif (blocking) antar proses, dipakai sebagai context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self) -> 'file_lock':
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fh = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+# Global leader lock instance
+leader_lock = None
+
+
+def initialize_leader_lock(path: str, retry_s: float | None = None) -> LeaderLock:
+    """Initialize global leader lock instance"""
+    global leader_lock
+    if leader_lock is None:
+        leader_lock = LeaderLock(path, retry_s=retry_s)
+    return leader_lock
+
+
+def get_leader_lock() -> LeaderLock | None:
+    """Get global leader lock instance"""
+    return leader_lock
+
+
+def is_leader() -> bool:
+    """True jika leader election tidak dipakai (satu proses) atau proses ini leader."""
+    return leader_lock is None or leader_lock.is_leader
+
@@ -9,12 +9,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import requests
-
-try:
-    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
-except Exception:  # pragma: no cover
-    Ed25519PublicKey = None  # type: ignore
+# requests & cryptography di-import saat dipakai saja (mengurangi waktu start aplikasi)
 
 
 INSTANCE_DIR = Path(__file__).resolve().parent.parent / "instance"
@@ -114,7 +109,11 @@ def _save_activation(data: dict[str, Any]) -> None:
 
 
 def _verify_activation_payload(payload_b64: str, sig_b64: str) -> dict[str, Any] | None:
-    if not LICENSE_SERVER_PUBLIC_KEY_B64 or Ed25519PublicKey is None:
+    if not LICENSE_SERVER_PUBLIC_KEY_B64:
+        return None
+    try:
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+    except Exception:  # pragma: no cover
         return None
 
     try:
@@ -168,6 +167,8 @@ def try_activate_online(timeout_s: int = 8) -> LicenseStatus:
     device_fp = get_device_fingerprint()
 
     try:
+        import requests
+
         resp = requests.post(
             url.rstrip("/") + "/api/activate",
             json={
@@ -216,6 +217,8 @@ def try_ping_online(timeout_s: int = 4) -> None:
         return
     device_fp = get_device_fingerprint()
     try:
+        import requests
+
         requests.post(
             url.rstrip('/') + '/api/ping',
             json={'license_key': key, 'device_fingerprint': device_fp, 'app_version': APP_VERSION},
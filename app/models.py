@@ -0,0 +1,288 @@
+"""
+Model database Kasir Toko Sembako.
+
+Modul ini tidak punya efek samping saat di-import (tidak membuat app Flask,
+tidak print, tidak import openpyxl/telegram/APScheduler), sehingga tools dan
+migrasi cukup:
+
+    from app.models import db, Produk
+    from app.factory import create_app
+
+`db` belum terikat ke app; `create_app()` / `app_simple` memanggil
+`db.init_app(app)`.
+"""
+
+from datetime import datetime
+
+from flask_login import UserMixin
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+db = SQLAlchemy()
+
+
+def get_local_now():
+    """Get current time in local timezone"""
+    # Gunakan waktu lokal sistem (otomatis detect timezone dari OS)
+    return datetime.now()
+
+
+# ==================== MEMBER LEVEL ====================
+
+LEVEL_RULES = [
+    (0, 'Bronze'),
+    (1000, 'Silver'),
+    (5000, 'Gold'),
+]
+
+def get_member_level(points):
+    level = 'Bronze'
+    for min_points, name in LEVEL_RULES:
+        if points >= min_points:
+            level = name
+    return level
+
+# ==================== MODELS ====================
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(200), nullable=False)
+    nama = db.Column(db.String(100), nullable=False)
+    role = db.Column(db.String(20), default='kasir')
+    
+    def set_password(self, password):
+        """Set password dengan hashing yang lebih aman"""
+        self.password_hash = generate_password_hash(
+            password, 
+            method='pbkdf2:sha256', 
+            salt_length=16
+        )
+    
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+    
+    @staticmethod
+    def validate_password_strength(password):
+        """Validasi kekuatan password"""
+        if len(password) < 8:
+            return False, "Password minimal 8 karakter"
+        if not any(c.isupper() for c in password):
+            return False, "Password harus mengandung huruf besar"
+        if not any(c.isdigit() for c in password):
+            return False, "Password harus mengandung angka"
+        return True, "Password valid"
+
+class Kategori(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nama = db.Column(db.String(100), nullable=False, unique=True)
+    deskripsi = db.Column(db.Text)
+    produk = db.relationship('Produk', backref='kategori_ref', lazy=True)
+
+class Member(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nama = db.Column(db.String(100), nullable=False)
+    no_telp = db.Column(db.String(30))
+    alamat = db.Column(db.Text)
+    catatan = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=get_local_now)
+    points = db.Column(db.Integer, default=0)
+    total_spent = db.Column(db.Float, default=0)
+
+    def get_level(self):
+        return get_member_level(self.points or 0)
+
+class Produk(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kode = db.Column(db.String(50), unique=True, nullable=False)
+    nama = db.Column(db.String(200), nullable=False)
+    deskripsi = db.Column(db.Text)
+    harga_beli = db.Column(db.Float, nullable=False)
+    harga_jual = db.Column(db.Float, nullable=False)
+    stok = db.Column(db.Integer, default=0)
+    kategori_id = db.Column(db.Integer, db.ForeignKey('kategori.id'))
+    minimal_stok = db.Column(db.Integer, default=5)
+    satuan = db.Column(db.String(20), default='pcs')
+    harga_variasi = db.relationship('HargaVariasi', backref='produk', lazy=True, cascade='all, delete-orphan', order_by='HargaVariasi.min_qty')
+    varian_produk = db.relationship('VarianProduk', backref='produk_ref', lazy=True, cascade='all, delete-orphan', order_by='VarianProduk.created_at')
+    
+    def get_harga_by_qty(self, qty):
+        """Dapatkan harga berdasarkan quantity"""
+        # Cek apakah ada harga variasi
+        if self.harga_variasi:
+            # Sort descending by min_qty untuk cek dari qty terbesar
+            for variant in reversed(self.harga_variasi):
+                if qty >= variant.min_qty:
+                    return variant.harga
+        # Default ke harga jual
+        return self.harga_jual
+    
+    def to_dict(self):
+        # Get price variants
+        variants = []
+        if self.harga_variasi:
+            variants = [{'min_qty': v.min_qty, 'harga': v.harga} for v in self.harga_variasi]
+            
+        # Get product variants
+        product_variants = []
+        if self.varian_produk:
+            product_variants = [{
+                'id': v.id,
+                'nama_varian': v.nama_varian,
+                'barcode_varian': v.barcode_varian,
+                'stok': v.stok
+            } for v in self.varian_produk]
+            
+        return {
+            'id': self.id,
+            'kode': self.kode,
+            'nama': self.nama,
+            'harga_jual': self.harga_jual,
+            'harga_variasi': variants,
+            'varian_produk': product_variants,
+            'stok': self.stok,
+            'satuan': self.satuan
+        }
+
+class HargaVariasi(db.Model):
+    """Model untuk menyimpan harga bertingkat berdasarkan quantity"""
+    id = db.Column(db.Integer, primary_key=True)
+    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'), nullable=False)
+    min_qty = db.Column(db.Integer, nullable=False)  # Minimal quantity untuk harga ini
+    harga = db.Column(db.Float, nullable=False)  # Harga per unit
+    keterangan = db.Column(db.String(100))  # Opsional: keterangan tier harga
+
+class VarianProduk(db.Model):
+    """Model untuk menyimpan varian produk dengan barcode"""
+    id = db.Column(db.Integer, primary_key=True)
+    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'), nullable=False)
+    nama_varian = db.Column(db.String(200), nullable=False)  # Nama varian (misal: "Varian A", "Kemasan Besar")
+    barcode_varian = db.Column(db.String(100), unique=True, nullable=False)  # Barcode unik untuk varian
+    stok = db.Column(db.Integer, default=0)  # Stok untuk varian ini
+    created_at = db.Column(db.DateTime, default=get_local_now)
+    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
+
+class KodeSequence(db.Model):
+    """Counter nomor transaksi, lihat app/kode_transaksi.py"""
+    __tablename__ = 'kode_sequence'
+    scope = db.Column(db.String(100), primary_key=True)
+    last = db.Column(db.Integer, nullable=False, default=0)
+
+class PenjualanHarian(db.Model):
+    """Rollup penjualan per hari, lihat app/sales_rollup.py"""
+    __tablename__ = 'penjualan_harian'
+    tanggal = db.Column(db.Date, primary_key=True)
+    jumlah_transaksi = db.Column(db.Integer, nullable=False, default=0)
+    omzet = db.Column(db.Float, nullable=False, default=0)       # sum Transaksi.total
+    pembayaran = db.Column(db.Float, nullable=False, default=0)  # sum TransaksiItem.subtotal
+    jumlah_item = db.Column(db.Integer, nullable=False, default=0)
+    hpp = db.Column(db.Float, nullable=False, default=0)
+    keuntungan = db.Column(db.Float, nullable=False, default=0)
+
+class PenjualanHarianProduk(db.Model):
+    """Rollup penjualan per hari × produk, lihat app/sales_rollup.py"""
+    __tablename__ = 'penjualan_harian_produk'
+    tanggal = db.Column(db.Date, primary_key=True)
+    produk_id = db.Column(db.Integer, primary_key=True)
+    jumlah = db.Column(db.Integer, nullable=False, default=0)
+    harga_jual = db.Column(db.Float, nullable=False, default=0)  # harga tertinggi di hari itu
+    pembayaran = db.Column(db.Float, nullable=False, default=0)
+    hpp = db.Column(db.Float, nullable=False, default=0)         # total HPP (harga_beli × jumlah)
+    keuntungan = db.Column(db.Float, nullable=False, default=0)
+
+class ExportJob(db.Model):
+    """Job export di background, lihat app/export_jobs.py"""
+    __tablename__ = 'export_job'
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    message = db.Column(db.String(200))
+    error = db.Column(db.Text)
+    filename = db.Column(db.String(100))       # file hasil di instance/exports
+    download_name = db.Column(db.String(200))  # nama file saat di-download
+    owner = db.Column(db.String(150))          # host:pid proses yang memegang job
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    telegram_chat_id = db.Column(db.String(50))  # kirim hasil ke chat ini jika diisi
+    created_at = db.Column(db.DateTime, default=get_local_now)
+    updated_at = db.Column(db.DateTime, default=get_local_now, onupdate=get_local_now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class CacheVersion(db.Model):
+    """Nomor versi data yang dicache per proses (dinaikkan trigger), lihat app/barcode_index.py"""
+    __tablename__ = 'cache_version'
+    nama = db.Column(db.String(50), primary_key=True)
+    versi = db.Column(db.Integer, nullable=False, default=0)
+
+class KatalogVersi(db.Model):
+    """Versi perubahan terakhir per produk (diisi trigger), lihat app/katalog_sync.py"""
+    __tablename__ = 'katalog_versi'
+    produk_id = db.Column(db.Integer, primary_key=True)  # tetap ada setelah produk dihapus (tombstone)
+    versi = db.Column(db.Integer, nullable=False, unique=True)
+
+class CheckoutIdempotensi(db.Model):
+    """Kunci idempotensi checkout yang sudah diproses, lihat app/idempotensi.py"""
+    __tablename__ = 'checkout_idempotensi'
+    kunci = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    transaksi_id = db.Column(db.Integer, nullable=False)
+    hasil = db.Column(db.Text, nullable=False)  # JSON response checkout
+    created_at = db.Column(db.DateTime, nullable=False, default=get_local_now, index=True)
+
+class Transaksi(db.Model):
+    # Filter tanggal harus berupa rentang pada kolom mentah agar index ini terpakai (app/date_range.py)
+    __table_args__ = (db.Index('idx_transaksi_tanggal', 'tanggal'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kode_transaksi = db.Column(db.String(50), unique=True, nullable=False)
+    tanggal = db.Column(db.DateTime, default=get_local_now)
+    subtotal = db.Column(db.Float, nullable=False, default=0)
+    discount_percent = db.Column(db.Float, default=0)
+    discount_amount = db.Column(db.Float, default=0)
+    total = db.Column(db.Float, nullable=False)
+    bayar = db.Column(db.Float, nullable=False)
+    kembalian = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(20), default='tunai')  # tunai, qris, ewallet, debit, hutang
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    member_id = db.Column(db.Integer, db.ForeignKey('member.id'))
+    member_manual = db.Column(db.String(100))  # Untuk input manual nama/telp member
+    points_earned = db.Column(db.Integer, default=0)
+    user = db.relationship('User', backref='transaksi')
+    member = db.relationship('Member', backref='transaksi')
+    items = db.relationship('TransaksiItem', backref='transaksi_ref', lazy=True)
+
+class TransaksiItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    transaksi_id = db.Column(db.Integer, db.ForeignKey('transaksi.id'))
+    produk_id = db.Column(db.Integer, db.ForeignKey('produk.id'))
+    produk = db.relationship('Produk')
+    jumlah = db.Column(db.Integer, nullable=False)
+    harga = db.Column(db.Float, nullable=False)
+    subtotal = db.Column(db.Float, nullable=False)
+    harga_beli = db.Column(db.Float)  # HPP per unit saat transaksi (snapshot, bukan harga produk saat ini)
+    varian_barcode = db.Column(db.String(100))  # Barcode varian jika ada
+    varian_nama = db.Column(db.String(200))     # Nama varian jika ada
+
+
+
+class Pengaturan(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), unique=True, nullable=False)
+    value = db.Column(db.Text)
+    
+    @staticmethod
+    def get(key, default=''):
+        setting = Pengaturan.query.filter_by(key=key).first()
+        return setting.value if setting else default
+    
+    @staticmethod
+    def set(key, value):
+        setting = Pengaturan.query.filter_by(key=key).first()
+        if setting:
+            setting.value = value
+        else:
+            setting = Pengaturan(key=key, value=value)
+            db.session.add(setting)
+        db.session.commit()
@@ -0,0 +1,191 @@
+"""
+Index pencarian produk (SQLite FTS5, tokenizer trigram).
+
+`Produk.nama.ilike('%q%')` tidak bisa memakai index B-tree (wildcard di
+depan), jadi setiap ketikan di kotak cari kasir memindai seluruh tabel produk
+dan varian. Tabel virtual `produk_fts` menyimpan nama, kode, dan barcode
+varian per produk (rowid = produk.id) dengan tokenizer trigram, sehingga
+pencarian substring (min. 3 huruf) dijawab dari index:
+
+    query = Produk.query
+    query, rank = apply_search(db.session, query, 'beras 5')
+    query.order_by(*rank).limit(50)
+
+Index dijaga trigger di tabel `produk` dan `varian_produk`, jadi tools/
+import / migrasi yang menulis langsung ke database tetap sinkron.
+`ensure_index()` (dipanggil `init_database`) membuat tabel & trigger lalu
+membangun ulang isinya jika jumlah baris tidak cocok.
+
+Kata kurang dari 3 huruf tidak bisa dicari dengan trigram; kata seperti itu
+dicocokkan dengan LIKE di baris hasil FTS. Jika semua kata < 3 huruf, SQLite
+tidak punya FTS5/trigram, atau index belum dibuat, dipakai filter ILIKE lama.
+"""
+
+from typing import Any
+
+from sqlalchemy import case, func, literal_column, or_, select, text
+
+try:
+    from app.models import Produk, VarianProduk
+except Exception:
+    from models import Produk, VarianProduk
+
+
+FTS_TABLE = 'produk_fts'
+MIN_TOKEN = 3
+# Bobot bm25 per kolom: nama, kode, barcode
+BM25_WEIGHTS = (10.0, 5.0, 5.0)
+# Di atas jumlah hasil ini skor bm25 tidak dihitung (mahal, dan untuk ribuan
+# hasil dari 3 huruf pertama urutan nama sama bergunanya)
+RANK_MAX_HITS = 1000
+
+_BARCODES = "(SELECT group_concat(barcode_varian, ' ') FROM varian_produk WHERE produk_id = {ref})"
+
+_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(nama, kode, barcode, tokenize='trigram')",
+    # Produk
+    f"""CREATE TRIGGER IF NOT EXISTS produk_fts_ai AFTER INSERT ON produk BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama, kode, barcode)
+        VALUES (new.id, new.nama, new.kode, {_BARCODES.format(ref='new.id')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS produk_fts_au AFTER UPDATE OF id, nama, kode ON produk BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, nama, kode, barcode)
+        VALUES (new.id, new.nama, new.kode, {_BARCODES.format(ref='new.id')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS produk_fts_ad AFTER DELETE ON produk BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    # Varian: kolom barcode produk induk dihitung ulang
+    f"""CREATE TRIGGER IF NOT EXISTS varian_fts_ai AFTER INSERT ON varian_produk BEGIN
+        UPDATE {FTS_TABLE} SET barcode = {_BARCODES.format(ref='new.produk_id')} WHERE rowid = new.produk_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS varian_fts_au AFTER UPDATE OF produk_id, barcode_varian ON varian_produk BEGIN
+        UPDATE {FTS_TABLE} SET barcode = {_BARCODES.format(ref='old.produk_id')} WHERE rowid = old.produk_id;
+        UPDATE {FTS_TABLE} SET barcode = {_BARCODES.format(ref='new.produk_id')} WHERE rowid = new.produk_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS varian_fts_ad AFTER DELETE ON varian_produk BEGIN
+        UPDATE {FTS_TABLE} SET barcode = {_BARCODES.format(ref='old.produk_id')} WHERE rowid = old.produk_id;
+    END""",
+]
+
+
+def _is_sqlite(session: Any) -> bool:
+    return session.get_bind().dialect.name == 'sqlite'
+
+
+def index_exists(session: Any) -> bool:
+    if not _is_sqlite(session):
+        return False
+    return session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first() is not None
+
+
+def rebuild(session: Any) -> int:
+    """Isi ulang index dari tabel produk & varian (tidak commit). Returns jumlah produk."""
+    session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    # Satu GROUP BY atas varian (tidak bergantung index varian_produk.produk_id)
+    session.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, nama, kode, barcode) "
+        "SELECT p.id, p.nama, p.kode, v.barcode FROM produk p LEFT JOIN ("
+        "SELECT produk_id, group_concat(barcode_varian, ' ') AS barcode FROM varian_produk GROUP BY produk_id"
+        ") v ON v.produk_id = p.id"
+    ))
+    session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    return session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar() or 0
+
+
+def ensure_index(session: Any) -> bool:
+    """
+    Buat tabel FTS & trigger jika belum ada, bangun ulang jika tidak sinkron
+    (commit sendiri).
+
+    Returns:
+        False jika database bukan SQLite atau SQLite tanpa FTS5/trigram
+    """
+    if not _is_sqlite(session):
+        return False
+    try:
+        for ddl in _DDL:
+            session.execute(text(ddl))
+        indexed = session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar() or 0
+        total = session.query(Produk).count()
+        if indexed != total:
+            print(f"[Search] Membangun index pencarian produk ({total} produk)...")
+            rebuild(session)
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"[Search] Warning: FTS5 tidak tersedia, pencarian memakai LIKE: {e}")
+        return False
+
+
+def _split(search: str) -> tuple[list[str], list[str]]:
+    """Kata ≥ 3 huruf (untuk MATCH) dan kata pendek (untuk LIKE)."""
+    words = search.split()
+    return [w for w in words if len(w) >= MIN_TOKEN], [w for w in words if len(w) < MIN_TOKEN]
+
+
+def match_expression(words: list[str]) -> str:
+    """Ekspresi MATCH FTS5: setiap kata sebagai string (substring), digabung AND."""
+    return ' AND '.join('"' + w.replace('"', '""') + '"' for w in words)
+
+
+def _like(value: str) -> str:
+    return '%' + value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def legacy_filter(search: str):
+    """Filter ILIKE lama (nama, kode, atau barcode varian mengandung `search`)."""
+    return or_(
+        Produk.nama.ilike(f'%{search}%'),
+        Produk.kode.ilike(f'%{search}%'),
+        # Cari produk yang memiliki varian dengan barcode yang cocok
+        Produk.id.in_(
+            select(VarianProduk.produk_id).where(VarianProduk.barcode_varian.ilike(f'%{search}%'))
+        ),
+    )
+
+
+def apply_search(session: Any, query: Any, search: str) -> tuple[Any, list]:
+    """
+    Batasi `query` (atas Produk) ke produk yang cocok dengan `search`.
+
+    Returns:
+        (query, order_by): urutan relevansi — kode/barcode persis, nama
+        diawali kata pertama, skor bm25 (jika hasil ≤ RANK_MAX_HITS), nama.
+        Untuk fallback ILIKE, order_by kosong.
+    """
+    search = (search or '').strip()
+    words, short_words = _split(search)
+    if not words or not index_exists(session):
+        return query.filter(legacy_filter(search)), []
+
+    match = text(f'{FTS_TABLE} MATCH :fts_match').bindparams(fts_match=match_expression(words))
+    total_hits = session.execute(select(func.count()).select_from(text(FTS_TABLE)).where(match)).scalar()
+    ranked = total_hits <= RANK_MAX_HITS
+
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    skor = literal_column(f'bm25({FTS_TABLE}, {weights})' if ranked else '0')
+    hits = select(
+        literal_column('rowid').label('produk_id'),
+        skor.label('skor'),
+    ).select_from(text(FTS_TABLE)).where(match)
+    for i, word in enumerate(short_words):
+        hits = hits.where(text(
+            f"(nama || ' ' || kode || ' ' || coalesce(barcode, '')) LIKE :fts_short{i} ESCAPE '\\'"
+        ).bindparams(**{f'fts_short{i}': _like(word)}))
+    hits = hits.subquery('produk_fts_hits')
+
+    # Kode / barcode varian persis (lewat index unik, bukan dibandingkan per baris hasil)
+    kode = {search, search.upper()}
+    exact_ids = select(Produk.id).where(Produk.kode.in_(kode)).union(
+        select(VarianProduk.produk_id).where(VarianProduk.barcode_varian.in_(kode))
+    )
+    exact = case((Produk.id.in_(exact_ids), 0), else_=1)
+    # Nama yang diawali kata pertama (mis. "kopi" -> "Kopi Kapal Api") sebelum yang memuatnya di tengah
+    prefix = case((Produk.nama.ilike(_like(words[0])[1:], escape='\\'), 0), else_=1)
+    query = query.join(hits, hits.c.produk_id == Produk.id)
+    return query, [exact, prefix, hits.c.skor, Produk.nama]
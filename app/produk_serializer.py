@@ -0,0 +1,92 @@
+"""
+Serialisasi daftar produk untuk API (bentuk sama dengan `Produk.to_dict()`).
+
+`Produk.to_dict()` memuat `harga_variasi` dan `varian_produk` secara lazy,
+jadi 200 produk = 1 + 2 x 200 query. Di sini satu halaman hasil dibangun
+dengan tiga query: kolom produk (tanpa objek ORM), lalu harga bertingkat dan
+varian untuk semua id sekaligus (`IN`, dipecah per IN_CHUNK id untuk
+snapshot katalog yang besar):
+
+    query = Produk.query.filter(...).order_by(...).limit(50)
+    return json_response(produk_dicts(db.session, query))
+
+`json_response()` memakai orjson jika terpasang (opsional) dan memberi ETag,
+sehingga halaman hasil yang tidak berubah dijawab 304 tanpa body.
+"""
+
+import hashlib
+import json
+from typing import Any
+
+from flask import Response, request
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from app.models import HargaVariasi, Produk, VarianProduk
+except Exception:
+    from models import HargaVariasi, Produk, VarianProduk
+
+
+_KOLOM = (Produk.id, Produk.kode, Produk.nama, Produk.harga_jual, Produk.stok, Produk.satuan)
+# Batas parameter per IN (SQLite lama: 999), untuk snapshot katalog penuh
+IN_CHUNK = 900
+
+
+def _chunks(ids: list[int]):
+    for i in range(0, len(ids), IN_CHUNK):
+        yield ids[i:i + IN_CHUNK]
+
+
+def produk_dicts(session: Any, query: Any) -> list[dict]:
+    """Jalankan `query` (atas Produk, sudah diurutkan/dibatasi) -> list dict seperti `to_dict()`."""
+    produk = [
+        {'id': pid, 'kode': kode, 'nama': nama, 'harga_jual': harga_jual,
+         'harga_variasi': [], 'varian_produk': [], 'stok': stok, 'satuan': satuan}
+        for pid, kode, nama, harga_jual, stok, satuan in query.with_entities(*_KOLOM)
+    ]
+    if not produk:
+        return produk
+    by_id = {p['id']: p for p in produk}
+
+    for ids in _chunks(list(by_id)):
+        harga = session.execute(
+            select(HargaVariasi.produk_id, HargaVariasi.min_qty, HargaVariasi.harga)
+            .where(HargaVariasi.produk_id.in_(ids))
+            .order_by(HargaVariasi.min_qty)
+        )
+        for pid, min_qty, nilai in harga:
+            by_id[pid]['harga_variasi'].append({'min_qty': min_qty, 'harga': nilai})
+
+        varian = session.execute(
+            select(VarianProduk.produk_id, VarianProduk.id, VarianProduk.nama_varian,
+                   VarianProduk.barcode_varian, VarianProduk.stok)
+            .where(VarianProduk.produk_id.in_(ids))
+            .order_by(VarianProduk.created_at)
+        )
+        for pid, varian_id, nama_varian, barcode, stok in varian:
+            by_id[pid]['varian_produk'].append(
+                {'id': varian_id, 'nama_varian': nama_varian, 'barcode_varian': barcode, 'stok': stok}
+            )
+    return produk
+
+
+def dumps(data: Any) -> bytes:
+    """JSON bytes (orjson jika ada, selain itu json standar yang ringkas)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data: Any) -> Response:
+    """Response JSON dengan ETag; 304 jika cocok dengan If-None-Match request."""
+    body = dumps(data)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+    # Selalu divalidasi ulang (stok berubah), dan hanya untuk browser user ini
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
@@ -0,0 +1,302 @@
+"""
+Cache hasil laporan per (jenis, mulai, selesai, mode).
+
+Dua lapis:
+- Memori (LRU, per proses): data dashboard `/laporan` / angka Telegram,
+  dibatasi REPORT_CACHE_MAX_ENTRIES.
+- Disk (`instance/report_cache`): file xlsx hasil export. Export yang sama
+  cukup `send_file` dari cache. Jumlah file dibatasi REPORT_CACHE_MAX_FILES
+  (yang paling lama tidak dipakai dihapus dulu).
+
+Setiap entri menyimpan sidik jari rollup `penjualan_harian` di rentang itu
+(jumlah hari, transaksi, item, omzet, keuntungan). Sidik jari dicek ulang saat
+dibaca (satu query ke ≤366 baris rollup), sehingga checkout / reset dari proses
+lain (worker gunicorn lain, tools/) tetap membatalkan cache yang tanggalnya
+tersentuh, sedangkan periode lampau yang sudah tutup tetap cocok selamanya.
+Laporan juga menampilkan nama produk (join ke `produk`), jadi sidik jari memuat
+versi `cache_version` baris 'laporan' yang hanya dinaikkan trigger saat nama
+produk diubah atau produk dihapus (tampil 'Unknown'). Edit harga/stok atau
+produk baru tidak menyentuh laporan yang sudah ada, sehingga bulan yang sudah
+tutup tetap di cache.
+
+Di proses yang sama checkout memanggil `invalidate_date()`, reset memanggil
+`clear()` supaya entri usang langsung dibuang dari memori dan disk.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable
+
+from sqlalchemy import func, select, text
+
+try:
+    from app.models import CacheVersion, PenjualanHarian
+    from app.date_range import as_date
+except Exception:
+    from models import CacheVersion, PenjualanHarian
+    from date_range import as_date
+
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_FILES = 200
+
+VERSION_NAME = 'laporan'
+
+_BUMP = f"UPDATE cache_version SET versi = versi + 1 WHERE nama = '{VERSION_NAME}'"
+
+_TRIGGERS = [
+    ('laporan_versi_produk_au', 'AFTER UPDATE OF nama ON produk WHEN old.nama IS NOT new.nama'),
+    ('laporan_versi_produk_ad', 'AFTER DELETE ON produk'),
+]
+
+
+def ensure_triggers(session: Any) -> bool:
+    """Pasang baris versi & trigger (commit sendiri). False jika bukan SQLite / gagal."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    try:
+        session.execute(
+            text("INSERT OR IGNORE INTO cache_version (nama, versi) VALUES (:nama, 0)"), {'nama': VERSION_NAME}
+        )
+        for name, event in _TRIGGERS:
+            session.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {_BUMP}; END"))
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"[ReportCache] Warning: gagal memasang trigger versi laporan: {e}")
+        return False
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class ReportCache:
+    def __init__(self, cache_dir: str, max_entries: int | None = None, max_files: int | None = None):
+        """
+        Args:
+            cache_dir: Folder file xlsx cache
+            max_entries: Maksimal entri LRU di memori
+            max_files: Maksimal file xlsx di disk
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries or _env_int('REPORT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        self.max_files = max_files or _env_int('REPORT_CACHE_MAX_FILES', DEFAULT_MAX_FILES)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[tuple, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # -------------------- kunci & sidik jari --------------------
+
+    @staticmethod
+    def _key(kind: str, mulai: date | str, selesai: date | str, mode: str) -> tuple:
+        return (kind, as_date(mulai).isoformat(), as_date(selesai).isoformat(), mode or '')
+
+    @staticmethod
+    def fingerprint(session: Any, mulai: date | str, selesai: date | str) -> tuple:
+        """
+        Ringkasan rollup di rentang + versi nama produk; berubah jika ada
+        transaksi di tanggal itu berubah, nama produk diubah, atau produk dihapus.
+        """
+        h = PenjualanHarian
+        versi_nama = select(CacheVersion.versi).where(CacheVersion.nama == VERSION_NAME).scalar_subquery()
+        row = session.query(
+            func.count(h.tanggal),
+            func.coalesce(func.sum(h.jumlah_transaksi), 0),
+            func.coalesce(func.sum(h.jumlah_item), 0),
+            func.round(func.coalesce(func.sum(h.omzet), 0), 2),
+            func.round(func.coalesce(func.sum(h.keuntungan), 0), 2),
+            func.coalesce(versi_nama, 0),
+        ).filter(h.tanggal >= as_date(mulai), h.tanggal <= as_date(selesai)).one()
+        return tuple(row)
+
+    @staticmethod
+    def _covers(key: tuple, tanggal: str) -> bool:
+        return key[1] <= tanggal <= key[2]
+
+    # -------------------- memori --------------------
+
+    def get_or_compute(
+        self,
+        session: Any,
+        kind: str,
+        mulai: date | str,
+        selesai: date | str,
+        compute: Callable[[], Any],
+        mode: str = '',
+    ) -> Any:
+        """Ambil hasil dari LRU jika sidik jari masih sama, selain itu hitung & simpan."""
+        key = self._key(kind, mulai, selesai, mode)
+        fp = self.fingerprint(session, mulai, selesai)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == fp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (fp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    # -------------------- file xlsx --------------------
+
+    def _file_prefix(self, key: tuple) -> str:
+        kind, mulai, selesai, mode = key
+        return f"{kind}_{mode or '-'}_{mulai}_{selesai}_"
+
+    def get_or_build_file(
+        self,
+        session: Any,
+        kind: str,
+        mulai: date | str,
+        selesai: date | str,
+        build: Callable[[str], None],
+        mode: str = '',
+    ) -> str:
+        """
+        Path file xlsx di cache; `build(path)` hanya dipanggil jika belum ada.
+
+        Args:
+            build: Fungsi yang menulis file ke path yang diberikan
+        """
+        key = self._key(kind, mulai, selesai, mode)
+        fp = self.fingerprint(session, mulai, selesai)
+        prefix = self._file_prefix(key)
+        digest = hashlib.sha1(repr(fp).encode()).hexdigest()[:12]
+        path = os.path.join(self.cache_dir, f'{prefix}{digest}.xlsx')
+
+        if os.path.exists(path):
+            os.utime(path)  # tandai baru dipakai (LRU berbasis mtime)
+            with self._lock:
+                self.hits += 1
+            return path
+
+        with self._lock:
+            self.misses += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Versi lama rentang yang sama sudah tidak berlaku
+        self._remove_files(lambda name: name.startswith(prefix))
+
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+        try:
+            build(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict_files()
+        return path
+
+    def _list_files(self) -> list[str]:
+        try:
+            return [f for f in os.listdir(self.cache_dir) if f.endswith('.xlsx')]
+        except FileNotFoundError:
+            return []
+
+    def _remove_files(self, predicate: Callable[[str], bool]) -> int:
+        removed = 0
+        for name in self._list_files():
+            if predicate(name):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _evict_files(self) -> None:
+        files = self._list_files()
+        if len(files) <= self.max_files:
+            return
+
+        def mtime(name):
+            try:
+                return os.path.getmtime(os.path.join(self.cache_dir, name))
+            except OSError:
+                return 0.0
+
+        for name in sorted(files, key=mtime)[:len(files) - self.max_files]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    # -------------------- invalidasi --------------------
+
+    def invalidate_date(self, tanggal: date | str) -> int:
+        """Buang entri memori & file yang rentangnya mencakup `tanggal`."""
+        tanggal = as_date(tanggal).isoformat()
+        with self._lock:
+            stale = [key for key in self._entries if self._covers(key, tanggal)]
+            for key in stale:
+                del self._entries[key]
+
+        def covers_file(name):
+            parts = name.split('_')
+            # {kind}_{mode}_{mulai}_{selesai}_{digest}.xlsx (kind boleh mengandung '_')
+            return len(parts) >= 5 and parts[-3] <= tanggal <= parts[-2]
+
+        return len(stale) + self._remove_files(covers_file)
+
+    def invalidate_range(self, mulai: date | str | None = None, selesai: date | str | None = None) -> int:
+        """Buang entri yang beririsan dengan rentang (None = tanpa batas)."""
+        lo = as_date(mulai).isoformat() if mulai else '0000-00-00'
+        hi = as_date(selesai).isoformat() if selesai else '9999-99-99'
+        with self._lock:
+            stale = [key for key in self._entries if key[1] <= hi and key[2] >= lo]
+            for key in stale:
+                del self._entries[key]
+
+        def overlaps(name):
+            parts = name.split('_')
+            return len(parts) >= 5 and parts[-3] <= hi and parts[-2] >= lo
+
+        return len(stale) + self._remove_files(overlaps)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._remove_files(lambda name: True)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'files': len(self._list_files()),
+                'max_files': self.max_files,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Global report cache instance
+report_cache = None
+
+
+def initialize_report_cache(cache_dir: str) -> ReportCache:
+    """Initialize global report cache instance"""
+    global report_cache
+    if report_cache is None:
+        report_cache = ReportCache(cache_dir)
+    return report_cache
+
+
+def get_report_cache() -> ReportCache | None:
+    """Get global report cache instance"""
+    return report_cache
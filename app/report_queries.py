@@ -0,0 +1,190 @@
+"""
+Query agregasi laporan penjualan.
+
+Semua angka laporan (omzet, jumlah transaksi, HPP, keuntungan, penjualan per
+tanggal, metode pembayaran, produk terlaris) dihitung dengan SUM/COUNT + GROUP
+BY di SQLite, bukan dengan memuat seluruh `Transaksi` lalu mengiterasi
+`t.items` / `item.produk` satu per satu (N+1 query). Hasilnya baris/dict biasa
+sehingga bisa dipakai bersama oleh dashboard `/laporan`, generator Excel, dan
+Telegram bot.
+
+Angka per hari/produk dibaca dari tabel rollup `penjualan_harian` dan
+`penjualan_harian_produk` (lihat app/sales_rollup.py); hanya distribusi metode
+pembayaran yang masih dihitung dari tabel transaksi.
+
+Periode selalu inklusif: `mulai` dan `selesai` berupa `date` atau string
+'YYYY-MM-DD'.
+"""
+
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Iterator
+
+from sqlalchemy import func
+
+try:
+    from app.models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi
+    from app.date_range import as_date, filter_tanggal
+except Exception:
+    from models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi
+    from date_range import as_date, filter_tanggal
+
+
+# Ekspresi kolom yang dipakai ulang di beberapa query
+METODE = func.coalesce(func.nullif(Transaksi.payment_method, ''), 'tunai')
+NAMA_PRODUK = func.coalesce(Produk.nama, 'Unknown')
+
+
+def _periode(query, mulai: date | str, selesai: date | str):
+    return query.filter(*filter_tanggal(Transaksi.tanggal, mulai, selesai))
+
+
+def _periode_rollup(query, model, mulai: date | str, selesai: date | str):
+    return query.filter(model.tanggal >= as_date(mulai), model.tanggal <= as_date(selesai))
+
+
+def _produk_query(session: Any, *columns):
+    """Query rollup produk ⟕ Produk (produk terhapus tampil 'Unknown')."""
+    return (session.query(*columns)
+            .select_from(PenjualanHarianProduk)
+            .outerjoin(Produk, Produk.id == PenjualanHarianProduk.produk_id))
+
+
+def ringkasan(session: Any, mulai: date | str, selesai: date | str) -> dict:
+    """
+    Returns:
+        dict total_penjualan, total_transaksi, total_hpp, total_keuntungan
+    """
+    h = PenjualanHarian
+    total_penjualan, total_transaksi, total_hpp, total_keuntungan = _periode_rollup(session.query(
+        func.coalesce(func.sum(h.omzet), 0),
+        func.coalesce(func.sum(h.jumlah_transaksi), 0),
+        func.coalesce(func.sum(h.hpp), 0),
+        func.coalesce(func.sum(h.keuntungan), 0),
+    ), h, mulai, selesai).one()
+
+    return {
+        'total_penjualan': float(total_penjualan or 0),
+        'total_transaksi': int(total_transaksi or 0),
+        'total_hpp': float(total_hpp or 0),
+        'total_keuntungan': float(total_keuntungan or 0),
+    }
+
+
+def penjualan_per_tanggal(session: Any, mulai: date | str, selesai: date | str) -> dict[str, float]:
+    """Omzet (Transaksi.total) per tanggal 'YYYY-MM-DD', urut tanggal."""
+    h = PenjualanHarian
+    rows = _periode_rollup(session.query(h.tanggal, h.omzet), h, mulai, selesai).order_by(h.tanggal).all()
+    return {tanggal.isoformat(): float(omzet or 0) for tanggal, omzet in rows}
+
+
+def distribusi_pembayaran(session: Any, mulai: date | str, selesai: date | str) -> dict[str, int]:
+    """Jumlah transaksi per metode pembayaran (kosong/NULL dihitung 'tunai')."""
+    rows = _periode(session.query(METODE, func.count(Transaksi.id)), mulai, selesai) \
+        .group_by(METODE).order_by(func.count(Transaksi.id).desc()).all()
+    return {metode: int(jumlah) for metode, jumlah in rows}
+
+
+def produk_terlaris(session: Any, mulai: date | str, selesai: date | str, limit: int = 5) -> list[dict]:
+    """Produk dengan omzet (sum subtotal item) terbesar."""
+    p = PenjualanHarianProduk
+    omzet = func.sum(p.pembayaran)
+    rows = _periode_rollup(_produk_query(
+        session,
+        p.produk_id,
+        NAMA_PRODUK.label('nama'),
+        omzet.label('omzet'),
+        func.sum(p.jumlah).label('jumlah'),
+    ), p, mulai, selesai).group_by(p.produk_id).order_by(omzet.desc()).limit(limit).all()
+    return [
+        {'produk_id': r.produk_id, 'nama': r.nama, 'omzet': float(r.omzet or 0), 'jumlah': int(r.jumlah or 0)}
+        for r in rows
+    ]
+
+
+def rincian_produk_harian(
+    session: Any,
+    mulai: date | str,
+    selesai: date | str,
+    chunk_size: int = 1000,
+) -> Iterator[dict]:
+    """
+    Rekap per tanggal × produk untuk laporan Excel harian/bulanan.
+
+    Baris diambil per chunk (`yield_per`) sehingga export rentang panjang tidak
+    memuat semuanya ke memori.
+
+    Yields:
+        dict tanggal, produk_id, nama, jumlah, harga_jual, hpp (per unit),
+        total_hpp, pembayaran, keuntungan; urut tanggal lalu nama produk
+    """
+    p = PenjualanHarianProduk
+    query = _periode_rollup(_produk_query(
+        session,
+        p.tanggal,
+        p.produk_id,
+        NAMA_PRODUK.label('nama'),
+        p.jumlah,
+        p.harga_jual,
+        p.hpp,
+        p.pembayaran,
+        p.keuntungan,
+    ), p, mulai, selesai).order_by(p.tanggal, NAMA_PRODUK)
+    for r in query.yield_per(chunk_size):
+        yield {
+            'tanggal': r.tanggal.isoformat(),
+            'produk_id': r.produk_id,
+            'nama': r.nama,
+            'jumlah': int(r.jumlah or 0),
+            'harga_jual': float(r.harga_jual or 0),
+            'hpp': float(r.hpp or 0) / r.jumlah if r.jumlah else 0.0,
+            'total_hpp': float(r.hpp or 0),
+            'pembayaran': float(r.pembayaran or 0),
+            'keuntungan': float(r.keuntungan or 0),
+        }
+
+
+def blok_harian(
+    session: Any,
+    mulai: date | str,
+    selesai: date | str,
+    chunk_size: int = 1000,
+) -> Iterator[dict]:
+    """
+    Inti agregasi laporan Excel harian/bulanan: satu pass atas rollup
+    tanggal × produk (hasil GROUP BY tanggal, produk_id), dikelompokkan per
+    tanggal.
+
+    Memori yang dipakai sebatas satu hari (jumlah produk terjual hari itu),
+    bukan seluruh periode.
+
+    Yields:
+        dict tanggal, rows (baris `rincian_produk_harian` hari itu),
+        pembayaran, hpp (total), keuntungan
+    """
+    for tanggal, rows in groupby(rincian_produk_harian(session, mulai, selesai, chunk_size), key=itemgetter('tanggal')):
+        rows = list(rows)
+        yield {
+            'tanggal': tanggal,
+            'rows': rows,
+            'pembayaran': sum(r['pembayaran'] for r in rows),
+            'hpp': sum(r['total_hpp'] for r in rows),
+            'keuntungan': sum(r['keuntungan'] for r in rows),
+        }
+
+
+def total_per_bulan(session: Any, mulai: date | str, selesai: date | str) -> dict[str, dict]:
+    """Pembayaran (sum subtotal item), HPP, dan keuntungan per bulan 'YYYY-MM'."""
+    h = PenjualanHarian
+    bulan = func.strftime('%Y-%m', h.tanggal)
+    rows = _periode_rollup(session.query(
+        bulan,
+        func.sum(h.pembayaran),
+        func.sum(h.hpp),
+        func.sum(h.keuntungan),
+    ), h, mulai, selesai).group_by(bulan).order_by(bulan).all()
+    return {
+        b: {'pembayaran': float(p or 0), 'hpp': float(hp or 0), 'keuntungan': float(k or 0)}
+        for b, p, hp, k in rows
+    }
@@ -0,0 +1,357 @@
+"""
+Analitik penjualan berbasis deret waktu (NumPy).
+
+Deret harian dibaca dari rollup `penjualan_harian` /
+`penjualan_harian_produk` (lihat app/sales_rollup.py) dengan satu query per
+deret, lalu diisi ke array padat (hari tanpa transaksi = 0). Semua
+perhitungan berikutnya (moving average, growth minggu ke minggu, indeks
+musiman per hari dalam seminggu, prediksi kebutuhan per produk) berupa operasi
+array, bukan loop Python atas daftar transaksi.
+
+    tren = tren_penjualan(db.session)       # dict siap JSON untuk bot/dashboard
+    target, sumber = target_harian(db.session)
+    saran = saran_restock(db.session, limit=10)
+
+Hasil dicache lewat ReportCache (`get_or_compute`), sehingga otomatis basi
+ketika ada checkout di rentang yang dihitung. Dipakai Telegram bot
+(`m_tren`, `grafik_penjualan`, `performa_minggu`, `target_penjualan`,
+`omzet_hari_ini`, `stok_rendah`), dashboard, dan `/api/analytics/*`.
+"""
+
+import math
+import os
+from datetime import date, timedelta
+from typing import Any, Callable
+
+import numpy as np
+from sqlalchemy import func
+
+try:
+    from app.models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi
+    from app.date_range import as_date, filter_tanggal
+    from app.report_cache import get_report_cache
+except Exception:
+    from models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi
+    from date_range import as_date, filter_tanggal
+    from report_cache import get_report_cache
+
+
+# Dipakai jika TARGET_PENJUALAN_HARIAN tidak diset dan belum ada riwayat penjualan
+DEFAULT_TARGET_HARIAN = 5_000_000
+DEFAULT_RIWAYAT_HARI = 28
+DEFAULT_HORIZON_HARI = 7
+# Bobot penjualan harian produk meluruh setengahnya setiap 7 hari
+HALF_LIFE_HARI = 7
+NAMA_HARI = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+
+def get_target_harian_config() -> float:
+    """TARGET_PENJUALAN_HARIAN (Rp); 0 / tidak diset = target dari prediksi."""
+    try:
+        return max(0.0, float(os.environ.get('TARGET_PENJUALAN_HARIAN', 0) or 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _cached(session: Any, kind: str, mulai: date, selesai: date, compute: Callable[[], Any], mode: str = '') -> Any:
+    cache = get_report_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(session, kind, mulai, selesai, compute, mode)
+
+
+# -------------------- deret waktu --------------------
+
+def rentang_hari(mulai: date | str, selesai: date | str) -> np.ndarray:
+    """Array datetime64[D] dari `mulai` sampai `selesai` (inklusif)."""
+    return np.arange(np.datetime64(as_date(mulai), 'D'), np.datetime64(as_date(selesai), 'D') + 1)
+
+
+def hari_dalam_minggu(dates: np.ndarray) -> np.ndarray:
+    """Indeks hari (Senin=0 … Minggu=6) untuk array datetime64[D]."""
+    # 1970-01-01 adalah hari Kamis (3)
+    return (dates.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+
+def deret_harian(
+    session: Any,
+    mulai: date | str,
+    selesai: date | str,
+    kolom: str = 'omzet',
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Satu kolom `penjualan_harian` sebagai deret padat.
+
+    Returns:
+        (dates datetime64[D], values float64), hari tanpa transaksi bernilai 0
+    """
+    h = PenjualanHarian
+    dates = rentang_hari(mulai, selesai)
+    values = np.zeros(len(dates))
+    rows = session.query(h.tanggal, getattr(h, kolom)).filter(
+        h.tanggal >= as_date(mulai), h.tanggal <= as_date(selesai)
+    ).all()
+    if rows:
+        tanggal, nilai = zip(*rows)
+        idx = (np.array(tanggal, dtype='datetime64[D]') - dates[0]).astype(np.int64)
+        values[idx] = np.array(nilai, dtype=float)
+    return dates, values
+
+
+def deret_jam(session: Any, mulai: date | str, selesai: date | str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Omzet per hari × jam (GROUP BY tanggal, jam di SQLite).
+
+    Returns:
+        (dates datetime64[D], matrix float64 berukuran hari × 24)
+    """
+    dates = rentang_hari(mulai, selesai)
+    matrix = np.zeros((len(dates), 24))
+    tanggal = func.date(Transaksi.tanggal)
+    jam = func.strftime('%H', Transaksi.tanggal)
+    rows = session.query(tanggal, jam, func.sum(Transaksi.total)).filter(
+        *filter_tanggal(Transaksi.tanggal, mulai, selesai)
+    ).group_by(tanggal, jam).all()
+    if rows:
+        tgl, jm, total = zip(*rows)
+        day_idx = (np.array(tgl, dtype='datetime64[D]') - dates[0]).astype(np.int64)
+        np.add.at(matrix, (day_idx, np.array(jm, dtype=np.int64)), np.array(total, dtype=float))
+    return dates, matrix
+
+
+# -------------------- statistik --------------------
+
+def moving_average(values: np.ndarray, window: int = 7) -> np.ndarray:
+    """Rata-rata bergerak; hari-hari awal memakai jendela sepanjang data yang ada."""
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return values
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, len(values) + 1)
+    n = np.minimum(end, window)
+    return (csum[end] - csum[end - n]) / n
+
+
+def pertumbuhan(values: np.ndarray, periode: int = 7) -> float | None:
+    """% perubahan total `periode` hari terakhir vs `periode` hari sebelumnya."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2 * periode:
+        return None
+    sekarang = values[-periode:].sum()
+    sebelumnya = values[-2 * periode:-periode].sum()
+    if sebelumnya <= 0:
+        return None
+    return float((sekarang - sebelumnya) / sebelumnya * 100)
+
+
+def indeks_musiman(dates: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Indeks per hari dalam seminggu (Senin=0): rata-rata hari itu / rata-rata
+    keseluruhan. 1.0 untuk hari yang belum punya data atau jika belum ada penjualan.
+    """
+    values = np.asarray(values, dtype=float)
+    weekday = hari_dalam_minggu(dates)
+    counts = np.bincount(weekday, minlength=7)
+    sums = np.bincount(weekday, weights=values, minlength=7)
+    overall = values.mean() if len(values) else 0.0
+    if overall <= 0:
+        return np.ones(7)
+    rata = np.divide(sums, counts, out=np.zeros(7), where=counts > 0)
+    return np.where(counts > 0, rata / overall, 1.0)
+
+
+# -------------------- ringkasan tren --------------------
+
+def _hitung_tren(session: Any, mulai: date, hari_ini: date) -> dict:
+    dates, omzet = deret_harian(session, mulai, hari_ini, 'omzet')
+    _, transaksi = deret_harian(session, mulai, hari_ini, 'jumlah_transaksi')
+    ma7 = moving_average(omzet, 7)
+
+    minggu_ini = omzet[-7:]
+    trx_minggu = transaksi[-7:].sum()
+    terbaik = int(np.argmax(minggu_ini))
+
+    # Prediksi omzet hari ini: rata-rata riwayat (tanpa hari ini) × indeks hari ini
+    riwayat_dates, riwayat = dates[:-1], omzet[:-1]
+    indeks = indeks_musiman(riwayat_dates, riwayat)
+    rata_riwayat = float(riwayat.mean()) if len(riwayat) else 0.0
+    prediksi = rata_riwayat * float(indeks[hari_ini.weekday()])
+
+    return {
+        'mulai': mulai.isoformat(),
+        'selesai': hari_ini.isoformat(),
+        'tanggal': [str(d) for d in dates],
+        'omzet': omzet.round(2).tolist(),
+        'transaksi': transaksi.astype(int).tolist(),
+        'ma7': ma7.round(2).tolist(),
+        'omzet_hari_ini': float(omzet[-1]),
+        'transaksi_hari_ini': int(transaksi[-1]),
+        'total_7_hari': float(minggu_ini.sum()),
+        'rata_7_hari': float(minggu_ini.mean()),
+        'transaksi_7_hari': int(trx_minggu),
+        'rata_per_transaksi_7_hari': float(minggu_ini.sum() / trx_minggu) if trx_minggu else 0.0,
+        'growth_mingguan': pertumbuhan(omzet, 7),
+        'hari_terbaik': {
+            'tanggal': str(dates[-7:][terbaik]),
+            'omzet': float(minggu_ini[terbaik]),
+        } if minggu_ini.any() else None,
+        'indeks_hari': {NAMA_HARI[i]: round(float(v), 3) for i, v in enumerate(indeks)},
+        'prediksi_hari_ini': round(prediksi, 2),
+    }
+
+
+def tren_penjualan(session: Any, hari_ini: date | str | None = None, hari: int = DEFAULT_RIWAYAT_HARI) -> dict:
+    """
+    Ringkasan tren `hari` hari terakhir s/d `hari_ini` (inklusif, minimal 14).
+
+    Returns:
+        dict tanggal/omzet/transaksi/ma7 (list per hari), total & rata-rata
+        7 hari, growth_mingguan (% vs 7 hari sebelumnya, None jika tidak bisa
+        dihitung), hari_terbaik, indeks_hari, prediksi_hari_ini
+    """
+    hari_ini = as_date(hari_ini) if hari_ini else date.today()
+    mulai = hari_ini - timedelta(days=max(hari, 14) - 1)
+    return _cached(session, 'analytics_tren', mulai, hari_ini, lambda: _hitung_tren(session, mulai, hari_ini))
+
+
+def target_harian(session: Any, hari_ini: date | str | None = None) -> tuple[float, str]:
+    """
+    Target omzet harian.
+
+    Returns:
+        (target, sumber): sumber 'config' (TARGET_PENJUALAN_HARIAN),
+        'prediksi' (rata-rata 28 hari × indeks hari ini), atau 'default'
+    """
+    configured = get_target_harian_config()
+    if configured:
+        return configured, 'config'
+    prediksi = tren_penjualan(session, hari_ini)['prediksi_hari_ini']
+    if prediksi > 0:
+        return prediksi, 'prediksi'
+    return float(DEFAULT_TARGET_HARIAN), 'default'
+
+
+def profil_jam(session: Any, mulai: date | str, selesai: date | str) -> dict:
+    """
+    Omzet per jam (0-23) dijumlah sepanjang rentang.
+
+    Returns:
+        dict omzet (list 24), jam_tersibuk (None jika belum ada penjualan)
+    """
+    mulai, selesai = as_date(mulai), as_date(selesai)
+
+    def compute():
+        _, matrix = deret_jam(session, mulai, selesai)
+        per_jam = matrix.sum(axis=0)
+        return {
+            'omzet': per_jam.round(2).tolist(),
+            'jam_tersibuk': int(np.argmax(per_jam)) if per_jam.any() else None,
+        }
+
+    return _cached(session, 'analytics_jam', mulai, selesai, compute)
+
+
+# -------------------- prediksi produk --------------------
+
+def _hitung_prediksi_produk(session: Any, mulai: date, selesai: date, horizon: int) -> dict[int, dict]:
+    p = PenjualanHarianProduk
+    rows = session.query(p.tanggal, p.produk_id, p.jumlah).filter(
+        p.tanggal >= mulai, p.tanggal <= selesai
+    ).all()
+    if not rows:
+        return {}
+
+    dates = rentang_hari(mulai, selesai)
+    tanggal, produk_id, jumlah = zip(*rows)
+    ids, row_idx = np.unique(np.array(produk_id, dtype=np.int64), return_inverse=True)
+    day_idx = (np.array(tanggal, dtype='datetime64[D]') - dates[0]).astype(np.int64)
+    matrix = np.zeros((len(ids), len(dates)))
+    np.add.at(matrix, (row_idx, day_idx), np.array(jumlah, dtype=float))
+
+    # Level permintaan: rata-rata berbobot eksponensial (hari terbaru paling berat)
+    umur = np.arange(len(dates))[::-1]
+    bobot = 0.5 ** (umur / HALF_LIFE_HARI)
+    level = matrix @ bobot / bobot.sum()
+
+    # Pola mingguan diambil dari total toko (deret per produk terlalu jarang)
+    indeks = indeks_musiman(dates, matrix.sum(axis=0))
+    besok = np.datetime64(selesai, 'D') + 1
+    faktor = float(indeks[hari_dalam_minggu(np.arange(besok, besok + horizon))].sum())
+    prediksi = level * faktor
+
+    return {
+        int(pid): {'rata_harian': round(float(lv), 3), 'prediksi': round(float(pr), 3)}
+        for pid, lv, pr in zip(ids, level, prediksi)
+    }
+
+
+def prediksi_produk(
+    session: Any,
+    hari_ini: date | str | None = None,
+    riwayat: int = DEFAULT_RIWAYAT_HARI,
+    horizon: int = DEFAULT_HORIZON_HARI,
+) -> dict[int, dict]:
+    """
+    Prediksi jumlah terjual per produk untuk `horizon` hari mulai `hari_ini`,
+    dari `riwayat` hari sebelumnya (hari ini belum lengkap, tidak dipakai).
+
+    Returns:
+        {produk_id: {'rata_harian', 'prediksi'}} untuk produk yang terjual di riwayat
+    """
+    hari_ini = as_date(hari_ini) if hari_ini else date.today()
+    selesai = hari_ini - timedelta(days=1)
+    mulai = hari_ini - timedelta(days=riwayat)
+    return _cached(session, 'analytics_produk', mulai, selesai,
+                   lambda: _hitung_prediksi_produk(session, mulai, selesai, horizon), mode=str(horizon))
+
+
+def saran_restock(
+    session: Any,
+    hari_ini: date | str | None = None,
+    horizon: int = DEFAULT_HORIZON_HARI,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Produk yang stoknya tidak cukup untuk prediksi `horizon` hari + minimal stok.
+
+    Returns:
+        list dict produk_id, kode, nama, stok, minimal_stok, rata_harian,
+        prediksi, hari_habis (perkiraan hari sampai stok habis), saran
+        (jumlah yang perlu dibeli); urut dari yang paling cepat habis
+    """
+    forecast = prediksi_produk(session, hari_ini, horizon=horizon)
+    if not forecast:
+        return []
+
+    # Stok dibaca langsung (tidak dicache): berubah tanpa mengubah rollup
+    produk_rows = session.query(Produk.id, Produk.kode, Produk.nama, Produk.stok, Produk.minimal_stok).filter(
+        Produk.id.in_(list(forecast))
+    ).all()
+    if not produk_rows:
+        return []
+
+    ids, kode, nama, stok, minimal = zip(*produk_rows)
+    stok = np.array(stok, dtype=float)
+    minimal = np.array([m or 0 for m in minimal], dtype=float)
+    rata = np.array([forecast[i]['rata_harian'] for i in ids])
+    prediksi = np.array([forecast[i]['prediksi'] for i in ids])
+
+    kurang = prediksi + minimal - stok
+    hari_habis = np.divide(np.maximum(stok, 0), rata, out=np.full(len(ids), np.inf), where=rata > 0)
+
+    hasil = [
+        {
+            'produk_id': int(ids[i]),
+            'kode': kode[i],
+            'nama': nama[i],
+            'stok': int(stok[i]),
+            'minimal_stok': int(minimal[i]),
+            'rata_harian': float(rata[i]),
+            'prediksi': float(prediksi[i]),
+            'hari_habis': round(float(hari_habis[i]), 1) if np.isfinite(hari_habis[i]) else None,
+            'saran': int(math.ceil(kurang[i])),
+        }
+        for i in np.argsort(hari_habis, kind='stable')
+        if kurang[i] > 0
+    ]
+    return hasil[:limit] if limit else hasil
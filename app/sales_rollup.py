@@ -0,0 +1,207 @@
+"""
+Rollup penjualan harian (materialized summary).
+
+Dua tabel ringkasan dipelihara di transaksi yang sama dengan `checkout()`:
+
+    penjualan_harian          (tanggal)            jumlah_transaksi, omzet,
+                                                   pembayaran, jumlah_item,
+                                                   hpp, keuntungan
+    penjualan_harian_produk   (tanggal, produk_id) jumlah, harga_jual,
+                                                   pembayaran, hpp, keuntungan
+
+Checkout menambah angka lewat UPSERT (`INSERT .. ON CONFLICT DO UPDATE SET
+x = x + excluded.x`) sehingga aman untuk kasir paralel. Laporan setahun cukup
+membaca ~365 baris rollup, bukan seluruh transaksi.
+
+HPP di rollup adalah harga beli saat transaksi terjadi. `rebuild()` menghitung
+ulang dari tabel transaksi (backfill / perbaikan) memakai snapshot
+`TransaksiItem.harga_beli`, jadi perubahan harga beli produk di kemudian hari
+tidak mengubah keuntungan periode lampau.
+"""
+
+from datetime import date
+from typing import Any, Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+try:
+    from app.models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi, TransaksiItem
+    from app.date_range import as_date, filter_tanggal
+except Exception:
+    from models import PenjualanHarian, PenjualanHarianProduk, Produk, Transaksi, TransaksiItem
+    from date_range import as_date, filter_tanggal
+
+
+def record_checkout(
+    session: Any,
+    tanggal: date,
+    total: float,
+    lines: Iterable[tuple[int, int, float, float]],
+) -> None:
+    """
+    Tambahkan satu transaksi ke rollup (tanpa commit; ikut commit checkout).
+
+    Args:
+        session: SQLAlchemy session milik checkout
+        tanggal: Tanggal transaksi
+        total: Transaksi.total
+        lines: (produk_id, jumlah, harga, harga_beli) per item keranjang
+    """
+    per_produk: dict[int, dict] = {}
+    for produk_id, jumlah, harga, harga_beli in lines:
+        row = per_produk.setdefault(produk_id, {
+            'tanggal': tanggal, 'produk_id': produk_id, 'jumlah': 0,
+            'harga_jual': 0.0, 'pembayaran': 0.0, 'hpp': 0.0, 'keuntungan': 0.0,
+        })
+        row['jumlah'] += jumlah
+        row['harga_jual'] = max(row['harga_jual'], harga)
+        row['pembayaran'] += harga * jumlah
+        row['hpp'] += (harga_beli or 0) * jumlah
+        row['keuntungan'] += (harga - (harga_beli or 0)) * jumlah
+
+    rows = list(per_produk.values())
+    if rows:
+        stmt = sqlite_insert(PenjualanHarianProduk)
+        t = PenjualanHarianProduk.__table__.c
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['tanggal', 'produk_id'],
+            set_={
+                'jumlah': t.jumlah + stmt.excluded.jumlah,
+                'harga_jual': func.max(t.harga_jual, stmt.excluded.harga_jual),
+                'pembayaran': t.pembayaran + stmt.excluded.pembayaran,
+                'hpp': t.hpp + stmt.excluded.hpp,
+                'keuntungan': t.keuntungan + stmt.excluded.keuntungan,
+            },
+        ), rows)
+
+    harian = {
+        'tanggal': tanggal,
+        'jumlah_transaksi': 1,
+        'omzet': total,
+        'pembayaran': sum(r['pembayaran'] for r in rows),
+        'jumlah_item': sum(r['jumlah'] for r in rows),
+        'hpp': sum(r['hpp'] for r in rows),
+        'keuntungan': sum(r['keuntungan'] for r in rows),
+    }
+    stmt = sqlite_insert(PenjualanHarian).values(**harian)
+    t = PenjualanHarian.__table__.c
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['tanggal'],
+        set_={col: t[col] + stmt.excluded[col] for col in harian if col != 'tanggal'},
+    ))
+
+
+def rebuild(session: Any, mulai: date | str | None = None, selesai: date | str | None = None) -> dict:
+    """
+    Hitung ulang rollup dari Transaksi/TransaksiItem (tanpa commit).
+
+    Args:
+        mulai, selesai: Rentang tanggal inklusif; None = semua data
+
+    Returns:
+        dict jumlah baris rollup yang ditulis: {'hari': n, 'produk': m}
+    """
+    mulai = as_date(mulai) if mulai else None
+    selesai = as_date(selesai) if selesai else None
+    tanggal_trx = func.date(Transaksi.tanggal)
+    periode_trx = filter_tanggal(Transaksi.tanggal, mulai, selesai)
+
+    def periode_rollup(col):
+        cond = []
+        if mulai is not None:
+            cond.append(col >= mulai)
+        if selesai is not None:
+            cond.append(col <= selesai)
+        return cond
+
+    session.execute(delete(PenjualanHarianProduk).where(*periode_rollup(PenjualanHarianProduk.tanggal)))
+    session.execute(delete(PenjualanHarian).where(*periode_rollup(PenjualanHarian.tanggal)))
+
+    # Murni SUM atas transaksi_item (snapshot HPP), tanpa join ke harga produk saat ini
+    hpp_satuan = func.coalesce(TransaksiItem.harga_beli, 0)
+    produk_rows = session.execute(insert(PenjualanHarianProduk).from_select(
+        ['tanggal', 'produk_id', 'jumlah', 'harga_jual', 'pembayaran', 'hpp', 'keuntungan'],
+        select(
+            tanggal_trx,
+            TransaksiItem.produk_id,
+            func.sum(TransaksiItem.jumlah),
+            func.max(TransaksiItem.harga),
+            func.sum(TransaksiItem.subtotal),
+            func.sum(hpp_satuan * TransaksiItem.jumlah),
+            func.sum((TransaksiItem.harga - hpp_satuan) * TransaksiItem.jumlah),
+        )
+        .select_from(TransaksiItem)
+        .join(Transaksi, Transaksi.id == TransaksiItem.transaksi_id)
+        .where(*periode_trx, TransaksiItem.produk_id.isnot(None))
+        .group_by(tanggal_trx, TransaksiItem.produk_id)
+    )).rowcount
+
+    # Kolom item per hari diambil dari rollup produk yang baru ditulis
+    p = PenjualanHarianProduk
+
+    def dari_produk(col):
+        return (select(func.coalesce(func.sum(col), 0))
+                .where(p.tanggal == tanggal_trx)
+                .scalar_subquery())
+
+    hari_rows = session.execute(insert(PenjualanHarian).from_select(
+        ['tanggal', 'jumlah_transaksi', 'omzet', 'pembayaran', 'jumlah_item', 'hpp', 'keuntungan'],
+        select(
+            tanggal_trx,
+            func.count(Transaksi.id),
+            func.coalesce(func.sum(Transaksi.total), 0),
+            dari_produk(p.pembayaran),
+            dari_produk(p.jumlah),
+            dari_produk(p.hpp),
+            dari_produk(p.keuntungan),
+        )
+        .where(*periode_trx)
+        .group_by(tanggal_trx)
+    )).rowcount
+
+    return {'hari': hari_rows, 'produk': produk_rows}
+
+
+def backfill_harga_beli(session: Any) -> int:
+    """
+    Isi `TransaksiItem.harga_beli` yang masih NULL (item dari sebelum ada
+    snapshot), tanpa commit.
+
+    Sumber: HPP rata-rata produk di rollup hari itu (harga beli saat
+    checkout); jika tidak ada, harga beli produk saat ini; selain itu 0.
+
+    Returns:
+        Jumlah item yang diisi
+    """
+    r = PenjualanHarianProduk
+    tanggal_trx = (select(func.date(Transaksi.tanggal))
+                   .where(Transaksi.id == TransaksiItem.transaksi_id)
+                   .scalar_subquery())
+    hpp_rollup = (select(r.hpp / r.jumlah)
+                  .where(r.produk_id == TransaksiItem.produk_id, r.tanggal == tanggal_trx, r.jumlah > 0)
+                  .scalar_subquery())
+    hpp_produk = select(Produk.harga_beli).where(Produk.id == TransaksiItem.produk_id).scalar_subquery()
+    return session.execute(
+        update(TransaksiItem)
+        .where(TransaksiItem.harga_beli.is_(None))
+        .values(harga_beli=func.coalesce(hpp_rollup, hpp_produk, 0))
+    ).rowcount
+
+
+def clear(session: Any) -> None:
+    """Kosongkan rollup (dipakai saat reset transaksi)."""
+    session.execute(delete(PenjualanHarianProduk))
+    session.execute(delete(PenjualanHarian))
+
+
+def ensure_backfilled(session: Any) -> bool:
+    """Rebuild + commit jika rollup masih kosong padahal transaksi sudah ada."""
+    if session.query(PenjualanHarian.tanggal).first() is not None:
+        return False
+    if session.query(Transaksi.id).first() is None:
+        return False
+    result = rebuild(session)
+    session.commit()
+    print(f"[Rollup] Backfill penjualan harian: {result['hari']} hari, {result['produk']} baris produk")
+    return True
@@ -0,0 +1,77 @@
+"""
+Operasi stok atomik untuk checkout.
+
+Stok tidak lagi dikurangi lewat `obj.stok -= qty` di Python (read-modify-write
+yang bisa kehilangan update / oversell jika dua kasir menjual barang yang sama
+bersamaan). Pengurangan dilakukan dengan UPDATE bersyarat:
+
+    UPDATE produk SET stok = stok - :q WHERE id = :id AND stok >= :q
+
+untuk seluruh keranjang sekaligus (executemany), lalu jumlah baris yang
+terpengaruh dicek. Jika ada baris yang tidak ter-update berarti stok sudah
+diambil transaksi lain; pemanggil wajib rollback.
+"""
+
+from typing import Any
+
+from sqlalchemy import bindparam, select, update
+
+
+class InsufficientStock(Exception):
+    """Stok tidak cukup saat UPDATE bersyarat dijalankan."""
+
+    def __init__(self, table: str, expected: int, updated: int):
+        self.table = table
+        self.expected = expected
+        self.updated = updated
+        super().__init__(f'Stok {table} berubah: {updated}/{expected} baris ter-update')
+
+
+def decrement_stock_bulk(session: Any, model: Any, needs: dict[int, int]) -> dict[int, int]:
+    """
+    Kurangi stok beberapa baris `model` dalam satu statement bersyarat.
+
+    Args:
+        session: SQLAlchemy session (transaksi milik pemanggil)
+        model: Model dengan kolom `id` dan `stok` (Produk / VarianProduk)
+        needs: Mapping id -> jumlah yang dikurangi
+
+    Returns:
+        Mapping id -> stok setelah dikurangi (dibaca di transaksi yang sama)
+
+    Raises:
+        InsufficientStock: Jika ada baris yang stoknya sudah tidak cukup
+    """
+    if not needs:
+        return {}
+
+    table = model.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam('_id'))
+        .where(table.c.stok >= bindparam('_q'))
+        .values(stok=table.c.stok - bindparam('_q'))
+    )
+    params = [{'_id': row_id, '_q': qty} for row_id, qty in needs.items()]
+    result = session.execute(stmt, params)
+
+    # id adalah primary key: setiap parameter maksimal mengenai satu baris
+    if result.rowcount != len(params):
+        raise InsufficientStock(table.name, len(params), result.rowcount)
+
+    rows = session.execute(
+        select(table.c.id, table.c.stok).where(table.c.id.in_(list(needs)))
+    ).all()
+    return {row_id: stok for row_id, stok in rows}
+
+
+def find_shortages(session: Any, model: Any, needs: dict[int, int]) -> list[int]:
+    """Cari id yang stoknya kurang dari kebutuhan (dipakai setelah rollback)."""
+    if not needs:
+        return []
+    table = model.__table__
+    rows = session.execute(
+        select(table.c.id, table.c.stok).where(table.c.id.in_(list(needs)))
+    ).all()
+    current = {row_id: (stok or 0) for row_id, stok in rows}
+    return [row_id for row_id, qty in needs.items() if current.get(row_id, 0) < qty]
@@ -12,14 +12,19 @@ import asyncio
 from datetime import datetime, date
 import io
 import json
+from typing import IO
 from urllib.parse import quote
 
 import requests
-from openpyxl import Workbook
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 import logging
 
+try:
+    from app.excel_export import new_workbook, styled_row, iter_query, save_spooled
+except Exception:
+    from excel_export import new_workbook, styled_row, iter_query, save_spooled
+
 # Setup logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -88,7 +93,7 @@ class TelegramBotService:
     def _result_text(self, text: str) -> dict:
         return {"kind": "text", "text": text}
 
-    def _result_document(self, data: bytes, filename: str, caption: str) -> dict:
+    def _result_document(self, data: bytes | IO[bytes], filename: str, caption: str) -> dict:
         return {"kind": "document", "data": data, "filename": filename, "caption": caption}
 
     def _result_photo(self, data: bytes, caption: str) -> dict:
@@ -161,7 +166,7 @@ Menu yang tersedia:
             return
 
         try:
-            result = self._execute_in_app_context(lambda: self._process_callback(callback_data))
+            result = self._execute_in_app_context(lambda: self._process_callback(callback_data, chat_id))
             if not result:
                 return
 
@@ -175,9 +180,19 @@ Menu yang tersedia:
                 return
 
             if kind == 'document':
-                bio = io.BytesIO(result['data'])
-                bio.name = result['filename']
-                await context.bot.send_document(chat_id=chat_id, document=bio, caption=result.get('caption', ''))
+                # data: bytes atau file object (mis. spooled temp file hasil export Excel)
+                doc = result['data']
+                if isinstance(doc, (bytes, bytearray)):
+                    doc = io.BytesIO(doc)
+                try:
+                    await context.bot.send_document(
+                        chat_id=chat_id,
+                        document=doc,
+                        filename=result['filename'],
+                        caption=result.get('caption', ''),
+                    )
+                finally:
+                    doc.close()
                 await query.edit_message_text(
                     "✅ File sudah dikirim.",
                     parse_mode='Markdown',
@@ -221,7 +236,7 @@ Menu yang tersedia:
     async def settings_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await self._reply_from_callback(update, 'menu_pengaturan')
     
-    def _process_callback(self, callback_data):
+    def _process_callback(self, callback_data, chat_id=None):
         """Process callback and generate response (runs in Flask app context)."""
         from flask import current_app
         from sqlalchemy import func
@@ -235,22 +250,26 @@ Menu yang tersedia:
                 Transaksi,
                 TransaksiItem,
                 Pengaturan,
-                generate_laporan_hari,
-                generate_laporan_bulan,
-                generate_laporan_tahun,
+                get_report_cache,
+                get_export_queue,
                 backup_database,
+                backup_store,
             )
+            from app import report_queries, sales_analytics, sales_rollup
         except Exception:
+            import report_queries  # type: ignore
+            import sales_analytics  # type: ignore
+            import sales_rollup  # type: ignore
             from app_simple import (  # type: ignore
                 Produk,
                 Member,
                 Transaksi,
                 TransaksiItem,
                 Pengaturan,
-                generate_laporan_hari,
-                generate_laporan_bulan,
-                generate_laporan_tahun,
+                get_report_cache,
+                get_export_queue,
                 backup_database,
+                backup_store,
             )
 
         # Get db session from current_app to ensure proper Flask app context
@@ -275,10 +294,18 @@ Menu yang tersedia:
             hampir = session.query(Produk).filter(Produk.stok > 0, Produk.stok <= Produk.minimal_stok).order_by(Produk.stok.asc()).all()
             text_habis = "\n".join([f"- {p.nama} (stok {p.stok})" for p in habis[:10]]) or "- (tidak ada)"
             text_hampir = "\n".join([f"- {p.nama} (stok {p.stok}, min {p.minimal_stok})" for p in hampir[:10]]) or "- (tidak ada)"
+            saran = sales_analytics.saran_restock(session, date.today(), limit=10)
+            text_saran = "\n".join([
+                f"- {p['nama']} (stok {p['stok']}, "
+                + (f"habis ±{p['hari_habis']:.0f} hari" if p['hari_habis'] is not None else "di bawah minimal")
+                + f", beli {p['saran']})"
+                for p in saran
+            ]) or "- (tidak ada)"
             msg = (
                 "⚠️ *PRODUK HABIS & HAMPIR HABIS*\n\n"
                 f"🔴 Habis: *{len(habis)}*\n{text_habis}\n\n"
                 f"🟡 Hampir habis: *{len(hampir)}*\n{text_hampir}\n\n"
+                f"🚚 Saran restock (prediksi 7 hari):\n{text_saran}\n\n"
                 "Klik tombol di bawah untuk download Excel."
             )
             kb = InlineKeyboardMarkup([
@@ -288,13 +315,9 @@ Menu yang tersedia:
             return self._result_edit(msg, kb)
 
         if callback_data == 'stok_download_excel':
-            habis = session.query(Produk).filter(Produk.stok <= 0).order_by(Produk.nama).all()
-            hampir = session.query(Produk).filter(Produk.stok > 0, Produk.stok <= Produk.minimal_stok).order_by(Produk.stok.asc()).all()
-
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Stok Alert"
-            ws.append(["Status", "Kode", "Nama", "Stok", "Minimal Stok", "Kategori"]) 
+            wb = new_workbook()
+            ws = wb.create_sheet("Stok Alert")
+            ws.append(styled_row(ws, ["Status", "Kode", "Nama", "Stok", "Minimal Stok", "Kategori"], 'kasir_header_plain'))
 
             def kategori_name(prod):
                 try:
@@ -302,17 +325,16 @@ Menu yang tersedia:
                 except Exception:
                     return ""
 
-            for p in habis:
-                ws.append(["HABIS", getattr(p, 'kode', ''), p.nama, p.stok, getattr(p, 'minimal_stok', ''), kategori_name(p)])
-            for p in hampir:
-                ws.append(["HAMPIR", getattr(p, 'kode', ''), p.nama, p.stok, getattr(p, 'minimal_stok', ''), kategori_name(p)])
+            # Baris ditulis per chunk query (write-only), file dikirim dari spooled temp file
+            habis = session.query(Produk).filter(Produk.stok <= 0).order_by(Produk.nama)
+            hampir = session.query(Produk).filter(Produk.stok > 0, Produk.stok <= Produk.minimal_stok).order_by(Produk.stok.asc())
+            for status, query in (("HABIS", habis), ("HAMPIR", hampir)):
+                for p in iter_query(query):
+                    ws.append([status, getattr(p, 'kode', ''), p.nama, p.stok, getattr(p, 'minimal_stok', ''), kategori_name(p)])
 
-            output = io.BytesIO()
-            wb.save(output)
-            data = output.getvalue()
             filename = f"stok_alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             caption = "📎 Excel stok habis & hampir habis"
-            return self._result_document(data, filename, caption)
+            return self._result_document(save_spooled(wb), filename, caption)
 
         if callback_data == 'm_member':
             # Top 10 member by total spent (all time)
@@ -408,44 +430,33 @@ Menu yang tersedia:
 
         if callback_data == 'm_total_penjualan':
             today = date.today()
-            transaksi_list = session.query(Transaksi).filter(func.date(Transaksi.tanggal) == today).all()
-            total_penjualan = sum(float(t.total or 0) for t in transaksi_list)
+            summary = report_queries.ringkasan(session, today, today)
+            target, target_source = sales_analytics.target_harian(session, today)
+            progress = summary['total_penjualan'] / target * 100 if target else 0
+            growth = sales_analytics.tren_penjualan(session, today)['growth_mingguan']
+            growth_text = f"{growth:+.1f}%" if growth is not None else "N/A"
             return self._result_edit(
-                f"💰 *TOTAL PENJUALAN (HARI INI)*\n\nTanggal: {today.strftime('%d %B %Y')}\nTotal: *Rp {total_penjualan:,.0f}*\nTransaksi: *{len(transaksi_list)}*",
+                f"💰 *TOTAL PENJUALAN (HARI INI)*\n\nTanggal: {today.strftime('%d %B %Y')}\nTotal: *Rp {summary['total_penjualan']:,.0f}*\nTransaksi: *{summary['total_transaksi']}*\n\n"
+                f"🎯 Target{' (prediksi)' if target_source == 'prediksi' else ''}: Rp {target:,.0f} ({progress:.0f}%)\n"
+                f"📈 7 hari vs minggu lalu: {growth_text}",
                 self._back_menu_markup(),
             )
 
         if callback_data == 'm_total_keuntungan':
             today = date.today()
-            transaksi_list = session.query(Transaksi).filter(func.date(Transaksi.tanggal) == today).all()
-            keuntungan = 0.0
-            for t in transaksi_list:
-                for it in getattr(t, 'items', []) or []:
-                    hb = it.produk.harga_beli if getattr(it, 'produk', None) else 0
-                    keuntungan += (float(it.harga or 0) - float(hb or 0)) * float(it.jumlah or 0)
+            keuntungan = report_queries.ringkasan(session, today, today)['total_keuntungan']
             return self._result_edit(
                 f"📈 *TOTAL KEUNTUNGAN (HARI INI)*\n\nTanggal: {today.strftime('%d %B %Y')}\nKeuntungan: *Rp {keuntungan:,.0f}*",
                 self._back_menu_markup(),
             )
 
         if callback_data == 'm_tren':
-            # 14 days trend
-            from datetime import timedelta
-            end = date.today()
-            start = end - timedelta(days=13)
-            sales_by_date = defaultdict(float)
-            transaksi_list = session.query(Transaksi).filter(func.date(Transaksi.tanggal) >= start).all()
-            for t in transaksi_list:
-                key = t.tanggal.strftime('%Y-%m-%d')
-                sales_by_date[key] += float(t.total or 0)
-
-            labels = []
-            values = []
-            for i in range(14):
-                d = start + timedelta(days=i)
-                k = d.strftime('%Y-%m-%d')
-                labels.append(d.strftime('%d/%m'))
-                values.append(round(sales_by_date.get(k, 0.0), 2))
+            # 14 days trend + moving average 7 hari
+            tren = sales_analytics.tren_penjualan(session, date.today())
+            tanggal = tren['tanggal'][-14:]
+            labels = [f"{t[8:10]}/{t[5:7]}" for t in tanggal]
+            values = tren['omzet'][-14:]
+            ma7 = tren['ma7'][-14:]
 
             config = {
                 "type": "line",
@@ -460,12 +471,20 @@ Menu yang tersedia:
                             "fill": True,
                             "tension": 0.35,
                             "pointRadius": 3,
-                        }
+                        },
+                        {
+                            "label": "Rata-rata 7 hari",
+                            "data": ma7,
+                            "borderColor": "#f39c12",
+                            "borderDash": [6, 4],
+                            "fill": False,
+                            "pointRadius": 0,
+                        },
                     ],
                 },
                 "options": {
                     "plugins": {
-                        "legend": {"display": False},
+                        "legend": {"display": True},
                         "title": {"display": True, "text": "Tren Penjualan 14 Hari"},
                     },
                     "scales": {
@@ -515,6 +534,22 @@ Menu yang tersedia:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             backup_folder = os.path.join(base_dir, 'backups')
             try:
+                # Snapshot terbaru di backup store (dibangun ulang dari chunk)
+                snapshots = backup_store.list_snapshots()
+                if snapshots:
+                    latest = snapshots[0]
+                    tmp_path = os.path.join(backup_folder, f'_download_{latest.id}.db')
+                    try:
+                        backup_store.restore_snapshot(latest.id, tmp_path)
+                        with open(tmp_path, 'rb') as fh:
+                            data = fh.read()
+                    finally:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                    filename = f"kasir_backup_{latest.created_at.strftime('%Y%m%d_%H%M%S')}.db"
+                    return self._result_document(data, filename, "🗄️ Backup database terbaru")
+
+                # Fallback: salinan penuh format lama
                 files = [
                     f for f in os.listdir(backup_folder)
                     if f.startswith('kasir_backup_') and f.endswith('.db')
@@ -545,26 +580,31 @@ Menu yang tersedia:
 
             if callback_data == 'lap_excel_hari':
                 t1 = t2 = today.strftime('%Y-%m-%d')
-                wb = generate_laporan_hari(t1, t2)
                 mode = 'hari'
             elif callback_data == 'lap_excel_bulan':
-                first = today.replace(day=1)
-                t1 = first.strftime('%Y-%m-%d')
+                t1 = today.replace(day=1).strftime('%Y-%m-%d')
                 t2 = today.strftime('%Y-%m-%d')
-                wb = generate_laporan_bulan(t1, t2)
                 mode = 'bulan'
             else:
-                first = today.replace(month=1, day=1)
-                t1 = first.strftime('%Y-%m-%d')
+                t1 = today.replace(month=1, day=1).strftime('%Y-%m-%d')
                 t2 = today.strftime('%Y-%m-%d')
-                wb = generate_laporan_tahun(t1, t2)
                 mode = 'tahun'
 
-            output = io.BytesIO()
-            wb.save(output)
+            # Antrian yang sama dengan export web; file dikirim ke chat ini setelah job selesai
             filename = f"laporan_keuangan_{mode}_{now.strftime('%Y%m%d_%H%M%S')}.xlsx"
-            caption = f"📊 Laporan keuangan ({mode}) {t1} s/d {t2}"
-            return self._result_document(output.getvalue(), filename, caption)
+            job = get_export_queue().enqueue(
+                'laporan_excel',
+                {'tanggal_mulai': t1, 'tanggal_selesai': t2, 'mode': mode},
+                filename,
+                telegram_chat_id=chat_id,
+            )
+            msg = (
+                "⏳ *LAPORAN SEDANG DIBUAT*\n\n"
+                f"Periode: {t1} s/d {t2} ({mode})\n"
+                f"Job: `{job['id'][:8]}`\n\n"
+                "File akan dikirim otomatis setelah selesai."
+            )
+            return self._result_edit(msg, self._back_menu_markup())
 
         # -------------------- RESET DATA (SAFE: NO PRODUCT TOUCH) --------------------
         if callback_data == 'm_reset':
@@ -632,6 +672,8 @@ Menu yang tersedia:
                 # Hapus item dulu, baru transaksi
                 items_deleted = session.query(TransaksiItem).delete(synchronize_session=False)
                 trx_deleted = session.query(Transaksi).delete(synchronize_session=False)
+                sales_rollup.clear(session)
+                get_report_cache().clear()
                 session.commit()
                 msg = (
                     "✅ *RESET TRANSAKSI SELESAI*\n\n"
@@ -676,6 +718,8 @@ Menu yang tersedia:
                 session.query(Transaksi).update({Transaksi.member_id: None}, synchronize_session=False)
                 items_deleted = session.query(TransaksiItem).delete(synchronize_session=False)
                 trx_deleted = session.query(Transaksi).delete(synchronize_session=False)
+                sales_rollup.clear(session)
+                get_report_cache().clear()
                 members_deleted = session.query(Member).delete(synchronize_session=False)
                 session.commit()
             except Exception as e:
@@ -739,25 +783,13 @@ Menu yang tersedia:
         
         if callback_data == 'laporan_hari_ini':
             today = date.today()
-            transaksi_list = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) == today
-            ).all()
-            
-            total_penjualan = sum(t.total for t in transaksi_list)
-            total_transaksi = len(transaksi_list)
-            
-            # Hitung keuntungan
-            total_keuntungan = 0
-            for t in transaksi_list:
-                for item in t.items:
-                    harga_beli = item.produk.harga_beli if item.produk else 0
-                    total_keuntungan += (item.harga - harga_beli) * item.jumlah
-            
-            # Payment method breakdown
-            payment_count = defaultdict(int)
-            for t in transaksi_list:
-                payment_count[t.payment_method or 'tunai'] += 1
+            summary = report_queries.ringkasan(session, today, today)
+            total_penjualan = summary['total_penjualan']
+            total_transaksi = summary['total_transaksi']
+            total_keuntungan = summary['total_keuntungan']
             
+            # Payment method breakdown (COUNT per metode di SQL)
+            payment_count = report_queries.distribusi_pembayaran(session, today, today)
             payment_text = "\n".join([f"  • {k}: {v} transaksi" for k, v in payment_count.items()])
             
             return f"""
@@ -776,29 +808,20 @@ Menu yang tersedia:
         
         elif callback_data == 'omzet_hari_ini':
             today = date.today()
-            transaksi_list = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) == today
-            ).all()
-            
-            total_penjualan = sum(t.total for t in transaksi_list)
-            total_transaksi = len(transaksi_list)
+            summary = report_queries.ringkasan(session, today, today)
+            total_penjualan = summary['total_penjualan']
+            total_transaksi = summary['total_transaksi']
             
             if total_transaksi > 0:
                 avg_transaksi = total_penjualan / total_transaksi
             else:
                 avg_transaksi = 0
             
-            # Group by hour
-            sales_by_hour = defaultdict(float)
-            for t in transaksi_list:
-                hour = t.tanggal.hour
-                sales_by_hour[hour] += t.total
-            
-            # Peak hour
-            if sales_by_hour:
-                peak_hour = max(sales_by_hour, key=sales_by_hour.get)
-                peak_sales = sales_by_hour[peak_hour]
-                peak_text = f"Jam {peak_hour}:00 (Rp {peak_sales:,.0f})"
+            # Peak hour (omzet per jam dihitung di SQL)
+            per_jam = sales_analytics.profil_jam(session, today, today)
+            peak_hour = per_jam['jam_tersibuk']
+            if peak_hour is not None:
+                peak_text = f"Jam {peak_hour}:00 (Rp {per_jam['omzet'][peak_hour]:,.0f})"
             else:
                 peak_text = "-"
             
@@ -817,26 +840,12 @@ Menu yang tersedia:
         
         elif callback_data == 'produk_terlaris':
             today = date.today()
-            transaksi_list = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) == today
-            ).all()
-            
-            product_sales = Counter()
-            product_qty = Counter()
-            
-            for t in transaksi_list:
-                for item in t.items:
-                    product_name = item.produk.nama if item.produk else 'Unknown'
-                    product_sales[product_name] += item.subtotal
-                    product_qty[product_name] += item.jumlah
-            
-            top_5 = product_sales.most_common(5)
+            top_5 = report_queries.produk_terlaris(session, today, today, limit=5)
             
             if top_5:
                 product_text = ""
-                for idx, (name, sales) in enumerate(top_5, 1):
-                    qty = product_qty[name]
-                    product_text += f"{idx}. {name}\n   💰 Rp {sales:,.0f} | 📦 {qty} pcs\n\n"
+                for idx, p in enumerate(top_5, 1):
+                    product_text += f"{idx}. {p['nama']}\n   💰 Rp {p['omzet']:,.0f} | 📦 {p['jumlah']} pcs\n\n"
             else:
                 product_text = "Belum ada penjualan hari ini"
             
@@ -905,6 +914,14 @@ Menu yang tersedia:
             else:
                 product_text = "✅ Semua produk stok aman!"
             
+            # Prediksi: produk yang akan habis dalam 7 hari ke depan
+            saran = sales_analytics.saran_restock(session, date.today(), limit=5)
+            if saran:
+                product_text += "\n*🚚 Saran Restock (prediksi 7 hari):*\n"
+                for p in saran:
+                    habis = f"habis ±{p['hari_habis']:.0f} hari" if p['hari_habis'] is not None else "stok kurang"
+                    product_text += f"• {p['nama']} - Stok: {p['stok']}, {habis}, beli {p['saran']}\n"
+            
             return f"""
 ⚠️ *ALERT STOK RENDAH*
 
@@ -915,35 +932,23 @@ Menu yang tersedia:
         
         elif callback_data == 'grafik_penjualan':
             # 7 hari terakhir
-            from datetime import timedelta
-            today = date.today()
-            seven_days_ago = today - timedelta(days=6)
-            
-            sales_by_date = defaultdict(float)
-            transaksi_list = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) >= seven_days_ago
-            ).all()
-            
-            for t in transaksi_list:
-                date_str = t.tanggal.strftime('%d/%m')
-                sales_by_date[date_str] += t.total
+            tren = sales_analytics.tren_penjualan(session, date.today())
+            tanggal = tren['tanggal'][-7:]
+            omzet = tren['omzet'][-7:]
             
             # Simple text graph
-            if sales_by_date:
-                max_sales = max(sales_by_date.values())
+            max_sales = max(omzet)
+            if max_sales > 0:
                 graph_text = ""
-                for d in range(7):
-                    curr_date = seven_days_ago + timedelta(days=d)
-                    date_str = curr_date.strftime('%d/%m')
-                    sales = sales_by_date.get(date_str, 0)
-                    bar_length = int((sales / max_sales) * 10) if max_sales > 0 else 0
-                    bar = "█" * bar_length
+                for t, sales in zip(tanggal, omzet):
+                    date_str = f"{t[8:10]}/{t[5:7]}"
+                    bar = "█" * int((sales / max_sales) * 10)
                     graph_text += f"{date_str}: {bar} Rp {sales:,.0f}\n"
             else:
                 graph_text = "Belum ada data penjualan 7 hari terakhir"
             
-            total_7days = sum(sales_by_date.values())
-            avg_7days = total_7days / 7 if total_7days > 0 else 0
+            total_7days = tren['total_7_hari']
+            avg_7days = tren['rata_7_hari']
             
             return f"""
 📈 *GRAFIK PENJUALAN 7 HARI*
@@ -991,40 +996,25 @@ Menu yang tersedia:
             from datetime import timedelta
             today = date.today()
             week_ago = today - timedelta(days=6)
+            tren = sales_analytics.tren_penjualan(session, today)
             
-            # Get this week's data
-            week_transaksi = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) >= week_ago
-            ).all()
+            week_total = tren['total_7_hari']
+            week_trans_count = tren['transaksi_7_hari']
+            week_avg = tren['rata_per_transaksi_7_hari']
             
-            week_total = sum(t.total for t in week_transaksi)
-            week_trans_count = len(week_transaksi)
-            week_avg = week_total / week_trans_count if week_trans_count > 0 else 0
-            
-            # Get last week's data for comparison
-            last_week_start = week_ago - timedelta(days=7)
-            last_week_transaksi = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) >= last_week_start,
-                func.date(Transaksi.tanggal) < week_ago
-            ).all()
-            
-            last_week_total = sum(t.total for t in last_week_transaksi)
-            
-            # Calculate growth
-            if last_week_total > 0:
-                growth = ((week_total - last_week_total) / last_week_total) * 100
+            # Growth vs 7 hari sebelumnya
+            growth = tren['growth_mingguan']
+            if growth is not None:
                 growth_text = f"📈 +{growth:.1f}%" if growth > 0 else f"📉 {growth:.1f}%"
             else:
                 growth_text = "🔄 N/A"
             
             # Best day
-            sales_by_date = defaultdict(float)
-            for t in week_transaksi:
-                date_str = t.tanggal.strftime('%d %B')
-                sales_by_date[date_str] += t.total
-            
-            best_day = max(sales_by_date, key=sales_by_date.get) if sales_by_date else "-"
-            best_day_sales = sales_by_date.get(best_day, 0) if best_day != "-" else 0
+            if tren['hari_terbaik']:
+                best_day = date.fromisoformat(tren['hari_terbaik']['tanggal']).strftime('%d %B')
+                best_day_sales = tren['hari_terbaik']['omzet']
+            else:
+                best_day, best_day_sales = "-", 0
             
             return f"""
 📊 *PERFORMA MINGGU INI*
@@ -1044,14 +1034,10 @@ Menu yang tersedia:
         
         elif callback_data == 'target_penjualan':
             today = date.today()
-            transaksi_today = session.query(Transaksi).filter(
-                func.date(Transaksi.tanggal) == today
-            ).all()
-            
-            sales_today = sum(t.total for t in transaksi_today)
+            sales_today = report_queries.ringkasan(session, today, today)['total_penjualan']
             
-            # Default target (bisa dikonfigurasi)
-            daily_target = 5000000  # Rp 5 juta per hari
+            # TARGET_PENJUALAN_HARIAN, atau prediksi dari pola 28 hari terakhir
+            daily_target, target_source = sales_analytics.target_harian(session, today)
             
             progress = (sales_today / daily_target) * 100 if daily_target > 0 else 0
             progress_bar = "█" * int(progress / 10) + "░" * (10 - int(progress / 10))
@@ -1065,7 +1051,7 @@ Menu yang tersedia:
 {today.strftime('%d %B %Y')}
 
 💰 Omzet Sekarang: Rp {sales_today:,.0f}
-🎯 Target Harian: Rp {daily_target:,.0f}
+🎯 Target Harian: Rp {daily_target:,.0f}{' (prediksi)' if target_source == 'prediksi' else ''}
 
 📊 Progress: {progress:.1f}%
 [{progress_bar}]
@@ -1223,6 +1209,44 @@ Pilih menu di atas untuk melanjutkan
             self.loop
         )
     
+    def send_message_sync(self, chat_id, message):
+        """Synchronous wrapper for sending a message to one chat"""
+        if not self.application or not self.loop:
+            return
+        
+        asyncio.run_coroutine_threadsafe(
+            self._send_message_to_chat(chat_id, message),
+            self.loop
+        )
+    
+    def send_document_sync(self, chat_id, path, filename, caption=''):
+        """Synchronous wrapper for sending a file (e.g. finished export job) to one chat"""
+        if not self.application or not self.loop or not path:
+            return
+        
+        asyncio.run_coroutine_threadsafe(
+            self._send_document_to_chat(chat_id, path, filename, caption),
+            self.loop
+        )
+    
+    async def _send_message_to_chat(self, chat_id, message):
+        try:
+            await self.application.bot.send_message(chat_id=int(chat_id), text=message)
+        except Exception as e:
+            logger.error(f"Failed to send message to {chat_id}: {e}")
+    
+    async def _send_document_to_chat(self, chat_id, path, filename, caption):
+        try:
+            with open(path, 'rb') as doc:
+                await self.application.bot.send_document(
+                    chat_id=int(chat_id),
+                    document=doc,
+                    filename=filename,
+                    caption=caption,
+                )
+        except Exception as e:
+            logger.error(f"Failed to send document to {chat_id}: {e}")
+    
     async def _send_message_to_admins(self, message):
         """Helper to send message to all admins"""
         if not self.application:
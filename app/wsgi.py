@@ -0,0 +1,81 @@
+"""
+Entry point WSGI produksi untuk Kasir Toko Sembako.
+
+Gunicorn (Linux/Docker, lihat gunicorn.conf.py):
+    gunicorn -c gunicorn.conf.py app.wsgi:application
+
+Waitress (Windows / tanpa gunicorn):
+    python -m app.wsgi
+
+Setiap worker memanggil `init_server()`; app Flask sendiri dibuat oleh
+`app.factory.create_app()` saat import app.app_simple. Migrasi skema
+dijalankan bergiliran di bawah file lock, lalu worker berebut
+`instance/leader.lock`; hanya leader yang menjalankan Telegram bot,
+scheduler, backup worker, dan pemulihan job export yang terputus.
+"""
+
+import os
+
+from app.app_simple import (
+    app,
+    db_path,
+    init_database,
+    ensure_db_columns,
+    start_scheduler,
+    get_backup_worker,
+    print_startup_banner,
+    _start_telegram_bot_if_configured,
+    recover_export_jobs,
+)
+from app.leader import file_lock, initialize_leader_lock
+
+
+_initialized = False
+
+
+def _on_elected() -> None:
+    worker = get_backup_worker()
+    if worker:
+        worker.activate()
+    start_scheduler()
+    _start_telegram_bot_if_configured(app)
+    # Setelah bot jalan: hasil job dari Telegram dikirim lewat bot leader
+    recover_export_jobs()
+
+
+def init_server():
+    """Siapkan database & leader election untuk server WSGI (idempotent per proses)."""
+    global _initialized
+    if _initialized:
+        return app
+
+    print_startup_banner()
+    instance_dir = os.path.dirname(db_path)
+    with file_lock(os.path.join(instance_dir, 'init.lock')):
+        init_database()
+        ensure_db_columns()
+
+    # Follower tidak menjalankan backup; leader mendeteksi perubahan lewat data_version
+    worker = get_backup_worker()
+    if worker:
+        worker.deactivate()
+
+    lock = initialize_leader_lock(os.path.join(instance_dir, 'leader.lock'))
+    lock.on_elected(_on_elected)
+    lock.start()
+
+    _initialized = True
+    return app
+
+
+application = init_server()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    host = os.environ.get('WAITRESS_HOST', '0.0.0.0')
+    port = int(os.environ.get('WAITRESS_PORT', '5000'))
+    threads = int(os.environ.get('WAITRESS_THREADS', '8'))
+    print(f'[WSGI] Waitress listening on http://{host}:{port} ({threads} threads)')
+    serve(application, host=host, port=port, threads=threads)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark pencarian produk: filter ILIKE lama vs index FTS5 trigram.
+
+Katalog sintetis (default 20.000 produk, 1 dari 4 punya varian barcode) di
+database sementara (tidak menyentuh instance/kasir.db). Diukur per query:
+- `limit`: 50 hasil teratas (seperti `/api/produk` dari kotak cari kasir)
+- `count`: jumlah total hasil (seperti paginasi `/produk`)
+
+Kolom LIKE/FTS = jumlah hasil. FTS mencocokkan tiap kata (AND), jadi
+"pepsodent 19" juga menemukan "Pepsodent Pasta Gigi 19gr".
+
+Jalankan dengan: python benchmarks/bench_cari_produk.py [jumlah_produk]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+TMP_DIR = tempfile.mkdtemp(prefix='kasir_bench_')
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace(os.sep, '/')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import product_search  # noqa: E402
+from app.factory import create_app  # noqa: E402
+from app.models import db, Produk, VarianProduk  # noqa: E402
+
+MEREK = ['Indomie', 'Sedaap', 'Kapal Api', 'Sariwangi', 'Bimoli', 'Sunlight', 'Lifebuoy', 'Gulaku', 'Rose Brand',
+         'Ultra', 'Frisian Flag', 'Abc', 'Sasa', 'Royco', 'Pepsodent', 'Rinso', 'So Klin', 'Teh Pucuk', 'Aqua', 'Roma']
+JENIS = ['Mie Goreng', 'Kopi', 'Teh Celup', 'Minyak Goreng', 'Sabun Cuci', 'Sabun Mandi', 'Gula Pasir', 'Tepung',
+         'Susu', 'Kecap', 'Saos', 'Penyedap', 'Pasta Gigi', 'Deterjen', 'Air Mineral', 'Biskuit', 'Beras', 'Garam']
+QUERIES = ['kop', 'kopi', 'goreng', 'sabun mandi', 'abc', 'pepsodent 19', 'VB00004', '899000001234']
+REPEAT = 20
+
+
+def setup(n):
+    rng = random.Random(n)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Produk.__table__.insert(), [
+            {'kode': f'{899000000000 + i}', 'nama': f'{rng.choice(MEREK)} {rng.choice(JENIS)} {rng.randint(1, 999)}gr',
+             'harga_beli': 1000, 'harga_jual': 1500, 'stok': 10, 'minimal_stok': 5, 'satuan': 'pcs'}
+            for i in range(n)
+        ])
+        db.session.execute(VarianProduk.__table__.insert(), [
+            {'produk_id': i, 'nama_varian': 'Varian', 'barcode_varian': f'VB{i:07d}', 'stok': 1}
+            for i in range(1, n + 1, 4)
+        ])
+        # Index yang sama dengan init_database()
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_produk_nama ON produk(nama)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_varian_barcode ON varian_produk(barcode_varian)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_varian_produk_id ON varian_produk(produk_id)"))
+        db.session.commit()
+        t0 = time.perf_counter()
+        product_search.ensure_index(db.session)
+        print(f'Index dibangun dalam {time.perf_counter() - t0:.2f} s untuk {n} produk\n')
+    return app
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn()
+    return (time.perf_counter() - t0) / REPEAT * 1000, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    app = setup(n)
+    print(f'{"query":<15} {"LIKE":>6} {"FTS":>6} {"LIKE limit":>11} {"FTS limit":>10} {"LIKE count":>11} {"FTS count":>10}  (ms)')
+    with app.app_context():
+        for q in QUERIES:
+            legacy = Produk.query.filter(product_search.legacy_filter(q))
+            fts, rank = product_search.apply_search(db.session, Produk.query, q)
+            like_limit, _ = timed(lambda: legacy.order_by(Produk.nama).limit(50).all())
+            fts_limit, _ = timed(lambda: fts.order_by(*rank).limit(50).all())
+            like_count, total = timed(lambda: legacy.count())
+            fts_count, fts_total = timed(lambda: fts.order_by(None).count())
+            print(f'{q:<15} {total:>6} {fts_total:>6} {like_limit:>11.2f} {fts_limit:>10.2f} {like_count:>11.2f} {fts_count:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark latency checkout terhadap ukuran keranjang.
+
+Memakai database sementara (tidak menyentuh instance/kasir.db), membuat
+produk dummy, lalu mengukur waktu dan jumlah query SQL per checkout untuk
+beberapa ukuran keranjang.
+
+Jalankan dengan: python benchmarks/bench_checkout.py [jumlah_ulang]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import statistics
+
+TMP_DIR = tempfile.mkdtemp(prefix='kasir_bench_')
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace(os.sep, '/')
+os.environ.setdefault('BACKUP_MIN_INTERVAL_SECONDS', '86400')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+
+from app.app_simple import app, db, User, Produk, VarianProduk, get_backup_worker
+
+BASKET_SIZES = [1, 5, 10, 20, 40, 80]
+N_PRODUK = 200
+
+
+def setup_data():
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', nama='Bench', role='admin')
+        user.set_password('Bench123')
+        db.session.add(user)
+        for i in range(N_PRODUK):
+            p = Produk(kode=f'B{i:05d}', nama=f'Produk Bench {i}', harga_beli=1000, harga_jual=1500,
+                       stok=10_000_000, minimal_stok=5, satuan='pcs')
+            db.session.add(p)
+            db.session.flush()
+            if i % 4 == 0:
+                db.session.add(VarianProduk(produk_id=p.id, nama_varian='Varian A',
+                                            barcode_varian=f'V{i:05d}', stok=10_000_000))
+        db.session.commit()
+        return user.id
+
+
+def build_basket(size):
+    items = []
+    for i in range(size):
+        pid = (i % N_PRODUK) + 1
+        item = {'id': pid, 'quantity': 1, 'price': 1500}
+        if (pid - 1) % 4 == 0 and i % 2 == 0:
+            item['scanned_variant'] = {'barcode': f'V{pid - 1:05d}', 'nama': 'Varian A'}
+        items.append(item)
+    return items
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    user_id = setup_data()
+
+    worker = get_backup_worker()
+    if worker:
+        worker.stop()
+
+    query_count = {'n': 0}
+    with app.app_context():
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            query_count['n'] += 1
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    devnull = open(os.devnull, 'w')
+    print(f"{'basket':>8} {'median ms':>10} {'p95 ms':>10} {'queries':>8}")
+    for size in BASKET_SIZES:
+        payload = {'items': build_basket(size), 'bayar': 10_000_000, 'payment_method': 'tunai'}
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            query_count['n'] = 0
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                t0 = time.perf_counter()
+                resp = client.post('/transaksi/checkout', json=payload)
+                elapsed = time.perf_counter() - t0
+            finally:
+                sys.stdout = stdout
+            if not resp.get_json().get('success'):
+                print(f'  checkout gagal: {resp.get_json()}')
+                return 1
+            timings.append(elapsed * 1000)
+            queries.append(query_count['n'])
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f'{size:>8} {statistics.median(timings):>10.2f} {p95:>10.2f} {max(queries):>8}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark waktu import (cold start) dengan budget regresi.
+
+Setiap modul di-import di proses Python baru dengan `-X importtime`; waktu
+kumulatif modul diambil median dari beberapa percobaan. Script gagal (exit 1)
+jika median melewati budget, atau jika modul berat (openpyxl, numpy,
+telegram, apscheduler, requests, cryptography) ikut ter-import saat start.
+
+Budget bisa diatur lewat env, mis. IMPORT_BUDGET_APP_MS=1500.
+
+Jalankan dengan: python benchmarks/bench_import_time.py [jumlah_ulang]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (modul, env budget, budget default ms)
+TARGETS = [
+    ('app.models', 'IMPORT_BUDGET_MODELS_MS', 900),
+    ('app.factory', 'IMPORT_BUDGET_FACTORY_MS', 950),
+    ('app.app_simple', 'IMPORT_BUDGET_APP_MS', 1100),
+]
+
+# Modul yang harus di-import saat dipakai saja (bukan saat start)
+LAZY_MODULES = ('openpyxl', 'numpy', 'telegram', 'apscheduler', 'requests', 'cryptography')
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def measure(module):
+    """Return (cumulative_ms, set modul top-level yang ter-import)."""
+    env = dict(os.environ)
+    env.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'import {module} gagal:\n{proc.stderr[-2000:]}')
+
+    cumulative = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        imported.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(m.group(2)) / 1000.0
+    return cumulative or 0.0, imported
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    failed = False
+
+    print(f"{'modul':<18} {'median ms':>10} {'min ms':>8} {'budget':>8}  status")
+    for module, env_name, default_budget in TARGETS:
+        budget = float(os.environ.get(env_name, default_budget))
+        timings = []
+        heavy = set()
+        for _ in range(repeat):
+            ms, imported = measure(module)
+            timings.append(ms)
+            heavy |= imported & set(LAZY_MODULES)
+
+        median = statistics.median(timings)
+        status = 'OK'
+        if median > budget:
+            status = 'LEWAT BUDGET'
+            failed = True
+        if heavy:
+            status += f" (eager import: {', '.join(sorted(heavy))})"
+            failed = True
+        print(f'{module:<18} {median:>10.1f} {min(timings):>8.1f} {budget:>8.0f}  {status}')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
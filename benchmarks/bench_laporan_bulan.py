@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark export laporan bulanan terhadap jumlah hari vs jumlah transaksi.
+
+`generate_laporan_bulan` membaca rollup tanggal × produk, jadi waktunya
+seharusnya naik sebanding jumlah hari berbeda (× produk terjual per hari),
+bukan jumlah transaksi. Skenario di bawah membandingkan transaksi/hari ×10
+(hari tetap) dengan hari ×10 (transaksi/hari tetap).
+
+Memakai database sementara (tidak menyentuh instance/kasir.db).
+
+Jalankan dengan: python benchmarks/bench_laporan_bulan.py [jumlah_ulang]
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+TMP_DIR = tempfile.mkdtemp(prefix='kasir_bench_')
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace(os.sep, '/')
+os.environ.setdefault('BACKUP_MIN_INTERVAL_SECONDS', '86400')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.app_simple import (  # noqa: E402
+    app, db, Produk, Transaksi, TransaksiItem, PenjualanHarian, PenjualanHarianProduk,
+    generate_laporan_bulan, get_backup_worker, sales_rollup,
+)
+
+# Sedikit produk: hampir semua produk terjual setiap hari di semua skenario,
+# jadi baris rollup ≈ hari × N_PRODUK
+N_PRODUK = 20
+# (jumlah hari, transaksi per hari)
+SCENARIOS = [(30, 20), (30, 200), (300, 20)]
+START = date(2025, 1, 1)
+
+
+def setup_produk():
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Produk(kode=f'B{i:05d}', nama=f'Produk Bench {i}', harga_beli=1000 + i, harga_jual=1500 + i,
+                   stok=10_000_000, minimal_stok=5, satuan='pcs')
+            for i in range(N_PRODUK)
+        ])
+        db.session.commit()
+        return [p.id for p in Produk.query.order_by(Produk.id)]
+
+
+def fill_transaksi(produk_ids, days, per_day):
+    """Isi ulang transaksi (3 item per transaksi) lalu rebuild rollup."""
+    rng = random.Random(days * 1000 + per_day)
+    with app.app_context():
+        for model in (TransaksiItem, Transaksi, PenjualanHarianProduk, PenjualanHarian):
+            db.session.query(model).delete(synchronize_session=False)
+
+        trx_rows, item_rows = [], []
+        trx_id = 0
+        for d in range(days):
+            base = datetime.combine(START + timedelta(days=d), datetime.min.time()) + timedelta(hours=8)
+            for n in range(per_day):
+                trx_id += 1
+                total = 0
+                for pid in rng.sample(produk_ids, 3):
+                    qty = rng.randint(1, 5)
+                    item_rows.append({'transaksi_id': trx_id, 'produk_id': pid, 'jumlah': qty,
+                                      'harga': 2000, 'subtotal': qty * 2000})
+                    total += qty * 2000
+                trx_rows.append({'id': trx_id, 'kode_transaksi': f'TRX{trx_id:08d}',
+                                 'tanggal': base + timedelta(seconds=n * 30), 'total': total,
+                                 'bayar': total, 'kembalian': 0, 'payment_method': 'tunai'})
+        db.session.execute(Transaksi.__table__.insert(), trx_rows)
+        db.session.execute(TransaksiItem.__table__.insert(), item_rows)
+        sales_rollup.rebuild(db.session)
+        db.session.commit()
+        return trx_id, db.session.query(PenjualanHarianProduk).count()
+
+
+def run_export(days, repeat):
+    selesai = START + timedelta(days=days - 1)
+    timings = []
+    peak = 0
+    with app.app_context():
+        for i in range(repeat):
+            if i == 0:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            generate_laporan_bulan(START.isoformat(), selesai.isoformat()).save(io.BytesIO())
+            timings.append(time.perf_counter() - t0)
+            if i == 0:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            db.session.remove()
+    # Run pertama (dengan tracemalloc) tidak dihitung jika ada pengulangan
+    timings = timings[1:] or timings
+    return min(timings), peak
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    worker = get_backup_worker()
+    if worker:
+        worker.stop()
+
+    produk_ids = setup_produk()
+    print(f'{"hari":>6} {"trx/hari":>9} {"transaksi":>10} {"baris":>7} {"waktu (s)":>10} {"ms/hari":>8} '
+          f'{"us/trx":>8} {"peak MB":>8}')
+    for days, per_day in SCENARIOS:
+        total_trx, baris = fill_transaksi(produk_ids, days, per_day)
+        best, peak = run_export(days, repeat)
+        print(f'{days:>6} {per_day:>9} {total_trx:>10} {baris:>7} {best:>10.3f} {best * 1000 / days:>8.2f} '
+              f'{best * 1e6 / total_trx:>8.1f} {peak / 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
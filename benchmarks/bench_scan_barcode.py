@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark scan barcode di kasir: pencarian `/api/produk` lama vs lookup persis.
+
+- `cari`: ILIKE + 50 hasil `to_dict()` seperti `/api/produk?search=<barcode>`
+  (lalu browser mencari yang persis sama)
+- `lookup`: `BarcodeIndex.lookup()` (map di memori + query versi & stok)
+
+Katalog sintetis (default 20.000 produk, 1 dari 4 punya varian barcode) di
+database sementara (tidak menyentuh instance/kasir.db).
+
+Jalankan dengan: python benchmarks/bench_scan_barcode.py [jumlah_produk]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+TMP_DIR = tempfile.mkdtemp(prefix='kasir_bench_')
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace(os.sep, '/')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import barcode_index, product_search  # noqa: E402
+from app.factory import create_app  # noqa: E402
+from app.models import db, Produk, VarianProduk  # noqa: E402
+
+REPEAT = 200
+
+
+def setup(n):
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(Produk.__table__.insert(), [
+            {'kode': f'{899000000000 + i}', 'nama': f'Produk {i}', 'harga_beli': 1000, 'harga_jual': 1500,
+             'stok': 10, 'minimal_stok': 5, 'satuan': 'pcs'}
+            for i in range(n)
+        ])
+        db.session.execute(VarianProduk.__table__.insert(), [
+            {'produk_id': i, 'nama_varian': 'Varian', 'barcode_varian': f'VB{i:07d}', 'stok': 1}
+            for i in range(1, n + 1, 4)
+        ])
+        # Index yang sama dengan init_database()
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_varian_barcode ON varian_produk(barcode_varian)"))
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_varian_produk_id ON varian_produk(produk_id)"))
+        db.session.commit()
+        barcode_index.ensure_triggers(db.session)
+    return app
+
+
+def timed(fn, codes):
+    t0 = time.perf_counter()
+    for code in codes:
+        fn(code)
+    return (time.perf_counter() - t0) / len(codes) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    app = setup(n)
+    rng = random.Random(n)
+    scans = {
+        'kode': [f'{899000000000 + rng.randrange(n)}' for _ in range(REPEAT)],
+        'barcode_varian': [f'VB{rng.randrange(1, n + 1, 4):07d}' for _ in range(REPEAT)],
+    }
+    index = barcode_index.BarcodeIndex()
+
+    def cari(code):
+        query = Produk.query.filter(product_search.legacy_filter(code))
+        return [p.to_dict() for p in query.limit(50).all()]
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        index.lookup(db.session, scans['kode'][0])
+        print(f'Map dibangun dalam {(time.perf_counter() - t0) * 1000:.1f} ms untuk {n} produk\n')
+        print(f'{"scan":<15} {"cari":>10} {"lookup":>10}  (ms per scan)')
+        for jenis, codes in scans.items():
+            print(f'{jenis:<15} {timed(cari, codes[:20]):>10.3f} {timed(lambda c: index.lookup(db.session, c), codes):>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
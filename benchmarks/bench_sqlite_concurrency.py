@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark throughput baca+tulis SQLite bersamaan: default vs tuning.
+
+Writer meniru checkout (insert transaksi + item, kurangi stok), reader meniru
+laporan (agregat penjualan per produk). Dijalankan dua kali pada database
+sementara: tanpa PRAGMA (rollback journal, seperti sebelumnya) dan dengan
+pengaturan dari app/db_tuning.py.
+
+Jalankan dengan: python benchmarks/bench_sqlite_concurrency.py [detik] [writer] [reader]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db_tuning import apply_pragmas, get_sqlite_settings
+
+
+N_PRODUK = 500
+N_SEED_TRANSAKSI = 5000
+
+
+def _connect(path, settings):
+    # Mode default memakai timeout bawaan sqlite3 (5 detik), sama seperti sebelum tuning
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if settings is not None:
+        apply_pragmas(conn, settings)
+    return conn
+
+
+def setup(path, settings):
+    conn = _connect(path, settings)
+    conn.executescript('''
+        CREATE TABLE produk (id INTEGER PRIMARY KEY, nama TEXT, stok INTEGER, harga REAL);
+        CREATE TABLE transaksi (id INTEGER PRIMARY KEY, tanggal TEXT, total REAL);
+        CREATE TABLE transaksi_item (id INTEGER PRIMARY KEY, transaksi_id INTEGER, produk_id INTEGER,
+                                     jumlah INTEGER, subtotal REAL);
+        CREATE INDEX ix_item_transaksi ON transaksi_item (transaksi_id);
+        CREATE INDEX ix_transaksi_tanggal ON transaksi (tanggal);
+    ''')
+    conn.executemany('INSERT INTO produk VALUES (?, ?, ?, ?)',
+                     [(i, f'Produk {i}', 10**9, 1000 + i) for i in range(1, N_PRODUK + 1)])
+    for t in range(1, N_SEED_TRANSAKSI + 1):
+        conn.execute('INSERT INTO transaksi VALUES (?, datetime("now"), 0)', (t,))
+        conn.executemany('INSERT INTO transaksi_item (transaksi_id, produk_id, jumlah, subtotal) VALUES (?, ?, 1, 1000)',
+                         [(t, random.randint(1, N_PRODUK)) for _ in range(3)])
+    conn.commit()
+    conn.close()
+
+
+def writer(path, settings, stop, stats):
+    conn = _connect(path, settings)
+    while not stop.is_set():
+        try:
+            cur = conn.cursor()
+            cur.execute('BEGIN')
+            cur.execute('INSERT INTO transaksi (tanggal, total) VALUES (datetime("now"), 0)')
+            tid = cur.lastrowid
+            for produk_id in random.sample(range(1, N_PRODUK + 1), 5):
+                cur.execute('INSERT INTO transaksi_item (transaksi_id, produk_id, jumlah, subtotal) VALUES (?, ?, 1, 1000)',
+                            (tid, produk_id))
+                cur.execute('UPDATE produk SET stok = stok - 1 WHERE id = ? AND stok >= 1', (produk_id,))
+            conn.commit()
+            stats['writes'] += 1
+        except sqlite3.OperationalError:
+            conn.rollback()
+            stats['busy'] += 1
+    conn.close()
+
+
+def reader(path, settings, stop, stats):
+    conn = _connect(path, settings)
+    while not stop.is_set():
+        try:
+            conn.execute('''
+                SELECT p.id, SUM(i.jumlah), SUM(i.subtotal)
+                FROM transaksi_item i JOIN produk p ON p.id = i.produk_id
+                GROUP BY p.id ORDER BY 3 DESC LIMIT 10
+            ''').fetchall()
+            stats['reads'] += 1
+        except sqlite3.OperationalError:
+            stats['busy'] += 1
+    conn.close()
+
+
+def run(label, settings, seconds, n_writers, n_readers):
+    tmpdir = tempfile.mkdtemp(prefix='kasir_bench_')
+    path = os.path.join(tmpdir, 'bench.db')
+    setup(path, settings)
+
+    stop = threading.Event()
+    stats = {'writes': 0, 'reads': 0, 'busy': 0}
+    threads = [threading.Thread(target=writer, args=(path, settings, stop, stats)) for _ in range(n_writers)]
+    threads += [threading.Thread(target=reader, args=(path, settings, stop, stats)) for _ in range(n_readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"{label:>10} {stats['writes'] / seconds:>10.1f} {stats['reads'] / seconds:>10.1f} {stats['busy']:>8}")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n_writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    n_readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    print(f'{n_writers} writer, {n_readers} reader, {seconds:g} detik per mode')
+    print(f"{'mode':>10} {'write/s':>10} {'read/s':>10} {'busy':>8}")
+    run('default', None, seconds, n_writers, n_readers)
+    run('tuned', get_sqlite_settings(), seconds, n_writers, n_readers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
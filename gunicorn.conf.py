@@ -0,0 +1,21 @@
+# Konfigurasi gunicorn untuk Kasir Toko Sembako
+# Jalankan: gunicorn -c gunicorn.conf.py app.wsgi:application
+#
+# Worker dibuat terpisah (tanpa preload) supaya thread backup/scheduler/bot
+# tidak hilang saat fork; leader election di app/wsgi.py memastikan hanya satu
+# worker yang menjalankannya.
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+preload_app = False
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,48 @@
+"""
+Migration script untuk menambah kolom harga_beli (snapshot HPP) ke tabel TransaksiItem
+lalu mengisi item lama.
+
+HPP item lama diambil dari rollup penjualan harian (harga beli saat checkout);
+jika tidak ada, dipakai harga beli produk saat ini.
+
+Jalankan dengan: python migrations/add_harga_beli_transaksi_item.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.factory import create_app
+from app.models import db
+from app import sales_rollup
+
+app = create_app()
+from sqlalchemy import text
+
+def migrate():
+    """Add harga_beli column to TransaksiItem table and backfill existing rows"""
+    with app.app_context():
+        try:
+            inspector = db.inspect(db.engine)
+            column_names = [col['name'] for col in inspector.get_columns('transaksi_item')]
+
+            if 'harga_beli' not in column_names:
+                print("Adding column 'harga_beli' to table 'transaksi_item'...")
+                db.session.execute(text("ALTER TABLE transaksi_item ADD COLUMN harga_beli REAL"))
+            else:
+                print("✓ Column 'harga_beli' sudah ada di tabel 'transaksi_item'")
+
+            # Aman dijalankan ulang: hanya item yang masih NULL
+            filled = sales_rollup.backfill_harga_beli(db.session)
+            db.session.commit()
+            print(f"✓ harga_beli diisi untuk {filled} item transaksi")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Error migrating harga_beli: {str(e)}")
+            return False
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
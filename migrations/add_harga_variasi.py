@@ -10,7 +10,10 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import sqlite3
-from app.app_simple import db, app
+from app.factory import create_app
+from app.models import db
+
+app = create_app()
 
 def migrate():
     """Run migration to add HargaVariasi table"""
@@ -9,7 +9,10 @@ import os
 # Tambahkan path root project
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.app_simple import app, db
+from app.factory import create_app
+from app.models import db
+
+app = create_app()
 
 def migrate():
     with app.app_context():
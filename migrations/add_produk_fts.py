@@ -0,0 +1,41 @@
+"""
+Migration script untuk membuat index pencarian produk (SQLite FTS5 trigram)
+beserta trigger sinkronisasi di tabel produk & varian_produk.
+
+Aman dijalankan ulang: tabel/trigger yang sudah ada dilewati, isi index
+dibangun ulang dari tabel produk.
+
+Jalankan dengan: python migrations/add_produk_fts.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.factory import create_app
+from app.models import db
+from app import product_search
+
+app = create_app()
+
+def migrate():
+    """Create produk_fts table + triggers and rebuild its content"""
+    with app.app_context():
+        try:
+            if not product_search.ensure_index(db.session):
+                print("✗ SQLite ini tidak mendukung FTS5 trigram, pencarian tetap memakai LIKE")
+                return False
+
+            total = product_search.rebuild(db.session)
+            db.session.commit()
+            print(f"✓ Index pencarian produk dibangun ({total} produk)")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Error membuat index pencarian: {str(e)}")
+            return False
+
+if __name__ == '__main__':
+    success = migrate()
+    sys.exit(0 if success else 1)
@@ -7,7 +7,10 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.app_simple import app, db, VarianProduk, Produk
+from app.factory import create_app
+from app.models import db, VarianProduk, Produk
+
+app = create_app()
 from datetime import datetime
 
 def migrate():
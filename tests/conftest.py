@@ -0,0 +1,64 @@
+"""Fixture bersama test: app database in-memory dan helper checkout.
+
+Jalankan dari root project:
+    python -m pytest tests/<file>.py
+"""
+
+import itertools
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from app import sales_rollup  # noqa: E402
+from app.factory import create_app  # noqa: E402
+from app.models import db, Transaksi, TransaksiItem  # noqa: E402
+
+
+_kode = itertools.count(1)
+
+
+@pytest.fixture
+def make_app():
+    """`make_app(uri='sqlite://')` -> app minimal (create_app) dengan skema kosong."""
+    def make(uri='sqlite://'):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': uri})
+        with app.app_context():
+            db.create_all()
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def _checkout(produk, tanggal, jumlah=1, harga_beli=None, kode=None):
+    """
+    Seperti checkout() di app: transaksi + item (harga beli saat itu) + rollup
+    harian, lalu commit. `tanggal` boleh `date` (jam 12:00).
+    """
+    if not isinstance(tanggal, datetime):
+        tanggal = datetime.combine(tanggal, datetime.min.time()).replace(hour=12)
+    harga_beli = produk.harga_beli if harga_beli is None else harga_beli
+    total = produk.harga_jual * jumlah
+    trx = Transaksi(kode_transaksi=kode or f'T{tanggal:%Y%m%d}-{next(_kode):05d}', tanggal=tanggal,
+                    total=total, bayar=total, kembalian=0)
+    db.session.add(trx)
+    db.session.add(TransaksiItem(transaksi_ref=trx, produk_id=produk.id, jumlah=jumlah, harga=produk.harga_jual,
+                                 subtotal=total, harga_beli=harga_beli))
+    sales_rollup.record_checkout(db.session, tanggal.date(), total, [(produk.id, jumlah, produk.harga_jual, harga_beli)])
+    db.session.commit()
+    return trx
+
+
+@pytest.fixture
+def checkout():
+    """Helper `_checkout` (dipakai di dalam app context)."""
+    return _checkout
+
@@ -0,0 +1,71 @@
+"""Test export analitik incremental (partisi bulan + watermark transaksi.id)."""
+
+import csv
+import gzip
+import os
+import tempfile
+from datetime import datetime
+
+from app.analytics_export import export_analytics, read_watermark
+from app.models import db, Produk, Transaksi, TransaksiItem
+
+
+def _setup(app):
+    with app.app_context():
+        db.session.add(Produk(kode='B1', nama='Beras', harga_beli=10000, harga_jual=12000, stok=100))
+        db.session.commit()
+    return app
+
+
+def _rows(out_dir, table):
+    rows = []
+    for root, _, files in os.walk(os.path.join(out_dir, table)):
+        for name in sorted(files):
+            with gzip.open(os.path.join(root, name), 'rt', newline='') as fh:
+                rows.extend(csv.DictReader(fh))
+    return rows
+
+
+def test_incremental_per_bulan(app, checkout):
+    _setup(app)
+    out_dir = tempfile.mkdtemp(prefix='kasir_analytics_')
+    with app.app_context():
+        beras = Produk.query.filter_by(kode='B1').one()
+        checkout(beras, datetime(2026, 1, 5, 9), kode='T1')
+        t2 = checkout(beras, datetime(2026, 2, 1, 10), kode='T2')
+
+        result = export_analytics(db.session, out_dir=out_dir, fmt='csv')
+        assert (result['transaksi'], result['item'], result['partisi']) == (2, 2, ['2026-01', '2026-02'])
+        assert read_watermark(out_dir)['transaksi_id'] == t2.id
+
+        # Tidak ada transaksi baru: tidak ada file partisi baru
+        assert export_analytics(db.session, out_dir=out_dir, fmt='csv')['transaksi'] == 0
+
+        checkout(beras, datetime(2026, 2, 2, 11), kode='T3')
+        result = export_analytics(db.session, out_dir=out_dir, fmt='csv')
+        assert (result['transaksi'], result['partisi']) == (1, ['2026-02'])
+
+        assert sorted(r['kode_transaksi'] for r in _rows(out_dir, 'transaksi')) == ['T1', 'T2', 'T3']
+        items = _rows(out_dir, 'transaksi_item')
+        assert len(items) == 3 and {r['harga_beli'] for r in items} == {'10000.0'}
+        assert [r['nama'] for r in _rows(out_dir, 'produk')] == ['Beras']
+
+
+def test_reset_export_ulang(app, checkout):
+    _setup(app)
+    out_dir = tempfile.mkdtemp(prefix='kasir_analytics_')
+    with app.app_context():
+        beras = Produk.query.filter_by(kode='B1').one()
+        checkout(beras, datetime(2026, 1, 5, 9), kode='T1')
+        checkout(beras, datetime(2026, 1, 6, 9), kode='T2')
+        export_analytics(db.session, out_dir=out_dir, fmt='csv')
+
+        # Reset transaksi: id mulai dari awal lagi -> export penuh, partisi lama dibuang
+        db.session.query(TransaksiItem).delete()
+        db.session.query(Transaksi).delete()
+        db.session.commit()
+        checkout(beras, datetime(2026, 3, 1, 8), kode='R1')
+
+        result = export_analytics(db.session, out_dir=out_dir, fmt='csv')
+        assert result['partisi'] == ['2026-03']
+        assert [r['kode_transaksi'] for r in _rows(out_dir, 'transaksi')] == ['R1']
@@ -0,0 +1,107 @@
+"""Test backup store (app/backup_store.py): restore, GC chunk, add + prune bersamaan."""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.backup_store import BackupStore
+
+
+def _make_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, isi TEXT)')
+    conn.executemany('INSERT INTO t (isi) VALUES (?)', [(os.urandom(200).hex(),) for _ in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def _row_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('SELECT count(*) FROM t').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_gc_lewati_tmp_dan_chunk_baru():
+    tmp = tempfile.mkdtemp()
+    store = BackupStore(os.path.join(tmp, 'store'), chunk_size=4096, codec='gz')
+    db_file = os.path.join(tmp, 'kasir.db')
+    _make_db(db_file, 50)
+    store.add_snapshot(db_file)
+
+    sub_dir = os.path.join(store.chunks_dir, 'ff')
+    os.makedirs(sub_dir, exist_ok=True)
+    sedang_ditulis = os.path.join(sub_dir, 'ff' + '0' * 62 + '.gz.tmp')
+    baru = os.path.join(sub_dir, 'ff' + '1' * 62 + '.gz')
+    lama = os.path.join(sub_dir, 'ff' + '2' * 62 + '.gz')
+    for path in (sedang_ditulis, baru, lama):
+        with open(path, 'wb') as fh:
+            fh.write(b'x')
+    jam_lalu = time.time() - 7200
+    os.utime(lama, (jam_lalu, jam_lalu))
+    os.utime(sedang_ditulis, (jam_lalu, jam_lalu))
+
+    assert store.prune()['chunks_removed'] == 1
+    assert os.path.exists(sedang_ditulis) and os.path.exists(baru) and not os.path.exists(lama)
+    # Tanpa masa tenggang chunk yatim langsung dihapus, .tmp tetap dilewati
+    with store._lock:
+        assert store._gc_chunks(grace_seconds=-1) == 1
+    assert os.path.exists(sedang_ditulis) and not os.path.exists(baru)
+
+
+def test_add_dan_prune_bersamaan():
+    tmp = tempfile.mkdtemp()
+    root = os.path.join(tmp, 'store')
+    awal = datetime(2024, 1, 1)
+    # Snapshot lama di luar retensi: prune menghapus manifest & chunk-nya
+    lama = BackupStore(root, chunk_size=4096, codec='gz')
+    for i in range(6):
+        db_file = os.path.join(tmp, f'lama_{i}.db')
+        _make_db(db_file, 30)
+        lama.add_snapshot(db_file, created_at=awal + timedelta(hours=i))
+
+    db_files = []
+    for i in range(6):
+        db_file = os.path.join(tmp, f'baru_{i}.db')
+        _make_db(db_file, 40 + i)
+        db_files.append(db_file)
+
+    # Dua instance = dua proses (tidak berbagi threading.Lock, hanya file lock)
+    penulis = BackupStore(root, chunk_size=4096, codec='gz')
+    pembersih = BackupStore(root, chunk_size=4096, codec='gz')
+    # Tanpa masa tenggang: yang melindungi chunk snapshot baru hanya file lock
+    pembersih._gc_chunks = lambda: BackupStore._gc_chunks(pembersih, grace_seconds=-1)
+    errors = []
+
+    def tulis():
+        try:
+            for i, db_file in enumerate(db_files):
+                penulis.add_snapshot(db_file, created_at=awal + timedelta(days=1, minutes=i))
+        except Exception as e:
+            errors.append(e)
+
+    def bersihkan():
+        try:
+            for _ in range(6):
+                pembersih.prune(keep_last=20, hourly=0, daily=0, weekly=0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=tulis), threading.Thread(target=bersihkan)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    pembersih.prune(keep_last=6, hourly=0, daily=0, weekly=0)
+    snapshots = penulis.list_snapshots()
+    assert len(snapshots) == 6
+    # Semua snapshot yang tersisa bisa dipulihkan: tidak ada chunk yang terhapus
+    for i, snap in enumerate(reversed(snapshots)):
+        restored = penulis.restore_snapshot(snap.id, os.path.join(tmp, f'restore_{i}.db'))
+        assert _row_count(restored) == 40 + i
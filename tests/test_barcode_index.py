@@ -0,0 +1,87 @@
+"""Test lookup barcode kasir: index per proses, versi dari trigger, stok tidak dicache."""
+
+import sqlite3
+
+from app import barcode_index
+from app.models import db, HargaVariasi, Produk, VarianProduk
+
+
+def _setup(app, with_triggers=True):
+    with app.app_context():
+        kopi = Produk(kode='8991001', nama='Kopi Kapal Api', harga_beli=1, harga_jual=2, stok=5, satuan='pcs')
+        beras = Produk(kode='BRS', nama='Beras', harga_beli=1, harga_jual=10, stok=0, satuan='kg')
+        db.session.add_all([kopi, beras])
+        db.session.flush()
+        db.session.add_all([
+            HargaVariasi(produk_id=kopi.id, min_qty=10, harga=1.5),
+            VarianProduk(produk_id=beras.id, nama_varian='5kg', barcode_varian='BRS-5', stok=3),
+        ])
+        db.session.commit()
+        if with_triggers:
+            assert barcode_index.ensure_triggers(db.session)
+    return app
+
+
+def test_lookup_sama_dengan_to_dict(app):
+    _setup(app)
+    index = barcode_index.BarcodeIndex()
+    with app.app_context():
+        kopi = Produk.query.filter_by(kode='8991001').one()
+        hasil = index.lookup(db.session, ' 8991001 ')
+        assert hasil['produk'] == kopi.to_dict()
+        assert hasil['cocok'] == 'kode' and hasil['varian'] is None
+
+        beras = Produk.query.filter_by(kode='BRS').one()
+        hasil = index.lookup(db.session, 'brs-5')
+        assert hasil['produk'] == beras.to_dict()
+        assert hasil['cocok'] == 'barcode_varian'
+        assert hasil['varian']['nama_varian'] == '5kg' and hasil['varian']['stok'] == 3
+
+        assert index.lookup(db.session, 'tidak-ada') is None
+        assert index.lookup(db.session, '  ') is None
+        assert index.rebuilds == 1
+
+
+def test_perubahan_dari_koneksi_lain(make_app, tmp_path):
+    path = str(tmp_path / 'kasir.db')
+    app = _setup(make_app('sqlite:///' + path))
+    index = barcode_index.BarcodeIndex()
+    with app.app_context():
+        assert index.resolve(db.session, 'BRS-5') is not None
+        db.session.commit()
+
+        # Proses lain (worker / tools) mengubah barcode & stok langsung di database
+        con = sqlite3.connect(path)
+        con.execute("UPDATE varian_produk SET barcode_varian = 'BRS-5KG'")
+        con.commit()
+        assert index.resolve(db.session, 'BRS-5') is None
+        assert index.resolve(db.session, 'BRS-5KG') is not None
+        assert index.rebuilds == 2
+        db.session.commit()
+
+        # Stok tidak menaikkan versi, tapi tetap terbaca terbaru
+        con.execute("UPDATE varian_produk SET stok = 9")
+        con.commit()
+        hasil = index.lookup(db.session, 'BRS-5KG')
+        assert hasil['varian']['stok'] == 9
+        assert index.rebuilds == 2
+        db.session.commit()
+
+        # Harga bertingkat ikut dicache, jadi menaikkan versi
+        con.execute("UPDATE harga_variasi SET harga = 1.25")
+        con.commit()
+        hasil = index.lookup(db.session, '8991001')
+        assert hasil['produk']['harga_variasi'] == [{'min_qty': 10, 'harga': 1.25}]
+        assert index.rebuilds == 3
+        con.close()
+
+
+def test_tanpa_trigger_baca_langsung(app):
+    _setup(app, with_triggers=False)
+    index = barcode_index.BarcodeIndex()
+    with app.app_context():
+        assert index.current_version(db.session) is None
+        hasil = index.lookup(db.session, 'BRS-5')
+        assert hasil['produk']['nama'] == 'Beras' and hasil['varian']['stok'] == 3
+        assert index.lookup(db.session, 'tidak-ada') is None
+        assert index.rebuilds == 0
@@ -0,0 +1,171 @@
+"""Test checkout idempoten: retry dengan kunci sama, batch antrian offline, retensi."""
+
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Database sementara (tidak menyentuh instance/kasir.db), sebelum app_simple diimport
+os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='kasir_test_'), 'kasir.db')
+os.environ.setdefault('BACKUP_MIN_INTERVAL_SECONDS', '86400')
+
+from app import app_simple, idempotensi
+from app.app_simple import app, init_database
+from app.stock_ops import InsufficientStock
+from app.models import db, get_local_now, CheckoutIdempotensi, PenjualanHarian, Produk, Transaksi, User
+
+_client = None
+
+
+def _setup():
+    """Client login + produk Kopi dengan stok 5 (ulang dari awal di setiap test)."""
+    global _client
+    if _client is None:
+        init_database()
+        _client = app.test_client()
+    with app.app_context():
+        for model in (CheckoutIdempotensi, Transaksi, Produk):
+            model.query.delete()
+        db.session.commit()
+        user = User.query.filter_by(username='kasir_test').first()
+        if user is None:
+            user = User(username='kasir_test', nama='Kasir Test', role='kasir')
+            user.set_password('Rahasia123')
+            db.session.add(user)
+        kopi = Produk(kode='KOPI-T', nama='Kopi', harga_beli=1000, harga_jual=2000, stok=5)
+        db.session.add(kopi)
+        db.session.commit()
+        user_id, produk_id = user.id, kopi.id
+    with _client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return _client, produk_id
+
+
+def _sale(produk_id, qty, kunci=None):
+    sale = {'items': [{'id': produk_id, 'quantity': qty, 'price': 2000}], 'total': 2000 * qty, 'bayar': 100000}
+    if kunci:
+        sale['idempotency_key'] = kunci
+    return sale
+
+
+def _stok_dan_transaksi(produk_id):
+    with app.app_context():
+        return db.session.get(Produk, produk_id).stok, Transaksi.query.count()
+
+
+def test_retry_kunci_sama():
+    client, produk_id = _setup()
+    kunci = str(uuid.uuid4())
+    pertama = client.post('/transaksi/checkout', json=_sale(produk_id, 2), headers={'Idempotency-Key': kunci}).json
+    ulang = client.post('/transaksi/checkout', json=_sale(produk_id, 2), headers={'Idempotency-Key': kunci}).json
+    assert pertama['success'] and ulang['duplikat']
+    assert ulang['transaksi_id'] == pertama['transaksi_id'] and ulang['kode_transaksi'] == pertama['kode_transaksi']
+    assert _stok_dan_transaksi(produk_id) == (3, 1)
+
+    # Gagal tidak dicatat: kunci yang sama boleh dicoba lagi
+    kunci = str(uuid.uuid4())
+    gagal = client.post('/transaksi/checkout', json=_sale(produk_id, 9), headers={'Idempotency-Key': kunci}).json
+    assert not gagal['success'] and 'tidak cukup' in gagal['message']
+    assert client.post('/transaksi/checkout', json=_sale(produk_id, 1), headers={'Idempotency-Key': kunci}).json['success']
+
+    salah = client.post('/transaksi/checkout', json=_sale(produk_id, 1), headers={'Idempotency-Key': 'a b'}).json
+    assert not salah['success'] and _stok_dan_transaksi(produk_id) == (2, 2)
+
+
+def test_batch_urut_satu_transaksi():
+    client, produk_id = _setup()
+    kunci = [str(uuid.uuid4()) for _ in range(4)]
+    sales = [_sale(produk_id, 1, kunci[0]), _sale(produk_id, 9, kunci[1]), _sale(produk_id, 3, kunci[2]),
+             _sale(produk_id, 1)]
+    hasil = client.post('/transaksi/checkout/batch', json={'sales': sales}).json['results']
+    assert [h['success'] for h in hasil] == [True, False, True, False]
+    assert [h.get('idempotency_key') for h in hasil[:3]] == kunci[:3]
+    # Stok penjualan sebelumnya di batch yang sama ikut diperhitungkan
+    assert _stok_dan_transaksi(produk_id) == (1, 2)
+
+    # Antrian dikirim ulang (mis. response hilang): tidak ada penjualan ganda
+    ulang = client.post('/transaksi/checkout/batch', json={'sales': sales[:3]}).json['results']
+    assert [h.get('duplikat') for h in ulang] == [True, None, True]
+    assert ulang[0]['transaksi_id'] == hasil[0]['transaksi_id']
+    assert _stok_dan_transaksi(produk_id) == (1, 2)
+
+    assert client.post('/transaksi/checkout/batch', json={'sales': []}).status_code == 400
+
+
+def test_batch_galat_per_penjualan():
+    client, produk_id = _setup()
+    kunci = [str(uuid.uuid4()) for _ in range(4)]
+    asli_proses, asli_decrement = app_simple._proses_checkout, app_simple.decrement_stock_bulk
+
+    def proses_rusak(data, kunci_sale=None, waktu=None):
+        hasil = asli_proses(data, kunci_sale, waktu)
+        if kunci_sale == kunci[1]:
+            raise RuntimeError('galat setelah transaksi ditulis')
+        return hasil
+
+    def decrement_bentrok(session, model, need):
+        if need and need.get(produk_id) == 2:
+            raise InsufficientStock(model.__tablename__, len(need), 0)
+        return asli_decrement(session, model, need)
+
+    app_simple._proses_checkout = proses_rusak
+    app_simple.decrement_stock_bulk = decrement_bentrok
+    try:
+        sales = [_sale(produk_id, 1, k) for k in kunci]
+        sales[2] = _sale(produk_id, 2, kunci[2])
+        response = client.post('/transaksi/checkout/batch', json={'sales': sales})
+    finally:
+        app_simple._proses_checkout, app_simple.decrement_stock_bulk = asli_proses, asli_decrement
+
+    assert response.status_code == 200
+    hasil = response.json['results']
+    assert [h['success'] for h in hasil] == [True, False, False, True]
+    assert not any(h.get('retry') for h in hasil)
+    # Penjualan yang gagal di-rollback ke SAVEPOINT-nya, yang lain tetap tersimpan
+    assert _stok_dan_transaksi(produk_id) == (3, 2)
+    with app.app_context():
+        user_id = User.query.filter_by(username='kasir_test').first().id
+        # Kunci penjualan yang ditolak tidak tercatat (boleh dikirim ulang setelah diperbaiki)
+        assert [idempotensi.cari(db.session, k, user_id) is None for k in kunci] == [False, True, True, False]
+
+
+def test_batch_lewat_tengah_malam():
+    client, produk_id = _setup()
+    kemarin = (get_local_now() - timedelta(days=1)).replace(hour=23, minute=55, second=0, microsecond=0)
+    with app.app_context():
+        PenjualanHarian.query.delete()
+        db.session.commit()
+
+    sales = [_sale(produk_id, 1, str(uuid.uuid4())) for _ in range(4)]
+    # Browser mengirim ISO UTC (toISOString); server memakai waktu lokal
+    sales[0]['dibuat_pada'] = kemarin.astimezone().astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+    sales[1]['dibuat_pada'] = (get_local_now() + timedelta(days=2)).isoformat()
+    sales[2]['dibuat_pada'] = (get_local_now() - timedelta(days=idempotensi.get_retention_days() + 1)).isoformat()
+    sales[3]['dibuat_pada'] = 'kemarin sore'
+    hasil = client.post('/transaksi/checkout/batch', json={'sales': sales}).json['results']
+    assert [h['success'] for h in hasil] == [True, True, False, False]
+
+    # Penjualan sebelum tengah malam tercatat di hari itu: transaksi, nomor, dan rollup
+    assert hasil[0]['tanggal'] == kemarin.strftime('%Y-%m-%d %H:%M:%S')
+    assert kemarin.strftime('%Y%m%d') in hasil[0]['kode_transaksi']
+    # Jam perangkat kasir yang maju dipotong ke sekarang
+    assert hasil[1]['tanggal'][:10] == get_local_now().strftime('%Y-%m-%d')
+    with app.app_context():
+        per_hari = {r.tanggal: r.jumlah_transaksi for r in PenjualanHarian.query}
+        assert per_hari == {kemarin.date(): 1, get_local_now().date(): 1}
+        assert datetime.strptime(hasil[0]['tanggal'], '%Y-%m-%d %H:%M:%S') == \
+            db.session.get(Transaksi, hasil[0]['transaksi_id']).tanggal
+
+
+def test_prune_kunci_lama():
+    _setup()
+    with app.app_context():
+        idempotensi.simpan(db.session, 'kunci-lama-1', 1, 1, {'success': True})
+        idempotensi.simpan(db.session, 'kunci-baru-1', 1, 2, {'success': True})
+        db.session.get(CheckoutIdempotensi, 'kunci-lama-1').created_at = get_local_now() - timedelta(days=30)
+        db.session.commit()
+        assert idempotensi.prune(db.session, days=7) == 1
+        assert idempotensi.cari(db.session, 'kunci-lama-1', 1) is None
+        assert idempotensi.cari(db.session, 'kunci-baru-1', 1)['duplikat']
+        assert not idempotensi.cari(db.session, 'kunci-baru-1', 2)['success']
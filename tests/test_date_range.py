@@ -0,0 +1,74 @@
+"""Test filter rentang tanggal (app/date_range.py) dan pemakaian idx_transaksi_tanggal."""
+
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+
+from app.date_range import filter_tanggal, rentang_tanggal
+from app.models import db, Transaksi
+
+
+def _add_transaksi(kode, tanggal):
+    db.session.add(Transaksi(kode_transaksi=kode, tanggal=tanggal, total=1000, bayar=1000, kembalian=0))
+
+
+def _query_plan(stmt):
+    sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return ' | '.join(str(row[-1]) for row in rows)
+
+
+def test_rentang_setengah_terbuka():
+    awal, akhir = rentang_tanggal('2026-01-31', '2026-02-28')
+    assert awal == datetime(2026, 1, 31)
+    assert akhir == datetime(2026, 3, 1)
+
+    awal, akhir = rentang_tanggal('2026-12-31')
+    assert (awal, akhir) == (datetime(2026, 12, 31), datetime(2027, 1, 1))
+
+
+def test_batas_hari_inklusif(app):
+    with app.app_context():
+        _add_transaksi('T-SEBELUM', datetime(2026, 1, 9, 23, 59, 59, 999999))
+        _add_transaksi('T-AWAL', datetime(2026, 1, 10, 0, 0, 0))
+        _add_transaksi('T-AKHIR', datetime(2026, 1, 11, 23, 59, 59, 999999))
+        _add_transaksi('T-SESUDAH', datetime(2026, 1, 12, 0, 0, 0))
+        db.session.commit()
+
+        kode = {
+            t.kode_transaksi
+            for t in Transaksi.query.filter(*filter_tanggal(Transaksi.tanggal, '2026-01-10', '2026-01-11'))
+        }
+        assert kode == {'T-AWAL', 'T-AKHIR'}
+
+        # Sama dengan filter lama berbasis func.date()
+        lama = {
+            t.kode_transaksi
+            for t in Transaksi.query.filter(
+                func.date(Transaksi.tanggal) >= '2026-01-10',
+                func.date(Transaksi.tanggal) <= '2026-01-11',
+            )
+        }
+        assert kode == lama
+
+        # Batas terbuka di salah satu sisi
+        assert Transaksi.query.filter(*filter_tanggal(Transaksi.tanggal, '2026-01-11')).count() == 2
+        assert Transaksi.query.filter(*filter_tanggal(Transaksi.tanggal, None, '2026-01-09')).count() == 1
+        assert filter_tanggal(Transaksi.tanggal, '', '') == []
+
+
+def test_query_plan_memakai_index(app):
+    with app.app_context():
+        for i in range(200):
+            _add_transaksi(f'T{i:04d}', datetime(2026, 1, 1 + i % 28, i % 24))
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+
+        stmt = select(Transaksi).where(*filter_tanggal(Transaksi.tanggal, '2026-01-05', '2026-01-06'))
+        plan = _query_plan(stmt)
+        assert 'SEARCH' in plan and 'idx_transaksi_tanggal (tanggal>? AND tanggal<?)' in plan, plan
+
+        # Pembanding: filter func.date() membuat SQLite scan seluruh tabel
+        stmt = select(Transaksi).where(func.date(Transaksi.tanggal) >= '2026-01-05')
+        plan = _query_plan(stmt)
+        assert 'SCAN' in plan and 'idx_transaksi_tanggal' not in plan, plan
@@ -0,0 +1,90 @@
+"""Test antrian job export (app/export_jobs.py): selesai, gagal, recover, cleanup."""
+
+import os
+import time
+from datetime import timedelta
+
+from app.export_jobs import ExportJobQueue
+from app.models import db, get_local_now, ExportJob
+
+
+def _make_queue(make_app, tmp_path):
+    tmp = str(tmp_path)
+    # File database (bukan :memory:) karena worker thread memakai koneksi sendiri
+    app = make_app(f"sqlite:///{os.path.join(tmp, 'kasir.db')}")
+    queue = ExportJobQueue(app, os.path.join(tmp, 'exports'), max_workers=1)
+
+    def build(params, progress):
+        progress(50, 'Menulis')
+        path = os.path.join(tmp, f"source_{params['n']}.xlsx")
+        with open(path, 'wb') as fh:
+            fh.write(b'xlsx %d' % params['n'])
+        return path
+
+    def boom(params, progress):
+        raise RuntimeError('gagal dibuat')
+
+    queue.register('dummy', build)
+    queue.register('boom', boom)
+    return app, queue
+
+
+def test_job_selesai_dan_gagal(make_app, tmp_path):
+    app, queue = _make_queue(make_app, tmp_path)
+    finished = []
+    queue.on_finish(finished.append)
+
+    with app.app_context():
+        job = queue.enqueue('dummy', {'n': 1}, 'hasil.xlsx', user_id=1)
+        assert job['status'] == 'queued'
+
+        done = queue.wait(job['id'])
+        assert done['status'] == 'done' and done['progress'] == 100
+        path = queue.file_path(done)
+        with open(path, 'rb') as fh:
+            assert fh.read() == b'xlsx 1'
+
+        # Sumber dihapus (mis. report cache di-invalidasi): file hasil tetap ada
+        os.remove(os.path.join(os.path.dirname(queue.output_dir), 'source_1.xlsx'))
+        assert queue.file_path(done) == path
+
+        failed = queue.wait(queue.enqueue('boom', {}, 'x.xlsx')['id'])
+        assert failed['status'] == 'failed' and 'gagal dibuat' in failed['error']
+        assert failed['filename'] is None
+
+    # Callback dipanggil worker thread setelah status di-commit
+    deadline = time.monotonic() + 5
+    while len(finished) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [j['status'] for j in finished] == ['done', 'failed']
+
+
+def test_recover_job_proses_mati(make_app, tmp_path):
+    app, queue = _make_queue(make_app, tmp_path)
+    with app.app_context():
+        # Job milik proses yang sudah tidak ada (PID tidak mungkin dipakai)
+        db.session.add(ExportJob(id='a' * 32, kind='dummy', params='{"n": 2}', status='running',
+                                 owner=f"{queue.owner.rsplit(':', 1)[0]}:999999999", download_name='x.xlsx',
+                                 updated_at=get_local_now() - timedelta(hours=1)))
+        # Job milik proses ini tidak diambil alih
+        db.session.add(ExportJob(id='b' * 32, kind='dummy', params='{"n": 3}', status='queued',
+                                 owner=queue.owner, download_name='y.xlsx'))
+        db.session.commit()
+
+        assert queue.recover() == 1
+        assert queue.wait('a' * 32)['status'] == 'done'
+        assert queue.status('b' * 32)['status'] == 'queued'
+
+
+def test_cleanup_job_lama(make_app, tmp_path):
+    app, queue = _make_queue(make_app, tmp_path)
+    queue.retention_hours = 1
+    with app.app_context():
+        job = queue.wait(queue.enqueue('dummy', {'n': 4}, 'a.xlsx')['id'])
+        path = queue.file_path(job)
+
+        ExportJob.query.filter_by(id=job['id']).update({'finished_at': get_local_now() - timedelta(hours=2)})
+        db.session.commit()
+
+        assert queue.cleanup() == 1
+        assert queue.status(job['id']) is None and not os.path.exists(path)
@@ -0,0 +1,50 @@
+"""Test snapshot HPP di TransaksiItem: rebuild rollup & backfill item lama."""
+
+from datetime import date, datetime
+
+from app import report_queries, sales_rollup
+from app.models import db, Produk, Transaksi, TransaksiItem
+
+
+def test_rebuild_memakai_snapshot(app, checkout):
+    with app.app_context():
+        beras = Produk(kode='B1', nama='Beras', harga_beli=10000, harga_jual=12000, stok=100)
+        db.session.add(beras)
+        db.session.commit()
+
+        checkout(beras, datetime(2026, 1, 5, 9), 2, harga_beli=10000, kode='T1')
+        sebelum = report_queries.ringkasan(db.session, '2026-01-01', '2026-01-31')
+        assert sebelum['total_keuntungan'] == 4000
+
+        # Harga beli naik (mis. tools/update_harga_beli.py): laporan lampau tidak berubah
+        beras.harga_beli = 11500
+        db.session.commit()
+        sales_rollup.rebuild(db.session)
+        db.session.commit()
+        assert report_queries.ringkasan(db.session, '2026-01-01', '2026-01-31') == sebelum
+
+
+def test_backfill_item_lama(app, checkout):
+    with app.app_context():
+        gula = Produk(kode='G1', nama='Gula', harga_beli=13000, harga_jual=15000, stok=100)
+        minyak = Produk(kode='M1', nama='Minyak', harga_beli=20000, harga_jual=25000, stok=100)
+        db.session.add_all([gula, minyak])
+        db.session.commit()
+
+        # Item dari sebelum ada snapshot: harga_beli NULL, rollup berisi HPP saat itu
+        trx = checkout(gula, datetime(2026, 2, 1, 10), 3, harga_beli=12000, kode='T1')
+        trx.items[0].harga_beli = None
+        # Item tanpa rollup: fallback ke harga beli produk saat ini
+        lama = Transaksi(kode_transaksi='T2', tanggal=datetime(2025, 12, 1, 10), total=25000, bayar=25000, kembalian=0)
+        db.session.add(lama)
+        db.session.add(TransaksiItem(transaksi_ref=lama, produk_id=minyak.id, jumlah=1, harga=25000, subtotal=25000))
+        db.session.commit()
+
+        assert sales_rollup.backfill_harga_beli(db.session) == 2
+        db.session.commit()
+        hpp = {i.transaksi_id: i.harga_beli for i in TransaksiItem.query}
+        assert hpp == {trx.id: 12000, lama.id: 20000}
+
+        # Dijalankan ulang: tidak ada yang berubah
+        assert sales_rollup.backfill_harga_beli(db.session) == 0
+        assert report_queries.ringkasan(db.session, date(2026, 2, 1), date(2026, 2, 1))['total_keuntungan'] == 9000
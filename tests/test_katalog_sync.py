@@ -0,0 +1,96 @@
+"""Test sinkronisasi katalog kasir: snapshot, delta dari trigger versi, tombstone."""
+
+from sqlalchemy import text
+
+from app import katalog_sync
+from app.models import db, HargaVariasi, Produk, VarianProduk
+
+
+def _setup(app):
+    with app.app_context():
+        assert katalog_sync.ensure_triggers(db.session)
+        db.session.add_all([
+            Produk(kode='K1', nama='Kopi', harga_beli=1, harga_jual=2, stok=5),
+            Produk(kode='G1', nama='Gula', harga_beli=1, harga_jual=3, stok=5),
+            Produk(kode='B1', nama='Beras', harga_beli=1, harga_jual=4, stok=5),
+        ])
+        db.session.commit()
+    return app
+
+
+def _ids(data):
+    return [p['id'] for p in data['produk']]
+
+
+def test_snapshot_lalu_delta(app):
+    _setup(app)
+    with app.app_context():
+        kopi, gula, beras = Produk.query.order_by(Produk.id).all()
+        snapshot = katalog_sync.changes(db.session, 0)
+        assert snapshot['penuh'] and _ids(snapshot) == [kopi.id, gula.id, beras.id]
+        assert snapshot['produk'][0] == kopi.to_dict()
+        versi = snapshot['versi']
+
+        # Tidak ada perubahan
+        kosong = katalog_sync.changes(db.session, versi)
+        assert not kosong['penuh'] and kosong['produk'] == [] and kosong['versi'] == versi
+
+        # Stok (seperti checkout), varian, harga bertingkat -> hanya produk itu
+        kopi.stok = 4
+        db.session.add(VarianProduk(produk_id=gula.id, nama_varian='1kg', barcode_varian='G1-1KG', stok=2))
+        db.session.commit()
+        delta = katalog_sync.changes(db.session, versi)
+        assert _ids(delta) == [kopi.id, gula.id] and delta['dihapus'] == []
+        assert delta['produk'][0]['stok'] == 4 and delta['produk'][1]['varian_produk'][0]['barcode_varian'] == 'G1-1KG'
+
+        versi = delta['versi']
+        db.session.add(HargaVariasi(produk_id=beras.id, min_qty=10, harga=3.5))
+        db.session.commit()
+        assert _ids(katalog_sync.changes(db.session, versi)) == [beras.id]
+
+        # Kolom di luar katalog (harga beli) tidak membuat delta
+        versi = katalog_sync.current_version(db.session)
+        db.session.execute(text("UPDATE produk SET harga_beli = 9"))
+        db.session.commit()
+        assert katalog_sync.changes(db.session, versi)['produk'] == []
+
+
+def test_hapus_dan_versi_tidak_dikenal(app):
+    _setup(app)
+    with app.app_context():
+        versi = katalog_sync.current_version(db.session)
+        gula = Produk.query.filter_by(kode='G1').one()
+        gula_id = gula.id
+        db.session.delete(gula)
+        db.session.commit()
+
+        delta = katalog_sync.changes(db.session, versi)
+        assert delta['produk'] == [] and delta['dihapus'] == [gula_id]
+
+        # Versi klien lebih baru dari server (database dipulihkan): snapshot penuh
+        lebih_baru = katalog_sync.changes(db.session, delta['versi'] + 100)
+        assert lebih_baru['penuh'] and len(lebih_baru['produk']) == 2
+
+
+def test_database_lama_diberi_versi(app):
+    with app.app_context():
+        db.session.add(Produk(kode='K1', nama='Kopi', harga_beli=1, harga_jual=2))
+        db.session.commit()
+        # Produk ditulis sebelum trigger terpasang: tetap dapat versi, bukan 0
+        assert katalog_sync.ensure_triggers(db.session)
+        assert katalog_sync.current_version(db.session) == 1
+        assert katalog_sync.ensure_triggers(db.session)
+        assert katalog_sync.current_version(db.session) == 1
+
+
+def test_delta_besar_jadi_snapshot(app):
+    _setup(app)
+    with app.app_context():
+        versi = katalog_sync.current_version(db.session)
+        db.session.execute(text("UPDATE produk SET stok = stok + 1"))
+        db.session.commit()
+        katalog_sync.DELTA_MAX, lama = 2, katalog_sync.DELTA_MAX
+        try:
+            assert katalog_sync.changes(db.session, versi)['penuh']
+        finally:
+            katalog_sync.DELTA_MAX = lama
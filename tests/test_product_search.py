@@ -0,0 +1,64 @@
+"""Test index pencarian produk FTS5: trigger sinkronisasi, ranking & fallback LIKE."""
+
+from app import product_search
+from app.models import db, Produk, VarianProduk
+
+
+def _setup(app, with_index=True):
+    with app.app_context():
+        db.session.add_all([
+            Produk(kode='8991001', nama='Kopi Kapal Api 165gr', harga_beli=1, harga_jual=2),
+            Produk(kode='8991002', nama='Gula Pasir Kopi Mix', harga_beli=1, harga_jual=2),
+            Produk(kode='KOPI', nama='Teh Celup', harga_beli=1, harga_jual=2),
+            Produk(kode='8991004', nama='Beras 5kg', harga_beli=1, harga_jual=2),
+        ])
+        db.session.commit()
+        if with_index:
+            assert product_search.ensure_index(db.session)
+    return app
+
+
+def _cari(search):
+    query, rank = product_search.apply_search(db.session, Produk.query, search)
+    return [p.nama for p in query.order_by(*(rank or [Produk.nama]))]
+
+
+def test_cari_dan_ranking(app):
+    _setup(app)
+    with app.app_context():
+        # Kode persis di urutan pertama, lalu kecocokan di nama
+        assert _cari('kopi') == ['Teh Celup', 'Kopi Kapal Api 165gr', 'Gula Pasir Kopi Mix']
+        # Substring di tengah kata & beberapa kata (AND), termasuk kata pendek
+        assert _cari('apal') == ['Kopi Kapal Api 165gr']
+        assert _cari('kopi 16') == ['Kopi Kapal Api 165gr']
+        assert _cari('5kg beras') == ['Beras 5kg']
+        assert _cari('"%') == []
+        # < 3 huruf: fallback LIKE
+        assert _cari('5k') == ['Beras 5kg']
+
+
+def test_trigger_sinkron(app):
+    _setup(app)
+    with app.app_context():
+        beras = Produk.query.filter_by(kode='8991004').one()
+        db.session.add(VarianProduk(produk_id=beras.id, nama_varian='Karung', barcode_varian='BRS-KARUNG-25'))
+        db.session.commit()
+        assert _cari('karung') == ['Beras 5kg']
+
+        varian = VarianProduk.query.one()
+        varian.barcode_varian = 'BRS-SAK-10'
+        beras.nama = 'Beras Premium 10kg'
+        db.session.commit()
+        assert _cari('karung') == [] and _cari('sak-10') == ['Beras Premium 10kg']
+
+        db.session.add(Produk(kode='8991005', nama='Minyak Goreng 2L', harga_beli=1, harga_jual=2))
+        db.session.delete(beras)
+        db.session.commit()
+        assert _cari('premium') == [] and _cari('goreng') == ['Minyak Goreng 2L']
+
+
+def test_tanpa_index_fallback_like(app):
+    _setup(app, with_index=False)
+    with app.app_context():
+        assert not product_search.index_exists(db.session)
+        assert _cari('kopi') == ['Gula Pasir Kopi Mix', 'Kopi Kapal Api 165gr', 'Teh Celup']
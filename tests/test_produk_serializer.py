@@ -0,0 +1,72 @@
+"""Test serialisasi daftar produk API: jumlah query tetap, bentuk = to_dict(), ETag/304."""
+
+from sqlalchemy import event
+
+from app import produk_serializer
+from app.models import db, HargaVariasi, Produk, VarianProduk
+
+
+def _setup(app, jumlah):
+    with app.app_context():
+        for i in range(jumlah):
+            produk = Produk(kode=f'P{i:03d}', nama=f'Produk {i:03d}', harga_beli=1, harga_jual=2 + i, stok=i, satuan='pcs')
+            db.session.add(produk)
+            db.session.flush()
+            db.session.add_all([
+                HargaVariasi(produk_id=produk.id, min_qty=12, harga=1.5),
+                HargaVariasi(produk_id=produk.id, min_qty=6, harga=1.8),
+                VarianProduk(produk_id=produk.id, nama_varian='Merah', barcode_varian=f'M{i:03d}', stok=1),
+            ])
+        db.session.commit()
+    return app
+
+
+class _HitungQuery:
+    def __init__(self):
+        self.jumlah = 0
+
+    def __call__(self, *args):
+        self.jumlah += 1
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self)
+
+
+def test_jumlah_query_tetap(make_app):
+    for jumlah in (5, 60):
+        app = _setup(make_app(), jumlah)
+        with app.app_context():
+            query = Produk.query.order_by(Produk.nama).limit(50)
+            with _HitungQuery() as hitung:
+                hasil = produk_serializer.produk_dicts(db.session, query)
+            # Produk + harga bertingkat + varian, berapapun jumlah produknya
+            assert hitung.jumlah == 3
+            assert len(hasil) == min(jumlah, 50)
+            db.session.expire_all()
+            assert hasil == [p.to_dict() for p in query.all()]
+
+
+def test_hasil_kosong(app):
+    _setup(app, 0)
+    with app.app_context():
+        with _HitungQuery() as hitung:
+            assert produk_serializer.produk_dicts(db.session, Produk.query) == []
+        assert hitung.jumlah == 1
+
+
+def test_etag_304(app):
+    _setup(app, 0)
+    data = [{'id': 1, 'nama': 'Kopi', 'harga_jual': 2.5}]
+    with app.test_request_context('/api/produk'):
+        response = produk_serializer.json_response(data)
+        assert response.status_code == 200 and response.get_json() == data
+        etag = response.headers['ETag']
+    with app.test_request_context('/api/produk', headers={'If-None-Match': etag}):
+        response = produk_serializer.json_response(data)
+        assert response.status_code == 304
+    with app.test_request_context('/api/produk', headers={'If-None-Match': etag}):
+        assert produk_serializer.json_response(data + [{'id': 2}]).status_code == 200
@@ -0,0 +1,113 @@
+"""Test cache laporan (app/report_cache.py): hit, invalidasi checkout, periode lampau."""
+
+import os
+import tempfile
+from datetime import date
+
+from app import report_cache
+from app.models import db, Produk
+from app.report_cache import ReportCache
+
+
+def _produk(kode='KOPI', nama='Kopi'):
+    produk = Produk(kode=kode, nama=nama, harga_beli=6000, harga_jual=10000, stok=100)
+    db.session.add(produk)
+    db.session.commit()
+    return produk
+
+
+def test_memori_hit_dan_invalidasi(app, checkout):
+    cache = ReportCache(tempfile.mkdtemp())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    with app.app_context():
+        kopi = _produk()
+        checkout(kopi, date(2026, 1, 5))
+        assert cache.get_or_compute(db.session, 'laporan', '2026-01-01', '2026-01-31', compute) == 1
+        assert cache.get_or_compute(db.session, 'laporan', '2026-01-01', '2026-01-31', compute) == 1
+        assert cache.hits == 1 and cache.misses == 1
+
+        # Checkout dari proses lain (tanpa invalidate_date) tetap terdeteksi via sidik jari
+        checkout(kopi, date(2026, 1, 20))
+        assert cache.get_or_compute(db.session, 'laporan', '2026-01-01', '2026-01-31', compute) == 2
+
+        # Checkout di luar rentang tidak membatalkan
+        checkout(kopi, date(2026, 2, 1))
+        assert cache.get_or_compute(db.session, 'laporan', '2026-01-01', '2026-01-31', compute) == 2
+
+        # invalidate_date membuang entri yang mencakup tanggal itu saja
+        cache.get_or_compute(db.session, 'laporan', '2025-12-01', '2025-12-31', compute)
+        cache.invalidate_date('2026-01-10')
+        assert cache.status()['entries'] == 1
+
+
+def test_edit_harga_tetap_cache_ganti_nama_batal(app, checkout):
+    cache = ReportCache(tempfile.mkdtemp())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    with app.app_context():
+        assert report_cache.ensure_triggers(db.session)
+        kopi = _produk()
+        checkout(kopi, date(2025, 12, 24))
+        assert cache.get_or_compute(db.session, 'laporan', '2025-12-01', '2025-12-31', compute) == 1
+
+        # Edit harga / stok dan produk baru: bulan yang sudah tutup tetap dari cache
+        kopi.harga_jual = 2500
+        kopi.stok = 3
+        db.session.commit()
+        _produk('TEH', 'Teh')
+        assert cache.get_or_compute(db.session, 'laporan', '2025-12-01', '2025-12-31', compute) == 1
+
+        # Nama produk tampil di laporan: ganti nama / hapus produk membatalkan
+        kopi.nama = 'Kopi Bubuk'
+        db.session.commit()
+        assert cache.get_or_compute(db.session, 'laporan', '2025-12-01', '2025-12-31', compute) == 2
+        db.session.delete(kopi)
+        db.session.commit()
+        assert cache.get_or_compute(db.session, 'laporan', '2025-12-01', '2025-12-31', compute) == 3
+
+
+def test_file_xlsx_dicache(app, checkout):
+    cache_dir = tempfile.mkdtemp()
+    cache = ReportCache(cache_dir, max_files=2)
+    builds = []
+
+    def build(path):
+        builds.append(path)
+        with open(path, 'wb') as fh:
+            fh.write(b'xlsx')
+
+    with app.app_context():
+        kopi = _produk()
+        checkout(kopi, date(2025, 12, 24))
+        checkout(kopi, date(2026, 1, 5))
+
+        lampau = cache.get_or_build_file(db.session, 'laporan_excel', '2025-12-01', '2025-12-31', build, mode='bulan')
+        bulan_ini = cache.get_or_build_file(db.session, 'laporan_excel', '2026-01-01', '2026-01-31', build, mode='bulan')
+        assert len(builds) == 2
+
+        # Export ulang: tidak dibuat lagi
+        assert cache.get_or_build_file(db.session, 'laporan_excel', '2026-01-01', '2026-01-31', build, mode='bulan') == bulan_ini
+        assert len(builds) == 2
+
+        # Checkout hari ini: file bulan ini dibuat ulang, file versi lama dihapus
+        checkout(kopi, date(2026, 1, 6))
+        cache.invalidate_date(date(2026, 1, 6))
+        baru = cache.get_or_build_file(db.session, 'laporan_excel', '2026-01-01', '2026-01-31', build, mode='bulan')
+        assert len(builds) == 3 and baru != bulan_ini and not os.path.exists(bulan_ini)
+
+        # Periode lampau yang sudah tutup tetap dari cache
+        assert cache.get_or_build_file(db.session, 'laporan_excel', '2025-12-01', '2025-12-31', build, mode='bulan') == lampau
+        assert len(builds) == 3
+
+        # Batas jumlah file (LRU)
+        cache.get_or_build_file(db.session, 'laporan_excel', '2026-01-05', '2026-01-05', build, mode='hari')
+        assert len(os.listdir(cache_dir)) == 2
@@ -0,0 +1,68 @@
+"""Test analitik deret waktu: moving average, growth, musiman, prediksi & restock."""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app import sales_analytics
+from app.models import db, Produk
+
+HARI_INI = date(2026, 3, 2)  # Senin
+
+
+def test_statistik_array():
+    values = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14], dtype=float)
+    ma = sales_analytics.moving_average(values, 7)
+    assert ma[0] == 1 and ma[1] == 1.5 and ma[6] == 4 and ma[-1] == 11
+
+    # 7 hari terakhir (8..14 = 77) vs sebelumnya (1..7 = 28)
+    assert round(sales_analytics.pertumbuhan(values, 7), 1) == 175.0
+    assert sales_analytics.pertumbuhan(values[:10], 7) is None
+
+    dates = sales_analytics.rentang_hari(HARI_INI, HARI_INI + timedelta(days=13))
+    assert sales_analytics.hari_dalam_minggu(dates)[:2].tolist() == [0, 1]
+    # Hanya hari Sabtu yang laku -> indeks Sabtu 7x rata-rata
+    sabtu = np.where(sales_analytics.hari_dalam_minggu(dates) == 5, 100.0, 0.0)
+    indeks = sales_analytics.indeks_musiman(dates, sabtu)
+    assert indeks[5] == 7 and indeks[0] == 0
+
+
+def test_tren_target_dan_restock(app, checkout):
+    with app.app_context():
+        beras = Produk(kode='B1', nama='Beras', harga_beli=10000, harga_jual=12000, stok=20, minimal_stok=5)
+        gula = Produk(kode='G1', nama='Gula', harga_beli=14000, harga_jual=15000, stok=500, minimal_stok=5)
+        db.session.add_all([beras, gula])
+        db.session.commit()
+
+        # 28 hari: beras 4/hari, gula 1/hari; hari ini baru 1 beras
+        for i in range(28, 0, -1):
+            hari = datetime.combine(HARI_INI - timedelta(days=i), datetime.min.time()) + timedelta(hours=9)
+            checkout(beras, hari, 4)
+            checkout(gula, hari + timedelta(hours=1), 1)
+        checkout(beras, datetime.combine(HARI_INI, datetime.min.time()) + timedelta(hours=8), 1)
+
+        tren = sales_analytics.tren_penjualan(db.session, HARI_INI)
+        assert len(tren['omzet']) == 28 and tren['omzet_hari_ini'] == 12000
+        assert tren['transaksi_7_hari'] == 6 * 2 + 1
+        assert tren['hari_terbaik']['omzet'] == 63000
+        assert tren['prediksi_hari_ini'] == 63000
+
+        target, sumber = sales_analytics.target_harian(db.session, HARI_INI)
+        assert (target, sumber) == (63000, 'prediksi')
+
+        jam = sales_analytics.profil_jam(db.session, HARI_INI - timedelta(days=1), HARI_INI)
+        assert jam['jam_tersibuk'] == 9 and jam['omzet'][8] == 12000
+
+        saran = sales_analytics.saran_restock(db.session, HARI_INI)
+        assert [p['kode'] for p in saran] == ['B1']
+        assert saran[0]['prediksi'] == 28 and saran[0]['hari_habis'] == 5
+        assert saran[0]['saran'] == 28 + 5 - 20
+
+
+def test_target_dari_config(app, monkeypatch):
+    monkeypatch.setenv('TARGET_PENJUALAN_HARIAN', '2500000')
+    with app.app_context():
+        assert sales_analytics.target_harian(db.session, HARI_INI) == (2500000, 'config')
+    monkeypatch.delenv('TARGET_PENJUALAN_HARIAN')
+    with app.app_context():
+        assert sales_analytics.target_harian(db.session, HARI_INI) == (5_000_000, 'default')
@@ -4,7 +4,13 @@
 BACKUP OTOMATIS SYSTEM - STANDALONE VERSION
 ============================================
 Script untuk backup produk, transaksi, dan database
-Menggunakan SQLite3 (built-in Python, tanpa dependency ekstra)
+
+Backup database memakai modul aplikasi (app.backup_engine, app.backup_store,
+app.factory.create_app), jadi jalankan dari root project dengan dependency
+aplikasi terpasang:
+
+    pip install -r requirements.txt
+    python tools/backup_otomatis_standalone.py auto
 """
 
 import os
@@ -16,6 +22,11 @@ import sqlite3
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.backup_engine import online_backup
+from app.backup_store import BackupStore
+
 # Force UTF-8 output on Windows
 if sys.platform == 'win32':
     import io
@@ -29,6 +40,7 @@ BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
 DB_PATH = os.path.join(INSTANCE_DIR, 'kasir.db')
+STORE_DIR = os.path.join(BACKUP_DIR, 'store')
 
 # Pastikan direktori ada
 os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -160,99 +172,30 @@ def backup_produk():
 # BACKUP TRANSAKSI
 # ===============================
 def backup_transaksi():
-    """Backup semua data transaksi ke CSV dan JSON"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
+    """
+    Export transaksi incremental (hanya transaksi baru sejak export terakhir).
+
+    Dulu seluruh tabel transaksi ditulis ulang ke CSV + JSON setiap kali;
+    sekarang memakai export analitik kolumnar yang dipartisi per bulan
+    (lihat app/analytics_export.py).
+    """
     try:
-        conn = get_db_connection()
-        if not conn:
-            return
-        
-        cursor = conn.cursor()
-        
-        # Query transaksi dengan user dan member
-        cursor.execute("""
-            SELECT 
-                t.id, t.kode_transaksi, t.tanggal,
-                t.subtotal, t.discount_percent, t.discount_amount,
-                t.total, t.bayar, t.kembalian, t.payment_method,
-                COALESCE(u.nama, '-') as kasir,
-                COALESCE(m.nama, t.member_manual, '-') as member,
-                COALESCE(t.points_earned, 0) as points_earned
-            FROM transaksi t
-            LEFT JOIN user u ON t.user_id = u.id
-            LEFT JOIN member m ON t.member_id = m.id
-            ORDER BY t.tanggal DESC
-        """)
-        
-        transaksi_list = cursor.fetchall()
-        
-        if not transaksi_list:
-            print(f"{Colors.WARNING}[WARNING] Tidak ada transaksi untuk di-backup{Colors.ENDC}")
-            conn.close()
+        from app.factory import create_app
+        from app.models import db
+        from app.analytics_export import export_analytics
+
+        app = create_app()
+        with app.app_context():
+            result = export_analytics(db.session)
+
+        if not result['transaksi']:
+            print(f"{Colors.WARNING}[WARNING] Tidak ada transaksi baru untuk di-backup{Colors.ENDC}")
             return
-        
-        # Backup ke CSV
-        csv_filename = f"backup_transaksi_{timestamp}.csv"
-        csv_path = os.path.join(DATA_DIR, csv_filename)
-        
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['ID', 'Kode Transaksi', 'Tanggal', 'Subtotal', 'Diskon %', 'Diskon Rp',
-                         'Total', 'Bayar', 'Kembalian', 'Metode Pembayaran', 'Kasir', 'Member',
-                         'Poin Earned', 'Backup Date']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for row in transaksi_list:
-                writer.writerow({
-                    'ID': row['id'],
-                    'Kode Transaksi': row['kode_transaksi'],
-                    'Tanggal': row['tanggal'],
-                    'Subtotal': row['subtotal'],
-                    'Diskon %': row['discount_percent'],
-                    'Diskon Rp': row['discount_amount'],
-                    'Total': row['total'],
-                    'Bayar': row['bayar'],
-                    'Kembalian': row['kembalian'],
-                    'Metode Pembayaran': row['payment_method'].upper(),
-                    'Kasir': row['kasir'],
-                    'Member': row['member'],
-                    'Poin Earned': row['points_earned'],
-                    'Backup Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-        
-        # Backup ke JSON
-        json_filename = f"backup_transaksi_{timestamp}.json"
-        json_path = os.path.join(DATA_DIR, json_filename)
-        
-        transaksi_data = []
-        for row in transaksi_list:
-            transaksi_data.append({
-                'id': row['id'],
-                'kode_transaksi': row['kode_transaksi'],
-                'tanggal': row['tanggal'],
-                'subtotal': row['subtotal'],
-                'discount_percent': row['discount_percent'],
-                'discount_amount': row['discount_amount'],
-                'total': row['total'],
-                'bayar': row['bayar'],
-                'kembalian': row['kembalian'],
-                'payment_method': row['payment_method'],
-                'kasir': row['kasir'],
-                'member': row['member'],
-                'poin_earned': row['points_earned']
-            })
-        
-        with open(json_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(transaksi_data, jsonfile, ensure_ascii=False, indent=2)
-        
-        total = len(transaksi_list)
+
         print(f"{Colors.OKGREEN}[OK] Backup Transaksi Berhasil!{Colors.ENDC}")
-        print(f"   📊 Total transaksi: {total}")
-        print(f"   📄 CSV: {csv_filename}")
-        print(f"   📋 JSON: {json_filename}")
-        
-        conn.close()
+        print(f"   📊 Transaksi baru: {result['transaksi']} (#{result['dari_id'] + 1}..#{result['sampai_id']})")
+        print(f"   🧾 Item: {result['item']}")
+        print(f"   📁 Partisi ({result['format']}): {', '.join(result['partisi'])}")
         
     except Exception as e:
         print(f"{Colors.FAIL}[ERROR] Gagal backup transaksi: {str(e)}{Colors.ENDC}")
@@ -271,12 +214,22 @@ def backup_database():
             print(f"{Colors.FAIL}❌ Database tidak ditemukan: {DB_PATH}{Colors.ENDC}")
             return
         
-        shutil.copy2(DB_PATH, backup_path)
-        filesize = os.path.getsize(backup_path) / (1024*1024)  # Convert to MB
+        def _progress(done, total):
+            if total:
+                print(f"\r   ⏳ {done}/{total} pages ({done * 100 // total}%)", end='', flush=True)
+        
+        result = online_backup(DB_PATH, backup_path, progress=_progress)
+        print()
+        if not result.ok:
+            print(f"{Colors.FAIL}[ERROR] Gagal backup database: {result.reason} {result.verify or ''}{Colors.ENDC}")
+            return
+        
+        filesize = result.size_bytes / (1024*1024)  # Convert to MB
         
         print(f"{Colors.OKGREEN}[OK] Backup Database Berhasil!{Colors.ENDC}")
         print(f"   📦 File: {backup_name}")
         print(f"   💾 Ukuran: {filesize:.2f} MB")
+        print(f"   ✅ Verifikasi: {result.verify} ({result.duration_s:.2f}s)")
         
     except Exception as e:
         print(f"{Colors.FAIL}[ERROR] Gagal backup database: {str(e)}{Colors.ENDC}")
@@ -326,11 +279,15 @@ def list_backups():
     else:
         print("  (Tidak ada)")
     
-    # List transaksi backups
+    # List transaksi backups (export analitik incremental)
     print(f"\n{Colors.OKBLUE}Backup Transaksi:{Colors.ENDC}")
-    transaksi_csv = sorted([f for f in os.listdir(DATA_DIR) if f.startswith('backup_transaksi_') and f.endswith('.csv')], reverse=True)
-    if transaksi_csv:
-        for i, f in enumerate(transaksi_csv[:5], 1):
+    from app.analytics_export import get_export_dir, read_watermark
+    transaksi_dir = os.path.join(get_export_dir(), 'transaksi')
+    partisi = sorted(os.listdir(transaksi_dir), reverse=True) if os.path.isdir(transaksi_dir) else []
+    if partisi:
+        watermark = read_watermark()
+        print(f"  Sampai transaksi #{watermark.get('transaksi_id', 0)} ({watermark.get('updated_at', '-')})")
+        for i, f in enumerate(partisi[:5], 1):
             print(f"  {i}. {f}")
     else:
         print("  (Tidak ada)")
@@ -401,10 +358,14 @@ def restore_database():
         # Create backup of current database first
         if os.path.exists(DB_PATH):
             backup_current = os.path.join(BACKUP_DIR, f"kasir_backup_before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
-            shutil.copy2(DB_PATH, backup_current)
+            result = online_backup(DB_PATH, backup_current)
+            if not result.ok:
+                print(f"{Colors.FAIL}[ERROR] Gagal backup database saat ini: {result.reason}{Colors.ENDC}")
+                return
             print(f"   💾 Backup database saat ini: kasir_backup_before_restore_*.db")
         
         # Restore
+        _remove_wal_files(DB_PATH)
         shutil.copy2(backup_path, DB_PATH)
         print(f"{Colors.OKGREEN}[OK] Restore berhasil dari: {selected_backup}{Colors.ENDC}\n")
         
@@ -413,6 +374,56 @@ def restore_database():
     except Exception as e:
         print(f"{Colors.FAIL}[ERROR] Gagal restore: {str(e)}{Colors.ENDC}")
 
+def _remove_wal_files(db_path):
+    """Hapus file -wal/-shm lama supaya tidak diterapkan ke database hasil restore"""
+    for suffix in ('-wal', '-shm'):
+        path = db_path + suffix
+        if os.path.exists(path):
+            os.remove(path)
+
+# ===============================
+# BACKUP STORE (SNAPSHOT DEDUP)
+# ===============================
+def list_snapshots():
+    """List snapshot di backup store (dibuat otomatis oleh aplikasi)"""
+    store = BackupStore(STORE_DIR)
+    snapshots = store.list_snapshots()
+    print(f"\n{Colors.BOLD}[SNAPSHOT LIST]{Colors.ENDC}\n")
+    if not snapshots:
+        print("  (Tidak ada)")
+        return
+    for i, snap in enumerate(snapshots, 1):
+        print(f"  {i}. {snap.id} ({snap.size_bytes / (1024*1024):.2f} MB, {snap.chunk_count} chunk)")
+    print(f"\n   💾 Total disk store: {store.disk_usage() / (1024*1024):.2f} MB\n")
+
+def restore_snapshot(snapshot_id=None):
+    """Restore database dari snapshot di backup store"""
+    store = BackupStore(STORE_DIR)
+    snapshots = store.list_snapshots()
+    if not snapshots:
+        print(f"{Colors.WARNING}⚠️ Tidak ada snapshot untuk direstore{Colors.ENDC}")
+        return
+    
+    snapshot_id = snapshot_id or snapshots[0].id
+    if snapshot_id not in {s.id for s in snapshots}:
+        print(f"{Colors.FAIL}❌ Snapshot tidak ditemukan: {snapshot_id}{Colors.ENDC}")
+        return
+    
+    try:
+        if os.path.exists(DB_PATH):
+            backup_current = os.path.join(BACKUP_DIR, f"kasir_backup_before_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+            result = online_backup(DB_PATH, backup_current)
+            if not result.ok:
+                print(f"{Colors.FAIL}[ERROR] Gagal backup database saat ini: {result.reason}{Colors.ENDC}")
+                return
+            print(f"   💾 Backup database saat ini: {os.path.basename(backup_current)}")
+        
+        _remove_wal_files(DB_PATH)
+        store.restore_snapshot(snapshot_id, DB_PATH)
+        print(f"{Colors.OKGREEN}[OK] Restore berhasil dari snapshot: {snapshot_id}{Colors.ENDC}\n")
+    except Exception as e:
+        print(f"{Colors.FAIL}[ERROR] Gagal restore snapshot: {str(e)}{Colors.ENDC}")
+
 # ===============================
 # MAIN MENU
 # ===============================
@@ -492,11 +503,16 @@ def main():
             list_backups()
         elif command == 'cleanup':
             cleanup_old_backups()
+        elif command == 'snapshots':
+            list_snapshots()
+        elif command == 'restore-snapshot':
+            restore_snapshot(sys.argv[2] if len(sys.argv) > 2 else None)
         elif command == '--help' or command == '-h':
             print(f"""
 {Colors.BOLD}BACKUP OTOMATIS - USAGE{Colors.ENDC}
 
-Usage: python backup_otomatis.py [command]
+Usage (dari root project, butuh dependency di requirements.txt):
+  python tools/backup_otomatis_standalone.py [command]
 
 Commands:
   (no args)     - Interactive menu
@@ -506,12 +522,14 @@ Commands:
   database      - Backup hanya database
   list          - List semua backup files
   cleanup       - Hapus backup lama
+  snapshots     - List snapshot di backup store (dedup)
+  restore-snapshot [ID] - Restore dari snapshot (default: terbaru)
   --help        - Tampilkan help
 
 Contoh:
-  python backup_otomatis.py auto
-  python backup_otomatis.py produk
-  python backup_otomatis.py list
+  python tools/backup_otomatis_standalone.py auto
+  python tools/backup_otomatis_standalone.py produk
+  python tools/backup_otomatis_standalone.py list
             """)
         else:
             print(f"{Colors.FAIL}[ERROR] Unknown command: {command}{Colors.ENDC}")
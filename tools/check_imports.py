@@ -3,7 +3,10 @@ import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.app_simple import db, app, Produk
+from app.factory import create_app
+from app.models import db, Produk
+
+app = create_app()
 
 with app.app_context():
     products = Produk.query.limit(10).all()
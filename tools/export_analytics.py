@@ -0,0 +1,46 @@
+"""Export analitik kolumnar (incremental) transaksi, item, dan produk.
+
+Hanya transaksi baru sejak export terakhir (watermark) yang ditulis, dipartisi
+per bulan. Lihat app/analytics_export.py untuk layout folder.
+
+Cara pakai:
+    python tools/export_analytics.py                      # incremental, format auto
+    python tools/export_analytics.py --format csv         # paksa CSV gzip
+    python tools/export_analytics.py --full               # tulis ulang semua
+    python tools/export_analytics.py --out /mnt/analytics
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = BASE_DIR / "app"
+
+sys.path.insert(0, str(APP_DIR))
+
+from factory import create_app  # noqa: E402
+from models import db  # noqa: E402
+from analytics_export import export_analytics, get_export_dir  # noqa: E402
+
+app = create_app()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export analitik kolumnar (incremental)")
+    parser.add_argument("--format", choices=["auto", "parquet", "csv"], default=None)
+    parser.add_argument("--full", action="store_true", help="hapus export lama dan tulis ulang semua transaksi")
+    parser.add_argument("--out", default=None, help=f"folder tujuan (default {get_export_dir()})")
+    args = parser.parse_args()
+
+    with app.app_context():
+        result = export_analytics(db.session, out_dir=args.out, fmt=args.format, full=args.full)
+
+    if result["partisi"]:
+        print(f"Partisi bulan: {', '.join(result['partisi'])}")
+    else:
+        print("Tidak ada transaksi baru.")
+
+
+if __name__ == "__main__":
+    main()
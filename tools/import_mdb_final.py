@@ -12,7 +12,10 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app.app_simple import db, app, Produk
+from app.factory import create_app
+from app.models import db, Produk
+
+app = create_app()
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DEFAULT_MDB_PATH = BASE_DIR / "data" / "dbamiramart_2026February - Copy (2).MDB"
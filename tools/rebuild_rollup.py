@@ -0,0 +1,40 @@
+"""Hitung ulang rollup penjualan harian dari tabel transaksi.
+
+Dipakai untuk backfill database lama atau memperbaiki rollup yang tidak cocok
+(mis. setelah import/hapus transaksi manual).
+
+Cara pakai:
+    python tools/rebuild_rollup.py                          # semua tanggal
+    python tools/rebuild_rollup.py 2026-01-01 2026-01-31    # rentang inklusif
+"""
+
+from pathlib import Path
+import sys
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = BASE_DIR / "app"
+
+sys.path.insert(0, str(APP_DIR))
+
+from factory import create_app  # noqa: E402
+from models import db  # noqa: E402
+import sales_rollup  # noqa: E402
+
+app = create_app()
+
+
+def main() -> None:
+    mulai = sys.argv[1] if len(sys.argv) > 1 else None
+    selesai = sys.argv[2] if len(sys.argv) > 2 else mulai
+
+    with app.app_context():
+        db.create_all()
+        result = sales_rollup.rebuild(db.session, mulai, selesai)
+        db.session.commit()
+
+    periode = f"{mulai} s/d {selesai}" if mulai else "semua tanggal"
+    print(f"Selesai ({periode}): {result['hari']} hari, {result['produk']} baris produk ditulis.")
+
+
+if __name__ == "__main__":
+    main()
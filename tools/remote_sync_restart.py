@@ -95,6 +95,13 @@ def main() -> int:
                 (local_root / ".env", f"{remote_root}/.env"),
                 (local_root / "telegram_bot.py", f"{remote_root}/telegram_bot.py"),
                 (local_root / "app_simple.py", f"{remote_root}/app_simple.py"),
+                (local_root / "gunicorn.conf.py", f"{remote_root}/gunicorn.conf.py"),
+            ]
+            # Modul pendukung app_simple (models, backup, db tuning, dll.)
+            file_sync += [
+                (lp, f"{remote_root}/app/{lp.name}")
+                for lp in sorted((local_root / "app").glob("*.py"))
+                if lp.name not in ("app_simple.py", "telegram_bot.py")
             ]
             
             for lp, rp in file_sync:
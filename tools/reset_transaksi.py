@@ -5,6 +5,7 @@ Cara pakai:
 """
 
 from pathlib import Path
+import os
 import sys
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -12,7 +13,12 @@ APP_DIR = BASE_DIR / "app"
 
 sys.path.insert(0, str(APP_DIR))
 
-from app_simple import app, db, Member, Transaksi, TransaksiItem  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import db, Member, Transaksi, TransaksiItem  # noqa: E402
+import sales_rollup  # noqa: E402
+from report_cache import initialize_report_cache  # noqa: E402
+
+app = create_app()
 
 
 def main() -> None:
@@ -26,12 +32,16 @@ def main() -> None:
     with app.app_context():
         db.session.query(TransaksiItem).delete(synchronize_session=False)
         db.session.query(Transaksi).delete(synchronize_session=False)
+        sales_rollup.clear(db.session)
         db.session.query(Member).update(
             {Member.points: 0, Member.total_spent: 0},
             synchronize_session=False
         )
         db.session.commit()
 
+    # File xlsx laporan di cache (sama seperti reset dari Telegram)
+    initialize_report_cache(os.path.join(app.instance_path, 'report_cache')).clear()
+
     print("Selesai: transaksi dihapus, poin/total belanja member direset.")
 
 